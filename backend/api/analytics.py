@@ -1,11 +1,11 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date, timedelta
 
 from models.database import Lead, Couple, Campaign, LoanOfficer, LeadStatus, WeddingStage
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_user
 
 router = APIRouter()
@@ -33,29 +33,29 @@ class RevenueByMonth(BaseModel):
 
 @router.get("/dashboard", response_model=DashboardMetrics)
 async def get_dashboard_metrics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get high-level dashboard metrics."""
     
     # Total couples
-    total_couples = db.query(func.count(Couple.id)).scalar()
+    total_couples = await db.scalar(select(func.count(Couple.id)))
     
     # Total leads
-    total_leads = db.query(func.count(Lead.id)).scalar()
+    total_leads = await db.scalar(select(func.count(Lead.id)))
     
     # Qualified leads
-    qualified_leads = db.query(func.count(Lead.id)).filter(
-        Lead.status == LeadStatus.QUALIFIED
-    ).scalar()
+    qualified_leads = await db.scalar(
+        select(func.count(Lead.id)).where(Lead.status == LeadStatus.QUALIFIED)
+    )
     
     # Converted leads
-    converted_leads = db.query(func.count(Lead.id)).filter(
-        Lead.status == LeadStatus.CONVERTED
-    ).scalar()
+    converted_leads = await db.scalar(
+        select(func.count(Lead.id)).where(Lead.status == LeadStatus.CONVERTED)
+    )
     
     # Average lead score
-    avg_score_result = db.query(func.avg(Lead.lead_score)).scalar()
+    avg_score_result = await db.scalar(select(func.avg(Lead.lead_score)))
     average_lead_score = float(avg_score_result) if avg_score_result else 0.0
     
     # Conversion rate
@@ -63,10 +63,12 @@ async def get_dashboard_metrics(
     
     # Leads ready for contact (past waiting period)
     now = datetime.now()
-    leads_ready = db.query(func.count(Lead.id)).filter(
-        Lead.earliest_contact_date <= now,
-        Lead.status == LeadStatus.NEW
-    ).scalar()
+    leads_ready = await db.scalar(
+        select(func.count(Lead.id)).where(
+            Lead.earliest_contact_date <= now,
+            Lead.status == LeadStatus.NEW
+        )
+    )
     
     # TODO: Calculate total revenue from closed loans
     total_revenue = 0.0  # This would come from a loans/closings table
@@ -84,14 +86,16 @@ async def get_dashboard_metrics(
 
 @router.get("/leads-by-stage", response_model=List[LeadsByStage])
 async def get_leads_by_stage(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get lead distribution by status."""
-    results = db.query(
-        Lead.status,
-        func.count(Lead.id).label('count')
-    ).group_by(Lead.status).all()
+    results = (await db.execute(
+        select(
+            Lead.status,
+            func.count(Lead.id).label('count')
+        ).group_by(Lead.status)
+    )).all()
     
     return [
         LeadsByStage(stage=result[0].value, count=result[1])
@@ -100,14 +104,16 @@ async def get_leads_by_stage(
 
 @router.get("/wedding-stages", response_model=List[LeadsByStage])
 async def get_couples_by_wedding_stage(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get couple distribution by wedding stage."""
-    results = db.query(
-        Couple.wedding_stage,
-        func.count(Couple.id).label('count')
-    ).group_by(Couple.wedding_stage).all()
+    results = (await db.execute(
+        select(
+            Couple.wedding_stage,
+            func.count(Couple.id).label('count')
+        ).group_by(Couple.wedding_stage)
+    )).all()
     
     return [
         LeadsByStage(stage=result[0].value, count=result[1])
@@ -116,7 +122,7 @@ async def get_couples_by_wedding_stage(
 
 @router.get("/lead-scores")
 async def get_lead_score_distribution(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get lead score distribution."""
@@ -131,9 +137,11 @@ async def get_lead_score_distribution(
     
     distribution = []
     for range_name, min_score, max_score in score_ranges:
-        count = db.query(func.count(Lead.id)).filter(
-            and_(Lead.lead_score >= min_score, Lead.lead_score <= max_score)
-        ).scalar()
+        count = await db.scalar(
+            select(func.count(Lead.id)).where(
+                and_(Lead.lead_score >= min_score, Lead.lead_score <= max_score)
+            )
+        )
         
         distribution.append({
             "score_range": range_name,
@@ -144,19 +152,21 @@ async def get_lead_score_distribution(
 
 @router.get("/campaign-performance")
 async def get_campaign_performance_summary(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get overall campaign performance metrics."""
-    campaigns = db.query(Campaign).filter(
-        Campaign.created_by_officer_id == current_user.id
-    ).all()
+    totals = (await db.execute(
+        select(
+            func.count(Campaign.id),
+            func.coalesce(func.sum(Campaign.total_sends), 0),
+            func.coalesce(func.sum(Campaign.total_opens), 0),
+            func.coalesce(func.sum(Campaign.total_clicks), 0),
+            func.coalesce(func.sum(Campaign.total_conversions), 0)
+        ).where(Campaign.created_by_officer_id == current_user.id)
+    )).one()
     
-    total_campaigns = len(campaigns)
-    total_sends = sum(c.total_sends for c in campaigns)
-    total_opens = sum(c.total_opens for c in campaigns)
-    total_clicks = sum(c.total_clicks for c in campaigns)
-    total_conversions = sum(c.total_conversions for c in campaigns)
+    total_campaigns, total_sends, total_opens, total_clicks, total_conversions = totals
     
     avg_open_rate = (total_opens / total_sends * 100) if total_sends > 0 else 0
     avg_click_rate = (total_clicks / total_sends * 100) if total_sends > 0 else 0
@@ -175,28 +185,32 @@ async def get_campaign_performance_summary(
 
 @router.get("/geographic-distribution")
 async def get_geographic_distribution(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get geographic distribution of couples."""
     # By state
-    by_state = db.query(
-        Couple.wedding_state,
-        func.count(Couple.id).label('count')
-    ).filter(
-        Couple.wedding_state.isnot(None)
-    ).group_by(Couple.wedding_state).order_by(func.count(Couple.id).desc()).all()
+    by_state = (await db.execute(
+        select(
+            Couple.wedding_state,
+            func.count(Couple.id).label('count')
+        ).where(
+            Couple.wedding_state.isnot(None)
+        ).group_by(Couple.wedding_state).order_by(func.count(Couple.id).desc())
+    )).all()
     
     # By city (top 10)
-    by_city = db.query(
-        Couple.wedding_city,
-        Couple.wedding_state,
-        func.count(Couple.id).label('count')
-    ).filter(
-        and_(Couple.wedding_city.isnot(None), Couple.wedding_state.isnot(None))
-    ).group_by(Couple.wedding_city, Couple.wedding_state).order_by(
-        func.count(Couple.id).desc()
-    ).limit(10).all()
+    by_city = (await db.execute(
+        select(
+            Couple.wedding_city,
+            Couple.wedding_state,
+            func.count(Couple.id).label('count')
+        ).where(
+            and_(Couple.wedding_city.isnot(None), Couple.wedding_state.isnot(None))
+        ).group_by(Couple.wedding_city, Couple.wedding_state).order_by(
+            func.count(Couple.id).desc()
+        ).limit(10)
+    )).all()
     
     return {
         "by_state": [
@@ -212,7 +226,7 @@ async def get_geographic_distribution(
 @router.get("/timeline-analysis")
 async def get_timeline_analysis(
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get timeline analysis of leads and couples created over time."""
@@ -222,20 +236,24 @@ async def get_timeline_analysis(
     start_date = end_date - timedelta(days=days)
     
     # Leads created over time
-    leads_by_day = db.query(
-        func.date(Lead.created_at).label('date'),
-        func.count(Lead.id).label('count')
-    ).filter(
-        Lead.created_at >= start_date
-    ).group_by(func.date(Lead.created_at)).order_by(func.date(Lead.created_at)).all()
+    leads_by_day = (await db.execute(
+        select(
+            func.date(Lead.created_at).label('date'),
+            func.count(Lead.id).label('count')
+        ).where(
+            Lead.created_at >= start_date
+        ).group_by(func.date(Lead.created_at)).order_by(func.date(Lead.created_at))
+    )).all()
     
     # Couples added over time
-    couples_by_day = db.query(
-        func.date(Couple.created_at).label('date'),
-        func.count(Couple.id).label('count')
-    ).filter(
-        Couple.created_at >= start_date
-    ).group_by(func.date(Couple.created_at)).order_by(func.date(Couple.created_at)).all()
+    couples_by_day = (await db.execute(
+        select(
+            func.date(Couple.created_at).label('date'),
+            func.count(Couple.id).label('count')
+        ).where(
+            Couple.created_at >= start_date
+        ).group_by(func.date(Couple.created_at)).order_by(func.date(Couple.created_at))
+    )).all()
     
     return {
         "leads_timeline": [
@@ -1,11 +1,15 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from models.database import Campaign, CampaignSend, CampaignStatus
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_user
+from services.content_validation import get_content_validator
+from utils.serialization import RowSerializer
 
 router = APIRouter()
 
@@ -33,6 +37,11 @@ class CampaignUpdate(CampaignBase):
     status: Optional[CampaignStatus] = None
     scheduled_send_date: Optional[datetime] = None
 
+class ContentIssueResponse(BaseModel):
+    rule: str
+    message: str
+    positions: List[int] = []
+
 class CampaignResponse(CampaignBase):
     id: int
     status: CampaignStatus
@@ -45,33 +54,67 @@ class CampaignResponse(CampaignBase):
     created_by_officer_id: Optional[int]
     created_at: datetime
     updated_at: datetime
+    content_issues: List[ContentIssueResponse] = []
     
     class Config:
         from_attributes = True
 
+campaign_serializer = RowSerializer(CampaignResponse, Campaign)
+
+def campaign_content_issues(email_template: Optional[str]) -> List[Dict[str, Any]]:
+    """Content issues of an email template, as response dicts.
+    
+    Verdicts are cached by template hash, so each template version is only
+    scanned once, when it is saved; reads reuse that verdict.
+    """
+    if not email_template:
+        return []
+    return [
+        {"rule": issue.rule, "message": issue.message, "positions": list(issue.positions)}
+        for issue in get_content_validator().validate(email_template)
+    ]
+
+def build_campaign_response(campaign: Campaign) -> CampaignResponse:
+    """Build a campaign response including content issues for its email template."""
+    response = CampaignResponse.model_validate(campaign)
+    response.content_issues = [
+        ContentIssueResponse(**issue) for issue in campaign_content_issues(campaign.email_template)
+    ]
+    return response
+
+def campaign_row_to_dict(row) -> Dict[str, Any]:
+    """Read-model dict for a campaign row, with its content issues."""
+    data = campaign_serializer.to_dict(row)
+    data["content_issues"] = campaign_content_issues(row.email_template)
+    return data
+
 @router.get("/", response_model=List[CampaignResponse])
 async def get_campaigns(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get all campaigns for the current user."""
-    campaigns = db.query(Campaign).filter(
-        Campaign.created_by_officer_id == current_user.id
-    ).order_by(Campaign.created_at.desc()).all()
+    campaigns = (await db.execute(
+        campaign_serializer.select().where(
+            Campaign.created_by_officer_id == current_user.id
+        ).order_by(Campaign.created_at.desc())
+    )).all()
     
-    return campaigns
+    return ORJSONResponse([campaign_row_to_dict(campaign) for campaign in campaigns])
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
 async def get_campaign(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get a specific campaign."""
-    campaign = db.query(Campaign).filter(
-        Campaign.id == campaign_id,
-        Campaign.created_by_officer_id == current_user.id
-    ).first()
+    campaign = (await db.execute(
+        campaign_serializer.select().where(
+            Campaign.id == campaign_id,
+            Campaign.created_by_officer_id == current_user.id
+        )
+    )).first()
     
     if not campaign:
         raise HTTPException(
@@ -79,12 +122,12 @@ async def get_campaign(
             detail="Campaign not found"
         )
     
-    return campaign
+    return ORJSONResponse(campaign_row_to_dict(campaign))
 
 @router.post("/", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
 async def create_campaign(
     campaign_data: CampaignCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Create a new campaign."""
@@ -94,23 +137,25 @@ async def create_campaign(
     )
     
     db.add(campaign)
-    db.commit()
-    db.refresh(campaign)
+    await db.commit()
+    await db.refresh(campaign)
     
-    return campaign
+    return build_campaign_response(campaign)
 
 @router.put("/{campaign_id}", response_model=CampaignResponse)
 async def update_campaign(
     campaign_id: int,
     campaign_data: CampaignUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Update a campaign."""
-    campaign = db.query(Campaign).filter(
-        Campaign.id == campaign_id,
-        Campaign.created_by_officer_id == current_user.id
-    ).first()
+    campaign = await db.scalar(
+        select(Campaign).where(
+            Campaign.id == campaign_id,
+            Campaign.created_by_officer_id == current_user.id
+        )
+    )
     
     if not campaign:
         raise HTTPException(
@@ -124,22 +169,24 @@ async def update_campaign(
         setattr(campaign, field, value)
     
     campaign.updated_at = datetime.now()
-    db.commit()
-    db.refresh(campaign)
+    await db.commit()
+    await db.refresh(campaign)
     
-    return campaign
+    return build_campaign_response(campaign)
 
 @router.post("/{campaign_id}/send")
 async def send_campaign(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Send a campaign to all qualified leads."""
-    campaign = db.query(Campaign).filter(
-        Campaign.id == campaign_id,
-        Campaign.created_by_officer_id == current_user.id
-    ).first()
+    campaign = await db.scalar(
+        select(Campaign).where(
+            Campaign.id == campaign_id,
+            Campaign.created_by_officer_id == current_user.id
+        )
+    )
     
     if not campaign:
         raise HTTPException(
@@ -161,14 +208,16 @@ async def send_campaign(
 @router.get("/{campaign_id}/performance")
 async def get_campaign_performance(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get campaign performance metrics."""
-    campaign = db.query(Campaign).filter(
-        Campaign.id == campaign_id,
-        Campaign.created_by_officer_id == current_user.id
-    ).first()
+    campaign = await db.scalar(
+        select(Campaign).where(
+            Campaign.id == campaign_id,
+            Campaign.created_by_officer_id == current_user.id
+        )
+    )
     
     if not campaign:
         raise HTTPException(
@@ -1,11 +1,17 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
 
 from models.database import Couple, WeddingStage
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_user
+from utils.batch import keyed_by_id, parse_ids
+from utils.pagination import fetch_keyset_page, get_count_cache
+from utils.serialization import RowSerializer
+from utils.streaming import stream_json_list, stream_ndjson
 
 router = APIRouter()
 
@@ -49,6 +55,12 @@ class CoupleResponse(CoupleBase):
     class Config:
         from_attributes = True
 
+class CoupleBatchResponse(BaseModel):
+    couples: Dict[int, Optional[CoupleResponse]]
+    not_found: List[int]
+
+couple_serializer = RowSerializer(CoupleResponse, Couple)
+
 @router.get("/", response_model=List[CoupleResponse])
 async def get_couples(
     page: int = Query(1, ge=1),
@@ -56,55 +68,100 @@ async def get_couples(
     wedding_stage: Optional[WeddingStage] = None,
     city: Optional[str] = None,
     state: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    total: str = Query("none", regex="^(exact|estimated|none)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
-    """Get paginated list of couples with filtering."""
-    query = db.query(Couple)
+    """Get paginated list of couples with filtering.
+    
+    The body stays a plain list; the next page's cursor is returned in the
+    X-Next-Cursor header and the total, if requested, in X-Total-Count.
+    With ``fields`` only those couple fields are loaded and returned.
+    """
+    serializer = couple_serializer.only(fields)
+    query = serializer.select()
     
     # Apply filters
     if wedding_stage:
-        query = query.filter(Couple.wedding_stage == wedding_stage)
+        query = query.where(Couple.wedding_stage == wedding_stage)
     
     if city:
-        query = query.filter(Couple.wedding_city.ilike(f"%{city}%"))
+        query = query.where(Couple.wedding_city.ilike(f"%{city}%"))
     
     if state:
-        query = query.filter(Couple.wedding_state.ilike(f"%{state}%"))
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    couples = query.offset(offset).limit(page_size).all()
-    
-    return couples
+        query = query.where(Couple.wedding_state.ilike(f"%{state}%"))
+    
+    headers = {}
+    total_count = await get_count_cache().count(db, query.with_only_columns(Couple.id), total)
+    if total_count is not None:
+        headers["X-Total-Count"] = str(total_count)
+    
+    # Apply pagination, keyed on id
+    couples, next_cursor = await fetch_keyset_page(
+        db,
+        query,
+        sort_key="id",
+        sort_column=Couple.id,
+        id_column=Couple.id,
+        sort_order="asc",
+        page_size=page_size,
+        cursor=cursor,
+        offset=(page - 1) * page_size
+    )
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    
+    return ORJSONResponse(serializer.to_dicts(couples), headers=headers)
+
+@router.get("/batch/", response_model=CoupleBatchResponse)
+async def get_couples_batch(
+    ids: str = Query(..., description="Comma-separated couple ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """Get several couples in one query, keyed by id.
+    
+    Unknown ids map to null and are listed in ``not_found``.
+    """
+    couple_ids = parse_ids(ids)
+    serializer = couple_serializer.only(fields)
+    rows = await db.execute(serializer.select().where(Couple.id.in_(couple_ids)))
+    return ORJSONResponse(keyed_by_id(couple_ids, serializer.to_dicts(rows), "couples"))
 
 @router.get("/{couple_id}", response_model=CoupleResponse)
 async def get_couple(
     couple_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get a specific couple by ID."""
-    couple = db.query(Couple).filter(Couple.id == couple_id).first()
+    serializer = couple_serializer.only(fields)
+    couple = (await db.execute(serializer.select().where(Couple.id == couple_id))).first()
     if not couple:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Couple not found"
         )
-    return couple
+    return ORJSONResponse(serializer.to_dict(couple))
 
 @router.post("/", response_model=CoupleResponse, status_code=status.HTTP_201_CREATED)
 async def create_couple(
     couple_data: CoupleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Create a new couple record."""
     # Check for duplicate based on names and email
-    existing = db.query(Couple).filter(
-        Couple.partner_1_name == couple_data.partner_1_name,
-        Couple.partner_2_name == couple_data.partner_2_name
-    ).first()
+    existing = await db.scalar(
+        select(Couple).where(
+            Couple.partner_1_name == couple_data.partner_1_name,
+            Couple.partner_2_name == couple_data.partner_2_name
+        ).limit(1)
+    )
     
     if existing and (
         existing.partner_1_email == couple_data.partner_1_email or
@@ -117,8 +174,8 @@ async def create_couple(
     
     couple = Couple(**couple_data.dict())
     db.add(couple)
-    db.commit()
-    db.refresh(couple)
+    await db.commit()
+    await db.refresh(couple)
     
     return couple
 
@@ -126,11 +183,11 @@ async def create_couple(
 async def update_couple(
     couple_id: int,
     couple_data: CoupleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Update a couple record."""
-    couple = db.query(Couple).filter(Couple.id == couple_id).first()
+    couple = await db.get(Couple, couple_id)
     if not couple:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,19 +200,19 @@ async def update_couple(
         setattr(couple, field, value)
     
     couple.updated_at = datetime.now()
-    db.commit()
-    db.refresh(couple)
+    await db.commit()
+    await db.refresh(couple)
     
     return couple
 
 @router.post("/{couple_id}/opt-out")
 async def opt_out_couple(
     couple_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Mark a couple as opted out from communications."""
-    couple = db.query(Couple).filter(Couple.id == couple_id).first()
+    couple = await db.get(Couple, couple_id)
     if not couple:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -166,26 +223,30 @@ async def opt_out_couple(
     couple.opt_out_date = datetime.now()
     couple.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(couple)
+    await db.commit()
     
     return {"message": f"Couple {couple_id} has been opted out"}
 
 @router.get("/search/upcoming-weddings")
 async def get_upcoming_weddings(
     days_ahead: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
+    format: str = Query("json", regex="^(json|ndjson)$"),
     current_user = Depends(get_current_user)
 ):
-    """Get couples with weddings coming up within specified days."""
+    """Get couples with weddings coming up within specified days.
+    
+    Streamed in batches, as ``{"couples": [...], "count": n}`` or as NDJSON.
+    """
     from datetime import timedelta
     
     end_date = date.today() + timedelta(days=days_ahead)
     
-    couples = db.query(Couple).filter(
+    query = couple_serializer.select().where(
         Couple.wedding_date >= date.today(),
         Couple.wedding_date <= end_date,
         Couple.opted_out == False
-    ).order_by(Couple.wedding_date).all()
+    ).order_by(Couple.wedding_date, Couple.id)
     
-    return {"couples": couples, "count": len(couples)}
\ No newline at end of file
+    if format == "ndjson":
+        return stream_ndjson(query, couple_serializer)
+    return stream_json_list(query, couple_serializer, "couples")
\ No newline at end of file
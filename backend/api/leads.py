@@ -1,13 +1,19 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select, update
 from datetime import datetime, timedelta
 
 from models.database import Lead, Couple, LoanOfficer, LeadStatus
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_user
+from utils.batch import BULK_MAX_IDS, check_ids, keyed_by_id, parse_ids
+from utils.pagination import fetch_keyset_page, get_count_cache
+from utils.serialization import RowSerializer
+from utils.streaming import stream_json_list, stream_ndjson
 from services.lead_scoring import LeadScoringService
+from api.couples import CoupleResponse, couple_serializer
 
 router = APIRouter()
 
@@ -51,9 +57,75 @@ class LeadResponse(LeadBase):
 
 class LeadListResponse(BaseModel):
     leads: List[LeadResponse]
-    total_count: int
+    total_count: Optional[int]
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+class LeadWithCoupleResponse(LeadResponse):
+    couple: Optional[CoupleResponse] = None
+
+class LeadBatchResponse(BaseModel):
+    leads: Dict[int, Optional[LeadWithCoupleResponse]]
+    not_found: List[int]
+
+class LeadBulkUpdate(BaseModel):
+    lead_ids: List[int]
+    status: Optional[LeadStatus] = None
+    assigned_loan_officer_id: Optional[int] = None
+
+class LeadBulkResult(BaseModel):
+    outcome: str  # updated, unchanged, not_found, invalid_transition, conflict
+    detail: Optional[str] = None
+    rescored: bool = False
+
+class LeadBulkResponse(BaseModel):
+    results: Dict[int, LeadBulkResult]
+    updated: int
+
+lead_serializer = RowSerializer(LeadResponse, Lead)
+
+# Statuses a lead may move to from each status; opted-out and won leads are final
+LEAD_STATUS_TRANSITIONS = {
+    LeadStatus.NEW: {LeadStatus.CONTACTED, LeadStatus.QUALIFIED, LeadStatus.NURTURING,
+                     LeadStatus.CLOSED_LOST, LeadStatus.OPT_OUT},
+    LeadStatus.CONTACTED: {LeadStatus.QUALIFIED, LeadStatus.NURTURING, LeadStatus.CLOSED_LOST,
+                           LeadStatus.OPT_OUT},
+    LeadStatus.QUALIFIED: {LeadStatus.NURTURING, LeadStatus.CONVERTED, LeadStatus.CLOSED_WON,
+                           LeadStatus.CLOSED_LOST, LeadStatus.OPT_OUT},
+    LeadStatus.NURTURING: {LeadStatus.CONTACTED, LeadStatus.QUALIFIED, LeadStatus.CLOSED_LOST,
+                           LeadStatus.OPT_OUT},
+    LeadStatus.CONVERTED: {LeadStatus.CLOSED_WON, LeadStatus.CLOSED_LOST, LeadStatus.OPT_OUT},
+    LeadStatus.CLOSED_LOST: {LeadStatus.NURTURING, LeadStatus.OPT_OUT},
+    LeadStatus.CLOSED_WON: set(),
+    LeadStatus.OPT_OUT: set(),
+}
+
+async def calculate_lead_score(db: AsyncSession, lead: Lead, couple: Couple) -> float:
+    """Score a lead; the scoring service's rule query runs on the session's sync facade."""
+    return await db.run_sync(
+        lambda session: LeadScoringService(session).calculate_lead_score(lead, couple)
+    )
+
+async def rescore_leads(db: AsyncSession, lead_ids) -> List[int]:
+    """Recalculate and store the scores of these leads; returns the ids rescored."""
+    def calculate(session):
+        pairs = session.execute(
+            select(Lead, Couple).join(Couple, Lead.couple_id == Couple.id).where(Lead.id.in_(lead_ids))
+        ).all()
+        return LeadScoringService(session).calculate_lead_scores(pairs)
+    
+    scores = await db.run_sync(calculate)
+    if scores:
+        # Bulk UPDATE by primary key, one statement for all rows
+        await db.execute(update(Lead), [{"id": lead_id, "lead_score": score} for lead_id, score in scores.items()])
+    return list(scores)
+
+LEAD_SORT_COLUMNS = {
+    "created_at": Lead.created_at,
+    "lead_score": Lead.lead_score,
+    "last_contact_date": Lead.last_contact_date,
+}
 
 @router.get("/", response_model=LeadListResponse)
 async def get_leads(
@@ -64,69 +136,112 @@ async def get_leads(
     min_score: Optional[float] = None,
     sort_by: str = Query("created_at", regex="^(created_at|lead_score|last_contact_date)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    total: str = Query("estimated", regex="^(exact|estimated|none)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
-    """Get paginated list of leads with filtering and sorting."""
-    query = db.query(Lead)
+    """Get paginated list of leads with filtering and sorting.
+    
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page;
+    ``page`` is only kept for clients that still page by number. With
+    ``fields`` only those lead fields are loaded and returned.
+    """
+    serializer = lead_serializer.only(fields)
+    sort_column = LEAD_SORT_COLUMNS[sort_by]
+    query = serializer.select(sort_column)
     
     # Apply filters
     if status:
-        query = query.filter(Lead.status == status)
+        query = query.where(Lead.status == status)
     
     if assigned_to_me:
-        query = query.filter(Lead.assigned_loan_officer_id == current_user.id)
+        query = query.where(Lead.assigned_loan_officer_id == current_user.id)
     
     if min_score is not None:
-        query = query.filter(Lead.lead_score >= min_score)
-    
-    # Apply sorting
-    order_func = desc if sort_order == "desc" else asc
-    if sort_by == "created_at":
-        query = query.order_by(order_func(Lead.created_at))
-    elif sort_by == "lead_score":
-        query = query.order_by(order_func(Lead.lead_score))
-    elif sort_by == "last_contact_date":
-        query = query.order_by(order_func(Lead.last_contact_date))
-    
-    # Get total count
-    total_count = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    leads = query.offset(offset).limit(page_size).all()
-    
-    return LeadListResponse(
-        leads=leads,
-        total_count=total_count,
-        page=page,
-        page_size=page_size
+        query = query.where(Lead.lead_score >= min_score)
+    
+    # Get total count (cached or estimated unless exact is asked for)
+    total_count = await get_count_cache().count(db, query.with_only_columns(Lead.id), total)
+    
+    # Apply sorting and pagination, keyed on (sort column, id)
+    leads, next_cursor = await fetch_keyset_page(
+        db,
+        query,
+        sort_key=sort_by,
+        sort_column=sort_column,
+        id_column=Lead.id,
+        sort_order=sort_order,
+        page_size=page_size,
+        cursor=cursor,
+        offset=(page - 1) * page_size
     )
+    
+    return ORJSONResponse({
+        "leads": serializer.to_dicts(leads),
+        "total_count": total_count,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    })
+
+@router.get("/batch/", response_model=LeadBatchResponse)
+async def get_leads_batch(
+    ids: str = Query(..., description="Comma-separated lead ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: LoanOfficer = Depends(get_current_user)
+):
+    """Get several leads, each with its couple, keyed by id.
+    
+    Leads come from one ``IN`` query and their couples from a second;
+    unknown ids map to null and are listed in ``not_found``.
+    """
+    lead_ids = parse_ids(ids)
+    serializer = lead_serializer.only(fields)
+    rows = (await db.execute(serializer.select(Lead.couple_id).where(Lead.id.in_(lead_ids)))).all()
+    
+    couple_ids = {row.couple_id for row in rows}
+    couples = {}
+    if couple_ids:
+        couple_rows = await db.execute(couple_serializer.select().where(Couple.id.in_(couple_ids)))
+        couples = {row.id: couple_serializer.to_dict(row) for row in couple_rows}
+    
+    leads = []
+    for row in rows:
+        lead = serializer.to_dict(row)
+        lead["couple"] = couples.get(row.couple_id)
+        leads.append(lead)
+    
+    return ORJSONResponse(keyed_by_id(lead_ids, leads, "leads"))
 
 @router.get("/{lead_id}", response_model=LeadResponse)
 async def get_lead(
     lead_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get a specific lead by ID."""
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    serializer = lead_serializer.only(fields)
+    lead = (await db.execute(serializer.select().where(Lead.id == lead_id))).first()
     if not lead:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lead not found"
         )
-    return lead
+    return ORJSONResponse(serializer.to_dict(lead))
 
 @router.post("/", response_model=LeadResponse, status_code=status.HTTP_201_CREATED)
 async def create_lead(
     lead_data: LeadCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Create a new lead."""
     # Verify couple exists
-    couple = db.query(Couple).filter(Couple.id == lead_data.couple_id).first()
+    couple = await db.get(Couple, lead_data.couple_id)
     if not couple:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -134,7 +249,9 @@ async def create_lead(
         )
     
     # Check if lead already exists for this couple
-    existing_lead = db.query(Lead).filter(Lead.couple_id == lead_data.couple_id).first()
+    existing_lead = await db.scalar(
+        select(Lead.id).where(Lead.couple_id == lead_data.couple_id).limit(1)
+    )
     if existing_lead:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -145,8 +262,7 @@ async def create_lead(
     lead = Lead(**lead_data.dict())
     
     # Calculate initial lead score
-    scoring_service = LeadScoringService(db)
-    lead.lead_score = scoring_service.calculate_lead_score(lead, couple)
+    lead.lead_score = await calculate_lead_score(db, lead, couple)
     
     # Set earliest contact date (compliance waiting period)
     if couple.wedding_date:
@@ -157,8 +273,8 @@ async def create_lead(
         lead.earliest_contact_date = datetime.now()
     
     db.add(lead)
-    db.commit()
-    db.refresh(lead)
+    await db.commit()
+    await db.refresh(lead)
     
     return lead
 
@@ -166,11 +282,11 @@ async def create_lead(
 async def update_lead(
     lead_id: int,
     lead_data: LeadUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Update a lead."""
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = await db.get(Lead, lead_id)
     if not lead:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,13 +299,12 @@ async def update_lead(
         setattr(lead, field, value)
     
     # Recalculate lead score if relevant data changed
-    scoring_service = LeadScoringService(db)
-    couple = db.query(Couple).filter(Couple.id == lead.couple_id).first()
-    lead.lead_score = scoring_service.calculate_lead_score(lead, couple)
+    couple = await db.get(Couple, lead.couple_id)
+    lead.lead_score = await calculate_lead_score(db, lead, couple)
     
     lead.updated_at = datetime.now()
-    db.commit()
-    db.refresh(lead)
+    await db.commit()
+    await db.refresh(lead)
     
     return lead
 
@@ -197,11 +312,11 @@ async def update_lead(
 async def assign_lead(
     lead_id: int,
     loan_officer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Assign a lead to a loan officer."""
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = await db.get(Lead, lead_id)
     if not lead:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -209,7 +324,7 @@ async def assign_lead(
         )
     
     # Verify loan officer exists
-    loan_officer = db.query(LoanOfficer).filter(LoanOfficer.id == loan_officer_id).first()
+    loan_officer = await db.get(LoanOfficer, loan_officer_id)
     if not loan_officer:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -219,23 +334,127 @@ async def assign_lead(
     lead.assigned_loan_officer_id = loan_officer_id
     lead.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(lead)
+    await db.commit()
     
     return {"message": f"Lead {lead_id} assigned to {loan_officer.name}"}
 
+@router.post("/bulk/", response_model=LeadBulkResponse)
+async def bulk_update_leads(
+    bulk_data: LeadBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: LoanOfficer = Depends(get_current_user)
+):
+    """Change the status and/or assigned loan officer of many leads at once.
+    
+    Status changes must be allowed by LEAD_STATUS_TRANSITIONS. Valid
+    changes are applied with one UPDATE per status read at the start, each
+    guarded on that status, so a lead whose status someone else changed
+    meanwhile is reported as a conflict.
+    Leads are rescored only if an active scoring rule reads a changed field.
+    """
+    lead_ids = check_ids(bulk_data.lead_ids, BULK_MAX_IDS)
+    
+    changes = {}
+    if bulk_data.status is not None:
+        changes["status"] = bulk_data.status
+    if "assigned_loan_officer_id" in bulk_data.model_fields_set:
+        # An explicit null unassigns
+        changes["assigned_loan_officer_id"] = bulk_data.assigned_loan_officer_id
+    if not changes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nothing to update: give status and/or assigned_loan_officer_id"
+        )
+    
+    # Verify loan officer exists
+    if changes.get("assigned_loan_officer_id") is not None:
+        if not await db.get(LoanOfficer, changes["assigned_loan_officer_id"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Loan officer not found"
+            )
+    
+    # Decide each lead's outcome from its current state
+    current = {
+        row.id: row
+        for row in await db.execute(
+            select(Lead.id, Lead.status, Lead.assigned_loan_officer_id).where(Lead.id.in_(lead_ids))
+        )
+    }
+    new_status = changes.get("status")
+    results = {}
+    to_update = []
+    by_status = {}
+    for lead_id in lead_ids:
+        row = current.get(lead_id)
+        if row is None:
+            results[lead_id] = {"outcome": "not_found"}
+        elif (
+            new_status is not None
+            and row.status != new_status
+            and new_status not in LEAD_STATUS_TRANSITIONS.get(row.status, ())
+        ):
+            results[lead_id] = {
+                "outcome": "invalid_transition",
+                "detail": f"{getattr(row.status, 'value', row.status)} -> {new_status.value} is not allowed"
+            }
+        elif all(getattr(row, field) == value for field, value in changes.items()):
+            results[lead_id] = {"outcome": "unchanged"}
+        else:
+            to_update.append(lead_id)
+            by_status.setdefault(row.status, []).append(lead_id)
+    
+    updated_ids = set()
+    rescored_ids = set()
+    if to_update:
+        now = datetime.now()
+        for observed_status, ids in by_status.items():
+            result = await db.execute(
+                update(Lead)
+                .where(Lead.id.in_(ids), Lead.status == observed_status)
+                .values(**changes, updated_at=now)
+                .returning(Lead.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated_ids.update(result.scalars())
+        
+        # Status and assignment are not built-in score inputs
+        uses_changed_fields = await db.run_sync(
+            lambda session: LeadScoringService(session).rules_use_fields(changes)
+        )
+        if updated_ids and uses_changed_fields:
+            rescored_ids = set(await rescore_leads(db, updated_ids))
+        
+        await db.commit()
+    
+    for lead_id in to_update:
+        if lead_id in updated_ids:
+            results[lead_id] = {"outcome": "updated", "rescored": lead_id in rescored_ids}
+        else:
+            results[lead_id] = {"outcome": "conflict", "detail": "Lead was changed during the update"}
+    
+    return ORJSONResponse({
+        "results": {str(lead_id): results[lead_id] for lead_id in lead_ids},
+        "updated": len(updated_ids)
+    })
+
 @router.get("/ready-for-contact/")
 async def get_leads_ready_for_contact(
-    db: Session = Depends(get_db),
+    format: str = Query("json", regex="^(json|ndjson)$"),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
-    """Get leads that are past their waiting period and ready for contact."""
+    """Get leads that are past their waiting period and ready for contact.
+    
+    Streamed in batches, as ``{"leads": [...], "count": n}`` or as NDJSON.
+    """
     now = datetime.now()
     
-    leads = db.query(Lead).filter(
+    query = lead_serializer.select().where(
         Lead.earliest_contact_date <= now,
         Lead.status == LeadStatus.NEW,
         Lead.last_contact_date.is_(None)
-    ).order_by(desc(Lead.lead_score)).all()
+    ).order_by(desc(Lead.lead_score))
     
-    return {"leads": leads, "count": len(leads)}
\ No newline at end of file
+    if format == "ndjson":
+        return stream_ndjson(query, lead_serializer)
+    return stream_json_list(query, lead_serializer, "leads")
\ No newline at end of file
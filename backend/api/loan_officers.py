@@ -1,11 +1,14 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from models.database import LoanOfficer
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_user, get_password_hash
+from utils.serialization import RowSerializer
 
 router = APIRouter()
 
@@ -42,6 +45,8 @@ class LoanOfficerResponse(LoanOfficerBase):
     class Config:
         from_attributes = True
 
+loan_officer_serializer = RowSerializer(LoanOfficerResponse, LoanOfficer)
+
 @router.get("/me", response_model=LoanOfficerResponse)
 async def get_current_loan_officer(
     current_user: LoanOfficer = Depends(get_current_user)
@@ -51,37 +56,41 @@ async def get_current_loan_officer(
 
 @router.get("/", response_model=List[LoanOfficerResponse])
 async def get_loan_officers(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get all loan officers (admin only for now)."""
-    officers = db.query(LoanOfficer).order_by(LoanOfficer.name).all()
-    return officers
+    officers = (await db.execute(loan_officer_serializer.select().order_by(LoanOfficer.name))).all()
+    return ORJSONResponse(loan_officer_serializer.to_dicts(officers))
 
 @router.get("/{officer_id}", response_model=LoanOfficerResponse)
 async def get_loan_officer(
     officer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get a specific loan officer."""
-    officer = db.query(LoanOfficer).filter(LoanOfficer.id == officer_id).first()
+    officer = (await db.execute(
+        loan_officer_serializer.select().where(LoanOfficer.id == officer_id)
+    )).first()
     if not officer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Loan officer not found"
         )
-    return officer
+    return ORJSONResponse(loan_officer_serializer.to_dict(officer))
 
 @router.post("/", response_model=LoanOfficerResponse, status_code=status.HTTP_201_CREATED)
 async def create_loan_officer(
     officer_data: LoanOfficerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Create a new loan officer."""
     # Check if email already exists
-    existing = db.query(LoanOfficer).filter(LoanOfficer.email == officer_data.email).first()
+    existing = await db.scalar(
+        select(LoanOfficer.id).where(LoanOfficer.email == officer_data.email).limit(1)
+    )
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -98,15 +107,15 @@ async def create_loan_officer(
     officer = LoanOfficer(**officer_dict, hashed_password=hashed_password)
     
     db.add(officer)
-    db.commit()
-    db.refresh(officer)
+    await db.commit()
+    await db.refresh(officer)
     
     return officer
 
 @router.put("/me", response_model=LoanOfficerResponse)
 async def update_current_loan_officer(
     officer_data: LoanOfficerUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Update current loan officer profile."""
@@ -122,19 +131,27 @@ async def update_current_loan_officer(
         setattr(current_user, field, value)
     
     current_user.updated_at = datetime.now()
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
 
 @router.get("/{officer_id}/performance")
 async def get_loan_officer_performance(
     officer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: LoanOfficer = Depends(get_current_user)
 ):
     """Get performance metrics for a loan officer."""
-    officer = db.query(LoanOfficer).filter(LoanOfficer.id == officer_id).first()
+    officer = (await db.execute(
+        select(
+            LoanOfficer.name,
+            LoanOfficer.total_leads_assigned,
+            LoanOfficer.total_loans_closed,
+            LoanOfficer.conversion_rate,
+            LoanOfficer.average_loan_amount
+        ).where(LoanOfficer.id == officer_id)
+    )).first()
     if not officer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,15 +161,21 @@ async def get_loan_officer_performance(
     # Calculate additional metrics
     from models.database import Lead, LeadStatus
     
-    total_leads = db.query(Lead).filter(Lead.assigned_loan_officer_id == officer_id).count()
-    qualified_leads = db.query(Lead).filter(
-        Lead.assigned_loan_officer_id == officer_id,
-        Lead.status == LeadStatus.QUALIFIED
-    ).count()
-    converted_leads = db.query(Lead).filter(
-        Lead.assigned_loan_officer_id == officer_id,
-        Lead.status == LeadStatus.CONVERTED
-    ).count()
+    total_leads = await db.scalar(
+        select(func.count(Lead.id)).where(Lead.assigned_loan_officer_id == officer_id)
+    )
+    qualified_leads = await db.scalar(
+        select(func.count(Lead.id)).where(
+            Lead.assigned_loan_officer_id == officer_id,
+            Lead.status == LeadStatus.QUALIFIED
+        )
+    )
+    converted_leads = await db.scalar(
+        select(func.count(Lead.id)).where(
+            Lead.assigned_loan_officer_id == officer_id,
+            Lead.status == LeadStatus.CONVERTED
+        )
+    )
     
     qualification_rate = (qualified_leads / total_leads * 100) if total_leads > 0 else 0
     
@@ -0,0 +1,42 @@
+import os
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from services.market_report import get_market_report_cache
+
+router = APIRouter()
+
+MARKET_REPORT_MAX_AGE = int(os.getenv('MARKET_REPORT_MAX_AGE', '300'))
+
+@router.get("/market-report")
+async def get_market_report(
+    request: Request,
+    location: str = Query("", description="Two-letter state code"),
+    format: str = Query("html", pattern="^(html|json)$")
+):
+    """Serve the pre-rendered market report for a state (linked from campaign emails)."""
+    
+    report = get_market_report_cache().get(location)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Market reports are being generated",
+            headers={"Retry-After": "5"}
+        )
+    
+    if format == "json" or "application/json" in request.headers.get("accept", ""):
+        body, etag, media_type = report.json, report.json_etag, "application/json"
+    else:
+        body, etag, media_type = report.html, report.html_etag, "text/html; charset=utf-8"
+    
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={MARKET_REPORT_MAX_AGE}",
+        "Vary": "Accept",
+        "X-Market-Data-Version": report.version,
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type=media_type, headers=headers)
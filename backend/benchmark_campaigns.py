@@ -0,0 +1,118 @@
+"""
+Offline benchmark for the automated campaign pipeline.
+
+Seeds an in-memory SQLite database with synthetic couples and leads, runs
+CampaignAutomationService against a non-delivering email transport and
+prints pipeline and transport timings. No real mail is sent.
+
+Usage:
+    python benchmark_campaigns.py --leads 10000
+    python benchmark_campaigns.py --leads 2000 --transport smtp   # SMTP_HOST/SMTP_PORT, e.g. aiosmtpd
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Keep the module-level engine in utils.database off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, Couple, Lead, LoanOfficer, LeadStatus, WeddingStage
+from services.campaign_automation import CampaignAutomationService
+from services.email_service import EmailService
+from services.email_transport import create_transport
+
+STATES = ["CA", "TX", "NY", "FL", "WA", "IL", "CO", "GA", "NC", "AZ"]
+
+
+def seed(db, lead_count: int):
+    """Create loan officers plus engaged, married and nurturing leads."""
+    officers = [
+        LoanOfficer(name=f"Officer {i}", email=f"officer{i}@example.com", phone="(555) 000-0000",
+                    auto_assign_leads=True, total_leads_assigned=0)
+        for i in range(5)
+    ]
+    db.add_all(officers)
+    db.flush()
+    
+    now = datetime.now()
+    for i in range(lead_count):
+        kind = i % 3
+        couple = Couple(
+            partner_1_name=f"Partner{i}A",
+            partner_2_name=f"Partner{i}B",
+            partner_1_email=f"couple{i}@example.com",
+            wedding_city="Springfield",
+            wedding_state=random.choice(STATES),
+            wedding_stage=WeddingStage.RECENTLY_MARRIED if kind == 1 else WeddingStage.ENGAGED,
+            wedding_date=(now - timedelta(days=90)).date() if kind == 1 else (now + timedelta(days=120)).date()
+        )
+        db.add(couple)
+        db.flush()
+        
+        lead = Lead(
+            couple_id=couple.id,
+            lead_score=random.uniform(20, 95),
+            target_purchase_price=random.choice([300000, 450000, 650000]),
+            assigned_loan_officer_id=officers[i % len(officers)].id,
+            status=LeadStatus.NURTURING if kind == 2 else LeadStatus.NEW,
+            earliest_contact_date=now - timedelta(days=1),
+            next_follow_up_date=now - timedelta(hours=1) if kind == 2 else None
+        )
+        db.add(lead)
+    
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the campaign pipeline offline")
+    parser.add_argument("--leads", type=int, default=5000)
+    parser.add_argument("--transport", default="memory", choices=["memory", "file", "smtp"])
+    args = parser.parse_args()
+    
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    
+    started = time.perf_counter()
+    seed(db, args.leads)
+    print(f"Seeded {args.leads} leads in {time.perf_counter() - started:.2f}s")
+    
+    transport = create_transport(args.transport)
+    service = CampaignAutomationService(db)
+    # Swap the default email service for one on the given transport
+    service.close()
+    service.email_service = EmailService(transport=transport)
+    
+    started = time.perf_counter()
+    try:
+        results = service.run_automated_campaigns()
+    finally:
+        service.close()
+    elapsed = time.perf_counter() - started
+    
+    sent = sum(value for key, value in results.items() if key.endswith("_sent"))
+    print(json.dumps({
+        "results": results,
+        "pipeline_seconds": round(elapsed, 3),
+        "emails_per_second": round(sent / elapsed, 1) if elapsed else 0.0,
+        "transport": transport.stats.summary()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Offline benchmark for list response serialization.
+
+Loads pages of leads, couples, campaigns and loan officers from an
+in-memory SQLite database and times three ways of turning them into a
+response body:
+
+- model: what FastAPI does with response_model (from_attributes validation,
+  JSON-mode dump, stdlib json), the path the list endpoints used before
+- adapter: a precompiled TypeAdapter validating and dumping straight to JSON
+- rows: RowSerializer dicts rendered by orjson, the path the list endpoints use
+
+Each body is checked to decode to the same data as the model path.
+
+A second table times fetching a page and rendering it, loading ORM
+instances (``orm``) versus the Core column select of the read model
+(``core``), the way the read endpoints fetch rows.
+
+Usage:
+    python benchmark_serialization.py --page-size 100 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# Keep the module-level engine in utils.database off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.campaigns import CampaignResponse, campaign_serializer
+from api.couples import CoupleResponse, couple_serializer
+from api.leads import LeadResponse, lead_serializer
+from api.loan_officers import LoanOfficerResponse, loan_officer_serializer
+from models.database import (
+    Base, Campaign, CampaignStatus, Couple, Lead, LeadStatus, LoanOfficer, WeddingStage
+)
+
+
+def seed(db, count: int):
+    """Create ``count`` couples with leads, campaigns and loan officers."""
+    now = datetime.now()
+    officers = [
+        LoanOfficer(name=f"Officer {i}", email=f"officer{i}@example.com", phone="(555) 000-0000",
+                    service_areas=["Austin, TX"], specializations=["FHA", "VA"],
+                    total_leads_assigned=0, total_loans_closed=0, conversion_rate=0.0,
+                    average_loan_amount=0.0, created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+    db.add_all(officers)
+    db.flush()
+    
+    for i in range(count):
+        couple = Couple(
+            partner_1_name=f"Partner A{i}", partner_2_name=f"Partner B{i}",
+            partner_1_email=f"a{i}@example.com", partner_2_email=f"b{i}@example.com",
+            wedding_date=date.today() + timedelta(days=i % 365), engagement_date=date.today(),
+            wedding_stage=WeddingStage.ENGAGED, wedding_city="Austin", wedding_state="TX",
+            wedding_budget=30000.0 + i, guest_count=120, registry_urls=["https://example.com/registry"],
+            preferred_contact_method="email", opted_out=False, created_at=now, updated_at=now
+        )
+        db.add(couple)
+        db.flush()
+        db.add(Lead(
+            couple_id=couple.id, status=LeadStatus.NEW, lead_score=50.0, qualification_score=10.0,
+            target_purchase_price=400000.0, estimated_income=120000.0, has_existing_mortgage=False,
+            assigned_loan_officer_id=officers[i].id, earliest_contact_date=now,
+            next_follow_up_date=now, created_at=now, updated_at=now
+        ))
+        db.add(Campaign(
+            name=f"Campaign {i}", campaign_type="email", subject_line="Hello",
+            email_template="<p>Hi {{ partner_1_name }}</p>", target_wedding_stages=["engaged"],
+            status=CampaignStatus.ACTIVE, total_sends=10, total_opens=5, total_clicks=2,
+            total_responses=1, total_conversions=0, created_by_officer_id=officers[i].id,
+            created_at=now, updated_at=now
+        ))
+    db.commit()
+
+
+def model_path(adapter: TypeAdapter, rows) -> bytes:
+    content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def adapter_path(adapter: TypeAdapter, rows) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def rows_path(serializer, rows) -> bytes:
+    return orjson.dumps(serializer.to_dicts(rows))
+
+
+def orm_fetch(db, orm_class, serializer, page_size: int) -> bytes:
+    rows = db.query(orm_class).limit(page_size).all()
+    body = rows_path(serializer, rows)
+    db.expunge_all()
+    return body
+
+
+def core_fetch(db, serializer, page_size: int) -> bytes:
+    return rows_path(serializer, db.execute(serializer.select().limit(page_size)).all())
+
+
+def timed(func, repeat: int) -> float:
+    """Best-of-three mean time per call in microseconds."""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - started) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.page_size)
+    
+    cases = [
+        ("leads", LeadResponse, Lead, lead_serializer),
+        ("couples", CoupleResponse, Couple, couple_serializer),
+        ("campaigns", CampaignResponse, Campaign, campaign_serializer),
+        ("loan officers", LoanOfficerResponse, LoanOfficer, loan_officer_serializer),
+    ]
+    
+    print(f"{args.page_size}-row pages, mean of {args.repeat} runs (best of 3), microseconds per page")
+    print(f"{'list':<14}{'model':>10}{'adapter':>10}{'rows':>10}{'speedup':>10}")
+    for name, model, orm_class, serializer in cases:
+        rows = db.query(orm_class).limit(args.page_size).all()
+        adapter = TypeAdapter(List[model])
+        
+        expected = json.loads(model_path(adapter, rows))
+        for path in (adapter_path(adapter, rows), rows_path(serializer, rows)):
+            assert json.loads(path) == expected, f"{name}: fast path output differs from the model path"
+        
+        model_us = timed(lambda: model_path(adapter, rows), args.repeat)
+        adapter_us = timed(lambda: adapter_path(adapter, rows), args.repeat)
+        rows_us = timed(lambda: rows_path(serializer, rows), args.repeat)
+        print(f"{name:<14}{model_us:>10.0f}{adapter_us:>10.0f}{rows_us:>10.0f}{model_us / rows_us:>9.1f}x")
+    
+    print()
+    print(f"{'fetch + render':<14}{'orm':>10}{'core':>10}{'speedup':>10}")
+    for name, model, orm_class, serializer in cases:
+        expected = json.loads(orm_fetch(db, orm_class, serializer, args.page_size))
+        assert json.loads(core_fetch(db, serializer, args.page_size)) == expected, \
+            f"{name}: core select output differs from the ORM path"
+        
+        orm_us = timed(lambda: orm_fetch(db, orm_class, serializer, args.page_size), args.repeat)
+        core_us = timed(lambda: core_fetch(db, serializer, args.page_size), args.repeat)
+        print(f"{name:<14}{orm_us:>10.0f}{core_us:>10.0f}{orm_us / core_us:>9.1f}x")
+    
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Check that a campaign run which dies mid-send is recovered without double sends.
+
+Seeds an in-memory SQLite database with engaged couples, then:
+
+1. runs the campaigns and kills the run inside the provider call of its
+   second batch, after that batch's claims were committed;
+2. runs again while the claims are still fresh: the run resumes after the
+   last completed batch and must not email the claimed leads;
+3. ages the abandoned claims past EMAIL_CLAIM_TIMEOUT_SECONDS and runs
+   again: the retry queue must pick them up and send each exactly once;
+4. on a fresh database, stalls a run after it claimed its first batch
+   until the claims are stale, and runs a second campaign run meanwhile:
+   the second run takes the claims over, and the stalled run must not
+   send them again when it resumes.
+
+Exits non-zero if any expectation fails:
+
+    python check_campaign_resume.py
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Keep the module-level engine in utils.database off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CAMPAIGN_BATCH_SIZE", "10")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, func, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import (
+    Base, CampaignRunCheckpoint, CampaignSend, Couple, Lead, LeadStatus, LoanOfficer, WeddingStage
+)
+from services.campaign_automation import CampaignAutomationService
+from services.email_service import EmailService
+from services.email_transport import InMemoryTransport
+from services.retry_queue import RetryPolicy
+
+LEAD_COUNT = 25
+
+
+class SimulatedCrash(BaseException):
+    """Stands in for the process dying; not caught by the service's error handling."""
+
+
+def seed(db):
+    """Engaged couples with one new lead each, all due for the engagement email."""
+    officer = LoanOfficer(name="Officer", email="officer@example.com", phone="(555) 000-0000",
+                          auto_assign_leads=True, total_leads_assigned=0)
+    db.add(officer)
+    db.flush()
+    
+    now = datetime.now()
+    for i in range(LEAD_COUNT):
+        couple = Couple(
+            partner_1_name=f"Partner{i}A",
+            partner_2_name=f"Partner{i}B",
+            partner_1_email=f"couple{i}@example.com",
+            wedding_city="Springfield",
+            wedding_state="IL",
+            wedding_stage=WeddingStage.ENGAGED,
+            wedding_date=(now + timedelta(days=120)).date()
+        )
+        db.add(couple)
+        db.flush()
+        db.add(Lead(
+            couple_id=couple.id,
+            lead_score=50.0,
+            assigned_loan_officer_id=officer.id,
+            status=LeadStatus.NEW,
+            earliest_contact_date=now - timedelta(days=1)
+        ))
+    db.commit()
+
+
+def delivered(transport):
+    """Recipient addresses of everything the transport accepted."""
+    addresses = [message.to_email for message in transport.messages]
+    for batch in transport.batches:
+        addresses.extend(message.to_email for message in batch.expand())
+    return addresses
+
+
+def run(Session, transport, crash_on_batch=None, after_first_claim=None):
+    """One campaign run in a fresh session.
+    
+    Optionally dies inside a provider call, or calls ``after_first_claim``
+    once its first batch is claimed, before that batch is sent.
+    """
+    db = Session()
+    service = CampaignAutomationService(db)
+    # Swap the default email service for one on the given transport
+    service.close()
+    service.email_service = EmailService(transport=transport)
+    
+    if crash_on_batch is not None:
+        send = service.email_service.send_batch_campaign_email
+        calls = []
+        
+        def crashing_send(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == crash_on_batch:
+                raise SimulatedCrash()
+            return send(*args, **kwargs)
+        
+        service.email_service.send_batch_campaign_email = crashing_send
+    
+    if after_first_claim is not None:
+        plan = service.send_window_planner.plan
+        hooks = [after_first_claim]
+        
+        def plan_then_stall(*args, **kwargs):
+            send_times = plan(*args, **kwargs)
+            while hooks:
+                hooks.pop()()
+            return send_times
+        
+        service.send_window_planner.plan = plan_then_stall
+    
+    try:
+        return service.run_automated_campaigns()
+    except SimulatedCrash:
+        db.rollback()
+        return None
+    finally:
+        service.close()
+        db.close()
+
+
+def status_counts(db):
+    """CampaignSend rows per send_status."""
+    return dict(db.query(CampaignSend.send_status, func.count(CampaignSend.id)).group_by(
+        CampaignSend.send_status
+    ).all())
+
+
+def seeded_database():
+    """Session factory for a new in-memory database with the seed data."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        seed(db)
+    return Session
+
+
+def expire_claims(Session):
+    """Age every pending claim past EMAIL_CLAIM_TIMEOUT_SECONDS."""
+    expired = datetime.now() - timedelta(seconds=RetryPolicy.from_env().claim_timeout_seconds + 1)
+    with Session() as db:
+        db.execute(update(CampaignSend).where(CampaignSend.send_status == 'pending').values(claimed_at=expired))
+        db.commit()
+
+
+def main() -> int:
+    Session = seeded_database()
+    transport = InMemoryTransport()
+    batch_size = int(os.environ["CAMPAIGN_BATCH_SIZE"])
+    
+    failures = []
+    
+    def expect(ok: bool, description: str):
+        print(f"{'ok  ' if ok else 'FAIL'} {description}")
+        if not ok:
+            failures.append(description)
+    
+    # 1. Crash inside the provider call of the second batch
+    run(Session, transport, crash_on_batch=2)
+    with Session() as db:
+        counts = status_counts(db)
+        checkpoint = db.get(CampaignRunCheckpoint, 'engagement')
+        expect(counts == {'sent': batch_size, 'pending': batch_size},
+               f"crash leaves the first batch sent and the second pending: {counts}")
+        expect(checkpoint.completed_at is None and checkpoint.batches_completed == 1,
+               "checkpoint records one completed batch")
+    
+    # 2. Resume while the claims are fresh: no lead is emailed twice
+    run(Session, transport)
+    with Session() as db:
+        counts = status_counts(db)
+        expect(counts == {'sent': LEAD_COUNT - batch_size, 'pending': batch_size},
+               f"resume sends the rest and leaves fresh claims alone: {counts}")
+    addresses = delivered(transport)
+    expect(len(addresses) == len(set(addresses)) == LEAD_COUNT - batch_size,
+           f"{len(addresses)} messages, no duplicates")
+    
+    # 3. Once the claims are stale, the retry queue sends them
+    expire_claims(Session)
+    
+    results = run(Session, transport)
+    expect(results['stale_claims_requeued'] == batch_size and results['retried_emails_sent'] == batch_size,
+           f"stale claims requeued and retried: {results}")
+    with Session() as db:
+        counts = status_counts(db)
+        contacted = db.query(func.count(Lead.id)).filter(Lead.last_contact_date.isnot(None)).scalar()
+        expect(counts == {'sent': LEAD_COUNT}, f"every send is recorded as sent: {counts}")
+        expect(contacted == LEAD_COUNT, f"{contacted} of {LEAD_COUNT} leads marked contacted")
+    addresses = delivered(transport)
+    expect(len(addresses) == len(set(addresses)) == LEAD_COUNT,
+           f"{len(addresses)} messages in total, each lead emailed once")
+    
+    # 4. A run stalled past the claim timeout loses its batch to a concurrent run
+    Session = seeded_database()
+    transport = InMemoryTransport()
+    concurrent = {}
+    
+    def take_over():
+        expire_claims(Session)
+        concurrent.update(run(Session, transport))
+    
+    stalled = run(Session, transport, after_first_claim=take_over)
+    expect(concurrent['stale_claims_requeued'] == batch_size and concurrent['retried_emails_sent'] == batch_size,
+           f"concurrent run takes over the stalled batch: {concurrent}")
+    expect(stalled['engagement_emails_sent'] == 0, f"stalled run sends nothing it lost: {stalled}")
+    with Session() as db:
+        counts = status_counts(db)
+        expect(counts == {'sent': LEAD_COUNT}, f"every send is recorded as sent once: {counts}")
+    addresses = delivered(transport)
+    expect(len(addresses) == len(set(addresses)) == LEAD_COUNT,
+           f"{len(addresses)} messages, each lead emailed once")
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Check that the cross-campaign frequency cap survives flush/load round trips.
+
+Runs FrequencyCap instances, standing in for separate processes, against
+one in-memory SQLite database. Sends recorded in the same second, by one
+process or by two, must each count against the cap after they are
+flushed and reloaded, and reloading must never count a send twice:
+
+    python check_frequency_cap.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Keep the module-level engine in utils.database off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, ContactFrequency, Couple
+from services.frequency_cap import FrequencyCap
+
+MAX_SENDS = 3
+
+
+def main() -> int:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    
+    couples = [Couple(partner_1_name=f"Partner{i}A", partner_2_name=f"Partner{i}B") for i in range(3)]
+    db.add_all(couples)
+    db.commit()
+    same_process, two_processes, reloaded = (couple.id for couple in couples)
+    
+    failures = []
+    
+    def expect(ok: bool, description: str):
+        print(f"{'ok  ' if ok else 'FAIL'} {description}")
+        if not ok:
+            failures.append(description)
+    
+    def stored(couple_id: int):
+        db.expire_all()
+        row = db.get(ContactFrequency, couple_id)
+        return row.send_times if row else []
+    
+    now = int(time.time())
+    first, second = FrequencyCap(max_sends=MAX_SENDS), FrequencyCap(max_sends=MAX_SENDS)
+    first.load(db)
+    second.load(db)
+    
+    # Two sends in the same second from one process
+    first.record(same_process, now)
+    first.record(same_process, now)
+    first.flush(db)
+    db.commit()
+    expect(stored(same_process) == [now, now], f"one process, same second: stored {stored(same_process)}")
+    
+    # One send each from two processes in the same second
+    first.record(two_processes, now)
+    second.record(two_processes, now)
+    first.flush(db)
+    db.commit()
+    second.flush(db)
+    db.commit()
+    expect(stored(two_processes) == [now, now], f"two processes, same second: stored {stored(two_processes)}")
+    
+    # Repeated flushes and loads add nothing
+    for cap in (first, second):
+        cap.flush(db)
+        db.commit()
+        cap.load(db)
+        cap.load(db)
+    expect(stored(same_process) == [now, now] and stored(two_processes) == [now, now],
+           "repeated flush/load keeps two sends per couple")
+    expect(list(second._sends[same_process]) == [now, now],
+           "another process loads both same-second sends")
+    
+    # A third send reaches the cap everywhere once flushed and reloaded
+    second.record(same_process, now)
+    second.flush(db)
+    db.commit()
+    first.load(db)
+    expect(not first.allows(same_process, now) and not second.allows(same_process, now),
+           f"third send in the same second caps the couple in both processes: stored {stored(same_process)}")
+    
+    # A send not flushed yet is kept by load and written once by the next flush
+    first.record(reloaded, now)
+    first.load(db)
+    expect(list(first._sends[reloaded]) == [now], "load keeps an unflushed send")
+    first.flush(db)
+    db.commit()
+    first.load(db)
+    expect(stored(reloaded) == [now] and list(first._sends[reloaded]) == [now],
+           f"unflushed send stored once: {stored(reloaded)}")
+    
+    db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
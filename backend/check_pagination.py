@@ -0,0 +1,143 @@
+"""
+Check that keyset pagination walks every lead list ordering completely.
+
+Seeds an in-memory SQLite database with leads whose sort values mix
+``func.now()`` timestamps (stored without microseconds, many in the same
+second), Python datetimes, ties and NULLs, then follows ``next_cursor``
+through every page of each sort_by and sort_order the leads endpoint
+offers. Every lead must appear exactly once, in order, with NULLs last,
+and the walk must end. Page-number requests must return the same pages.
+
+    python check_pagination.py
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Keep the module-level engine in utils.database off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from api.leads import LEAD_SORT_COLUMNS, lead_serializer
+from models.database import Base, Couple, Lead, LeadStatus
+from utils.pagination import fetch_keyset_page
+
+LEAD_COUNT = 240
+PAGE_SIZE = 7
+
+
+def lead_values(index: int, earlier: datetime):
+    """Sort values for the index-th lead: now() text, datetimes, ties and NULLs."""
+    kind = index % 4
+    if kind == 0:
+        timestamp = func.now()
+    elif kind == 1:
+        timestamp = earlier + timedelta(microseconds=index)
+    elif kind == 2:
+        timestamp = earlier.replace(microsecond=0)
+    else:
+        timestamp = None
+    
+    return {
+        'created_at': timestamp if kind != 3 else earlier + timedelta(seconds=index % 5),
+        'last_contact_date': timestamp,
+        'lead_score': [10.0, 50.0, 50.5, None, 50.0][index % 5],
+    }
+
+
+async def seed(db: AsyncSession):
+    """One couple with LEAD_COUNT leads."""
+    couple = Couple(partner_1_name="Partner A", partner_2_name="Partner B")
+    db.add(couple)
+    await db.flush()
+    
+    earlier = datetime.now() - timedelta(seconds=1)
+    db.add_all(
+        Lead(couple_id=couple.id, status=LeadStatus.NEW, **lead_values(index, earlier))
+        for index in range(LEAD_COUNT)
+    )
+    await db.commit()
+
+
+async def walk(db: AsyncSession, sort_key: str, sort_order: str):
+    """Pages of lead ids followed by cursor; stops after more pages than possible."""
+    column = LEAD_SORT_COLUMNS[sort_key]
+    pages, cursor = [], None
+    while len(pages) <= LEAD_COUNT // PAGE_SIZE + 1:
+        rows, cursor = await fetch_keyset_page(
+            db, lead_serializer.select(column), sort_key=sort_key, sort_column=column,
+            id_column=Lead.id, sort_order=sort_order, page_size=PAGE_SIZE, cursor=cursor
+        )
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages, True
+    return pages, False
+
+
+async def numbered_page(db: AsyncSession, sort_key: str, sort_order: str, page: int):
+    """Lead ids of a page requested by number (offset), as legacy clients do."""
+    column = LEAD_SORT_COLUMNS[sort_key]
+    rows, _ = await fetch_keyset_page(
+        db, lead_serializer.select(column), sort_key=sort_key, sort_column=column,
+        id_column=Lead.id, sort_order=sort_order, page_size=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE
+    )
+    return [row.id for row in rows]
+
+
+def in_order(ids, values, descending: bool) -> bool:
+    """Non-NULL values sorted in the requested direction, then the NULLs."""
+    present = [values[lead_id] for lead_id in ids if values[lead_id] is not None]
+    nulls = [lead_id for lead_id in ids if values[lead_id] is None]
+    if ids[len(present):] != nulls:
+        return False
+    pairs = zip(present, present[1:])
+    return all(a >= b for a, b in pairs) if descending else all(a <= b for a, b in pairs)
+
+
+async def main() -> int:
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    
+    failures = 0
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await seed(db)
+            
+            for sort_key, column in LEAD_SORT_COLUMNS.items():
+                values = dict((await db.execute(select(Lead.id, column))).all())
+                for sort_order in ("asc", "desc"):
+                    pages, finished = await walk(db, sort_key, sort_order)
+                    ids = [lead_id for page in pages for lead_id in page]
+                    numbered = [
+                        await numbered_page(db, sort_key, sort_order, number)
+                        for number in (1, 2, len(pages))
+                    ]
+                    ok = (
+                        finished
+                        and len(ids) == len(set(ids)) == LEAD_COUNT
+                        and in_order(ids, values, sort_order == "desc")
+                        and numbered == [pages[0], pages[1], pages[-1]]
+                    )
+                    failures += 0 if ok else 1
+                    print(f"{'ok  ' if ok else 'FAIL'} {sort_key} {sort_order}: "
+                          f"{len(ids)} of {LEAD_COUNT} leads, {len(set(ids))} distinct, "
+                          f"{len(pages)} pages{'' if finished else ' (did not finish)'}")
+    finally:
+        await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,156 @@
+"""
+Check that the hot query shapes are served by an index.
+
+Runs EXPLAIN on each query against DATABASE_URL (EXPLAIN QUERY PLAN on
+SQLite) and fails if a plan scans the table instead of using the index it
+was built for. Without DATABASE_URL the current models are created in a
+throwaway in-memory SQLite database. A real database is checked with the
+schema it has, so run ``alembic upgrade head`` on it first:
+
+    python check_query_plans.py
+    DATABASE_URL=sqlite:///./wedding_leads.db python check_query_plans.py
+
+On PostgreSQL sequential scans are disabled for the check, so a small or
+empty table cannot hide a missing index behind a cheaper full scan.
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Default to a throwaway database with the current schema
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add the backend directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import and_, asc, desc, func, select, text, tuple_
+
+from models.database import Base, Couple, Lead, LeadStatus, WeddingStage
+from utils.database import engine
+
+
+def hot_queries():
+    """(description, statement, expected index) for each hot access path."""
+    now = datetime.now()
+    start_date = now - timedelta(days=30)
+    
+    queries = [
+        (
+            "leads ready for contact",
+            select(Lead).where(
+                Lead.earliest_contact_date <= now,
+                Lead.status == LeadStatus.NEW,
+                Lead.last_contact_date.is_(None)
+            ).order_by(desc(Lead.lead_score)),
+            "ix_leads_ready_for_contact",
+        ),
+        (
+            "officer performance",
+            select(func.count(Lead.id)).where(
+                Lead.assigned_loan_officer_id == 1,
+                Lead.status == LeadStatus.QUALIFIED
+            ),
+            "ix_leads_officer_status",
+        ),
+        (
+            "post-wedding campaign eligibility",
+            select(Couple.id).where(
+                and_(
+                    Couple.wedding_stage == WeddingStage.RECENTLY_MARRIED,
+                    Couple.wedding_date >= date.today() - timedelta(days=180),
+                    Couple.wedding_date <= date.today() - timedelta(days=60),
+                    Couple.opted_out == False
+                )
+            ),
+            "ix_couples_eligibility",
+        ),
+        (
+            "nurture follow-ups",
+            select(Lead.id).where(
+                Lead.status == LeadStatus.NURTURING,
+                Lead.next_follow_up_date <= now
+            ),
+            "ix_leads_follow_up",
+        ),
+        (
+            "leads timeline",
+            select(
+                func.date(Lead.created_at).label('date'),
+                func.count(Lead.id).label('count')
+            ).where(
+                Lead.created_at >= start_date
+            ).group_by(func.date(Lead.created_at)),
+            "ix_leads_created_at",
+        ),
+        (
+            "couples timeline",
+            select(
+                func.date(Couple.created_at).label('date'),
+                func.count(Couple.id).label('count')
+            ).where(
+                Couple.created_at >= start_date
+            ).group_by(func.date(Couple.created_at)),
+            "ix_couples_created_at",
+        ),
+    ]
+    
+    # Lead list keyset pages: (sort column, id) past the cursor, both directions
+    keyset_pages = [
+        (Lead.created_at, start_date, "ix_leads_created_at"),
+        (Lead.lead_score, 50.0, "ix_leads_lead_score"),
+        (Lead.last_contact_date, start_date, "ix_leads_last_contact_date"),
+    ]
+    for column, value, index_name in keyset_pages:
+        for descending in (False, True):
+            position = tuple_(column, Lead.id)
+            after = tuple_(value, 1000)
+            order = desc if descending else asc
+            queries.append((
+                f"leads by {column.key} {'desc' if descending else 'asc'} keyset page",
+                select(Lead.id).where(
+                    column.isnot(None),
+                    position < after if descending else position > after
+                ).order_by(order(column), order(Lead.id)).limit(51),
+                index_name,
+            ))
+    
+    return queries
+
+
+def explain(connection, statement) -> str:
+    """The query plan as text."""
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+        return "\n".join(row[-1] for row in rows)
+    
+    rows = connection.execute(text("EXPLAIN " + sql)).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def main() -> int:
+    engine.echo = False
+    if engine.dialect.name == "sqlite" and engine.url.database in (None, "", ":memory:"):
+        # Only the throwaway default; a real database keeps its migrated schema
+        Base.metadata.create_all(bind=engine)
+    
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        
+        for description, statement, index_name in hot_queries():
+            plan = explain(connection, statement)
+            ok = index_name in plan
+            failures += 0 if ok else 1
+            print(f"{'ok  ' if ok else 'FAIL'} {description}: expected {index_name}")
+            if not ok:
+                print("    " + plan.replace("\n", "\n    "))
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
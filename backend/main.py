@@ -5,10 +5,12 @@ from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
 
-from api import leads, couples, campaigns, loan_officers, analytics
+from api import leads, couples, campaigns, loan_officers, analytics, market_reports
 from models.database import Base
-from utils.database import engine, get_db
+from utils.database import engine, get_db, SessionLocal
 from utils.auth import get_current_user
+from services.market_report import get_market_report_cache
+from services.scheduler import create_campaign_scheduler
 
 # Load environment variables
 load_dotenv()
@@ -35,6 +37,30 @@ app.add_middleware(
 # Security
 security = HTTPBearer()
 
+# Pre-render market report pages and keep them current in the background
+@app.on_event("startup")
+async def start_market_report_cache():
+    get_market_report_cache().start()
+
+@app.on_event("shutdown")
+async def stop_market_report_cache():
+    get_market_report_cache().stop()
+
+# Automated campaigns on a DB-backed schedule; safe to enable on every instance
+campaign_scheduler = None
+
+@app.on_event("startup")
+async def start_campaign_scheduler():
+    global campaign_scheduler
+    if os.getenv("ENABLE_CAMPAIGN_SCHEDULER", "false").lower() == "true":
+        campaign_scheduler = create_campaign_scheduler(SessionLocal)
+        campaign_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_campaign_scheduler():
+    if campaign_scheduler is not None:
+        campaign_scheduler.stop()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -47,6 +73,9 @@ app.include_router(campaigns.router, prefix="/api/v1/campaigns", tags=["campaign
 app.include_router(loan_officers.router, prefix="/api/v1/loan-officers", tags=["loan-officers"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
 
+# Public market report pages linked from campaign emails
+app.include_router(market_reports.router, tags=["market-report"])
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -5,7 +5,7 @@ FastAPI backend for Wedding Registry Lead Generation Platform - Database Version
 from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, exists, select
 from typing import List, Optional
 import json
 from datetime import datetime, timedelta
@@ -44,8 +44,8 @@ async def get_dashboard_metrics(db: Session = Depends(get_db)):
     """Get dashboard analytics with real-time data from database"""
     
     # Get total counts
-    total_couples = db.query(Couple).count()
-    total_leads = db.query(Lead).count()
+    total_couples = db.scalar(select(func.count(Couple.id)))
+    total_leads = db.scalar(select(func.count(Lead.id)))
     
     # Get lead status breakdown
     status_counts = db.query(Lead.status, func.count(Lead.id)).group_by(Lead.status).all()
@@ -55,14 +55,18 @@ async def get_dashboard_metrics(db: Session = Depends(get_db)):
     conversion_rate = round((total_leads / total_couples * 100), 1) if total_couples > 0 else 0
     
     # Get recently married couples (higher value leads)
-    recently_married = db.query(Couple).filter(Couple.wedding_stage == "recently_married").count()
+    recently_married = db.scalar(
+        select(func.count(Couple.id)).where(Couple.wedding_stage == "recently_married")
+    )
     
     # Calculate average wedding budget
     avg_budget_result = db.query(func.avg(Couple.wedding_budget)).scalar()
     avg_budget = int(avg_budget_result) if avg_budget_result else 0
     
     # Get high-value leads (target price > $500K)
-    high_value_leads = db.query(Lead).filter(Lead.target_purchase_price >= 500000).count()
+    high_value_leads = db.scalar(
+        select(func.count(Lead.id)).where(Lead.target_purchase_price >= 500000)
+    )
     
     # Calculate average lead score
     avg_score_result = db.query(func.avg(Lead.lead_score)).scalar()
@@ -97,37 +101,44 @@ async def get_leads(
 ):
     """Get paginated leads with filtering"""
     
-    query = db.query(Lead).join(Couple, Lead.couple_id == Couple.id)
+    # Only the columns the response needs, lead and couple in one row
+    query = select(
+        Lead.id, Lead.couple_id, Lead.target_purchase_price, Lead.target_down_payment,
+        Lead.estimated_income, Lead.timeline_to_purchase, Lead.credit_score_range,
+        Lead.lead_score, Lead.status, Lead.created_at, Lead.updated_at,
+        Couple.partner_1_name, Couple.partner_2_name, Couple.wedding_budget,
+        Couple.wedding_city, Couple.wedding_state, Couple.wedding_stage
+    ).join(Couple, Lead.couple_id == Couple.id)
     
     # Apply filters
     if status:
-        query = query.filter(Lead.status == status)
+        query = query.where(Lead.status == status)
     if min_score:
-        query = query.filter(Lead.lead_score >= min_score)
+        query = query.where(Lead.lead_score >= min_score)
     
     # Get total count for pagination
-    total = query.count()
+    total = db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply pagination and ordering
-    leads = query.order_by(desc(Lead.lead_score), desc(Lead.created_at))\
-                 .offset((page - 1) * page_size)\
-                 .limit(page_size)\
-                 .all()
+    leads = db.execute(
+        query.order_by(desc(Lead.lead_score), desc(Lead.created_at))
+             .offset((page - 1) * page_size)
+             .limit(page_size)
+    ).all()
     
     # Format response
     leads_data = []
     for lead in leads:
-        couple = lead.couple
         leads_data.append({
             "id": lead.id,
             "couple_id": lead.couple_id,
-            "couple_names": f"{couple.partner_1_name} & {couple.partner_2_name}",
+            "couple_names": f"{lead.partner_1_name} & {lead.partner_2_name}",
             "target_purchase_price": lead.target_purchase_price,
             "target_down_payment": lead.target_down_payment,
             "estimated_income": lead.estimated_income,
-            "wedding_budget": couple.wedding_budget,
-            "wedding_location": f"{couple.wedding_city}, {couple.wedding_state}",
-            "wedding_stage": couple.wedding_stage,
+            "wedding_budget": lead.wedding_budget,
+            "wedding_location": f"{lead.wedding_city}, {lead.wedding_state}",
+            "wedding_stage": lead.wedding_stage,
             "timeline_to_purchase": lead.timeline_to_purchase,
             "credit_score_range": lead.credit_score_range,
             "lead_score": lead.lead_score,
@@ -156,27 +167,31 @@ async def get_couples(
 ):
     """Get paginated couples with filtering"""
     
-    query = db.query(Couple)
+    query = select(
+        Couple.id, Couple.partner_1_name, Couple.partner_2_name, Couple.wedding_date,
+        Couple.wedding_stage, Couple.wedding_venue, Couple.wedding_city, Couple.wedding_state,
+        Couple.wedding_budget, Couple.guest_count, Couple.source_platform, Couple.created_at,
+        # Whether the couple has a lead, in the same query
+        exists().where(Lead.couple_id == Couple.id).label("has_lead")
+    )
     
     # Apply filters
     if stage:
-        query = query.filter(Couple.wedding_stage == stage)
+        query = query.where(Couple.wedding_stage == stage)
     
     # Get total count
-    total = query.count()
+    total = db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply pagination
-    couples = query.order_by(desc(Couple.wedding_budget), desc(Couple.created_at))\
-                   .offset((page - 1) * page_size)\
-                   .limit(page_size)\
-                   .all()
+    couples = db.execute(
+        query.order_by(desc(Couple.wedding_budget), desc(Couple.created_at))
+             .offset((page - 1) * page_size)
+             .limit(page_size)
+    ).all()
     
     # Format response
     couples_data = []
     for couple in couples:
-        # Check if couple has a lead
-        has_lead = db.query(Lead).filter(Lead.couple_id == couple.id).first() is not None
-        
         couples_data.append({
             "id": couple.id,
             "partner_1_name": couple.partner_1_name,
@@ -189,7 +204,7 @@ async def get_couples(
             "wedding_budget": couple.wedding_budget,
             "guest_count": couple.guest_count,
             "source_platform": couple.source_platform,
-            "has_lead": has_lead,
+            "has_lead": bool(couple.has_lead),
             "created_at": couple.created_at.isoformat()
         })
     
@@ -208,7 +223,13 @@ async def get_couples(
 async def get_campaigns(db: Session = Depends(get_db)):
     """Get all marketing campaigns"""
     
-    campaigns = db.query(Campaign).order_by(desc(Campaign.created_at)).all()
+    campaigns = db.execute(
+        select(
+            Campaign.id, Campaign.name, Campaign.type, Campaign.status,
+            Campaign.total_sends, Campaign.total_opens, Campaign.total_clicks,
+            Campaign.total_responses, Campaign.budget, Campaign.spend, Campaign.created_at
+        ).order_by(desc(Campaign.created_at))
+    ).all()
     
     campaigns_data = []
     for campaign in campaigns:
@@ -242,13 +263,25 @@ async def get_campaigns(db: Session = Depends(get_db)):
 async def get_lead_details(lead_id: int, db: Session = Depends(get_db)):
     """Get detailed information for a specific lead"""
     
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = db.execute(
+        select(
+            Lead.id, Lead.couple_id, Lead.target_purchase_price, Lead.target_down_payment,
+            Lead.estimated_income, Lead.current_rent, Lead.timeline_to_purchase,
+            Lead.property_type_interest, Lead.credit_score_range, Lead.debt_to_income_ratio,
+            Lead.lead_score, Lead.status, Lead.created_at, Lead.updated_at,
+            Couple.partner_1_name, Couple.partner_2_name, Couple.wedding_budget,
+            Couple.wedding_city, Couple.wedding_state, Couple.wedding_date, Couple.wedding_stage
+        ).join(Couple, Lead.couple_id == Couple.id).where(Lead.id == lead_id)
+    ).first()
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
-    couple = lead.couple
-    activities = db.query(LeadActivity).filter(LeadActivity.lead_id == lead_id)\
-                   .order_by(desc(LeadActivity.created_at)).all()
+    activities = db.execute(
+        select(
+            LeadActivity.id, LeadActivity.activity_type, LeadActivity.description,
+            LeadActivity.outcome, LeadActivity.created_at, LeadActivity.created_by
+        ).where(LeadActivity.lead_id == lead_id).order_by(desc(LeadActivity.created_at))
+    ).all()
     
     activities_data = [{
         "id": activity.id,
@@ -263,15 +296,15 @@ async def get_lead_details(lead_id: int, db: Session = Depends(get_db)):
         "lead": {
             "id": lead.id,
             "couple_id": lead.couple_id,
-            "couple_names": f"{couple.partner_1_name} & {couple.partner_2_name}",
+            "couple_names": f"{lead.partner_1_name} & {lead.partner_2_name}",
             "target_purchase_price": lead.target_purchase_price,
             "target_down_payment": lead.target_down_payment,
             "estimated_income": lead.estimated_income,
             "current_rent": lead.current_rent,
-            "wedding_budget": couple.wedding_budget,
-            "wedding_location": f"{couple.wedding_city}, {couple.wedding_state}",
-            "wedding_date": couple.wedding_date,
-            "wedding_stage": couple.wedding_stage,
+            "wedding_budget": lead.wedding_budget,
+            "wedding_location": f"{lead.wedding_city}, {lead.wedding_state}",
+            "wedding_date": lead.wedding_date,
+            "wedding_stage": lead.wedding_stage,
             "timeline_to_purchase": lead.timeline_to_purchase,
             "property_type_interest": lead.property_type_interest,
             "credit_score_range": lead.credit_score_range,
@@ -289,20 +322,27 @@ async def get_lead_details(lead_id: int, db: Session = Depends(get_db)):
 async def get_loan_officers(db: Session = Depends(get_db)):
     """Get all loan officers"""
     
-    officers = db.query(LoanOfficer).filter(LoanOfficer.active == True).all()
+    # Assigned-lead counts come from a correlated subquery, not a query per officer
+    assigned_leads = select(func.count(Lead.id)).where(
+        Lead.assigned_loan_officer_id == LoanOfficer.id
+    ).correlate(LoanOfficer).scalar_subquery()
+    
+    officers = db.execute(
+        select(
+            LoanOfficer.id, LoanOfficer.name, LoanOfficer.email, LoanOfficer.phone,
+            LoanOfficer.specialty, LoanOfficer.active, assigned_leads.label("assigned_leads")
+        ).where(LoanOfficer.active == True)
+    ).all()
     
     officers_data = []
     for officer in officers:
-        # Count assigned leads
-        assigned_leads = db.query(Lead).filter(Lead.assigned_loan_officer_id == officer.id).count()
-        
         officers_data.append({
             "id": officer.id,
             "name": officer.name,
             "email": officer.email,
             "phone": officer.phone,
             "specialty": officer.specialty,
-            "assigned_leads": assigned_leads,
+            "assigned_leads": officer.assigned_leads,
             "active": officer.active
         })
     
@@ -0,0 +1,61 @@
+"""
+Alembic environment.
+
+Fresh databases get their tables from ``Base.metadata.create_all`` on
+startup, but create_all never alters a table that already exists. Every
+model change therefore needs a revision here that brings an existing
+database up to date (and skips what create_all already made). Run from
+the backend directory:
+
+    alembic upgrade head
+    alembic check    # fails if the models have changes no revision covers
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from models.database import Base
+from utils.database import DATABASE_URL
+
+config = context.config
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (alembic upgrade --sql)."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
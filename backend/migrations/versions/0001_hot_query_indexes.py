@@ -0,0 +1,53 @@
+"""Composite and partial indexes for hot query shapes
+
+Covers ready-for-contact, officer performance, campaign eligibility,
+follow-up passes, couple -> lead joins and created_at timelines. Fresh
+databases already get these from create_all, hence IF NOT EXISTS. On
+PostgreSQL they are built CONCURRENTLY so the tables stay writable.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate per dialect)
+INDEXES = [
+    ('ix_leads_ready_for_contact', 'leads', ['status', 'earliest_contact_date', 'lead_score'],
+     {'postgresql': 'last_contact_date IS NULL', 'sqlite': 'last_contact_date IS NULL'}),
+    ('ix_leads_officer_status', 'leads', ['assigned_loan_officer_id', 'status'], {}),
+    ('ix_leads_follow_up', 'leads', ['status', 'next_follow_up_date'], {}),
+    ('ix_leads_couple_id', 'leads', ['couple_id'], {}),
+    ('ix_leads_created_at', 'leads', ['created_at', 'id'], {}),
+    ('ix_couples_eligibility', 'couples', ['wedding_stage', 'wedding_date'],
+     {'postgresql': 'opted_out = false', 'sqlite': 'opted_out = 0'}),
+    ('ix_couples_created_at', 'couples', ['created_at'], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **{f'{dialect}_where': sa.text(clause) for dialect, clause in where.items()}
+            )
+    
+    # Fresh statistics so the planner costs the new indexes right away
+    op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,175 @@
+"""Campaign delivery columns and tables
+
+Adds what the campaign automation needs on top of the original schema:
+
+- campaign_sends: send key (step + uq_campaign_sends_send_key), send
+  window (scheduled_send_date) and retry state (template_key, attempts,
+  next_attempt_at, last_error)
+- dead_letter_sends, contact_frequency, campaign_run_checkpoints,
+  scheduled_jobs and job_runs
+
+Existing duplicate (campaign, lead) sends are numbered as steps 0, 1, ...
+so the unique send key can be added without dropping history. Objects
+that already exist (fresh databases get them from create_all) are left
+alone. SQLite rebuilds campaign_sends to add the constraint, which needs
+a live connection (no --sql output on SQLite).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+CAMPAIGN_SEND_COLUMNS = [
+    sa.Column('step', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('scheduled_send_date', sa.DateTime()),
+    sa.Column('template_key', sa.String(50)),
+    sa.Column('attempts', sa.Integer(), server_default='0'),
+    sa.Column('next_attempt_at', sa.DateTime()),
+    sa.Column('last_error', sa.Text()),
+]
+
+CAMPAIGN_SEND_INDEXES = [
+    ('ix_campaign_sends_scheduled_send_date', ['scheduled_send_date']),
+    ('ix_campaign_sends_next_attempt_at', ['next_attempt_at']),
+]
+
+SEND_KEY = 'uq_campaign_sends_send_key'
+
+
+def _inspector():
+    """Inspector for the live database; None when emitting SQL offline."""
+    if op.get_context().as_sql:
+        return None
+    return sa.inspect(op.get_bind())
+
+
+def _has_table(inspector, table: str) -> bool:
+    return inspector is not None and inspector.has_table(table)
+
+
+def upgrade() -> None:
+    inspector = _inspector()
+    
+    existing_columns = set()
+    existing_indexes = set()
+    existing_constraints = set()
+    if inspector is not None:
+        existing_columns = {column['name'] for column in inspector.get_columns('campaign_sends')}
+        existing_indexes = {index['name'] for index in inspector.get_indexes('campaign_sends')}
+        existing_constraints = {
+            constraint['name'] for constraint in inspector.get_unique_constraints('campaign_sends')
+        }
+    
+    with op.batch_alter_table('campaign_sends') as batch:
+        for column in CAMPAIGN_SEND_COLUMNS:
+            if column.name not in existing_columns:
+                batch.add_column(column.copy())
+    
+    if SEND_KEY not in existing_constraints:
+        # Number repeat sends of a campaign to a lead so the send key is unique
+        op.execute(
+            "UPDATE campaign_sends SET step = ("
+            "SELECT COUNT(*) FROM campaign_sends AS earlier "
+            "WHERE earlier.campaign_id = campaign_sends.campaign_id "
+            "AND earlier.lead_id = campaign_sends.lead_id "
+            "AND earlier.id < campaign_sends.id)"
+        )
+        with op.batch_alter_table('campaign_sends') as batch:
+            batch.create_unique_constraint(SEND_KEY, ['campaign_id', 'lead_id', 'step'])
+    
+    for name, columns in CAMPAIGN_SEND_INDEXES:
+        if name not in existing_indexes:
+            op.create_index(name, 'campaign_sends', columns)
+    
+    if not _has_table(inspector, 'dead_letter_sends'):
+        op.create_table(
+            'dead_letter_sends',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('campaign_send_id', sa.Integer(), sa.ForeignKey('campaign_sends.id'),
+                      nullable=False, unique=True),
+            sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.id'), nullable=False),
+            sa.Column('lead_id', sa.Integer(), sa.ForeignKey('leads.id'), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('failure_reason', sa.Text()),
+            sa.Column('permanent', sa.Boolean()),
+            sa.Column('failed_at', sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index('ix_dead_letter_sends_id', 'dead_letter_sends', ['id'])
+    
+    if not _has_table(inspector, 'contact_frequency'):
+        op.create_table(
+            'contact_frequency',
+            sa.Column('couple_id', sa.Integer(), sa.ForeignKey('couples.id'), primary_key=True),
+            sa.Column('send_times', sa.JSON()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        )
+    
+    if not _has_table(inspector, 'campaign_run_checkpoints'):
+        op.create_table(
+            'campaign_run_checkpoints',
+            sa.Column('pass_name', sa.String(50), primary_key=True),
+            sa.Column('started_at', sa.DateTime()),
+            sa.Column('last_key', sa.Integer()),
+            sa.Column('batches_completed', sa.Integer()),
+            sa.Column('completed_at', sa.DateTime()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        )
+    
+    if not _has_table(inspector, 'scheduled_jobs'):
+        op.create_table(
+            'scheduled_jobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False, unique=True),
+            sa.Column('interval_seconds', sa.Integer(), nullable=False),
+            sa.Column('overlap_policy', sa.String(20)),
+            sa.Column('enabled', sa.Boolean()),
+            sa.Column('next_run_at', sa.DateTime()),
+            sa.Column('last_run_at', sa.DateTime()),
+            sa.Column('last_status', sa.String(20)),
+            sa.Column('last_duration_seconds', sa.Float()),
+            sa.Column('queued', sa.Boolean()),
+            sa.Column('lease_owner', sa.String(100)),
+            sa.Column('lease_expires_at', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index('ix_scheduled_jobs_id', 'scheduled_jobs', ['id'])
+    
+    if not _has_table(inspector, 'job_runs'):
+        op.create_table(
+            'job_runs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('job_id', sa.Integer(), sa.ForeignKey('scheduled_jobs.id'), nullable=False),
+            sa.Column('owner', sa.String(100)),
+            sa.Column('started_at', sa.DateTime(), nullable=False),
+            sa.Column('finished_at', sa.DateTime()),
+            sa.Column('duration_seconds', sa.Float()),
+            sa.Column('status', sa.String(20)),
+            sa.Column('result', sa.JSON()),
+            sa.Column('error', sa.Text()),
+        )
+        op.create_index('ix_job_runs_id', 'job_runs', ['id'])
+        op.create_index('ix_job_runs_job_id', 'job_runs', ['job_id'])
+
+
+def downgrade() -> None:
+    for table in ['job_runs', 'scheduled_jobs', 'campaign_run_checkpoints', 'contact_frequency',
+                  'dead_letter_sends']:
+        op.drop_table(table)
+    
+    for name, _ in reversed(CAMPAIGN_SEND_INDEXES):
+        op.drop_index(name, table_name='campaign_sends')
+    
+    with op.batch_alter_table('campaign_sends') as batch:
+        batch.drop_constraint(SEND_KEY, type_='unique')
+        for column in reversed(CAMPAIGN_SEND_COLUMNS):
+            batch.drop_column(column.name)
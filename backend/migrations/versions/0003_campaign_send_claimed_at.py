@@ -0,0 +1,33 @@
+"""Lease timestamp for campaign send claims
+
+campaign_sends.claimed_at records when a send was claimed (status
+'pending'), so claims abandoned by a crashed run can be told apart from
+live ones and requeued.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql:
+        columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('campaign_sends')}
+        if 'claimed_at' in columns:
+            return
+    
+    with op.batch_alter_table('campaign_sends') as batch:
+        batch.add_column(sa.Column('claimed_at', sa.DateTime()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('campaign_sends') as batch:
+        batch.drop_column('claimed_at')
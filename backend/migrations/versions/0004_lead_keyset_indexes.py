@@ -0,0 +1,37 @@
+"""Keyset pagination indexes for the remaining lead sort keys
+
+Lead lists page by (sort column, id) for every sort_by; created_at is
+already covered by ix_leads_created_at. As in 0001, fresh databases get
+these from create_all, and on PostgreSQL they are built CONCURRENTLY.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:00:00
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_leads_lead_score', 'leads', ['lead_score', 'id']),
+    ('ix_leads_last_contact_date', 'leads', ['last_contact_date', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+    
+    op.execute('ANALYZE leads')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -3,7 +3,7 @@ from enum import Enum
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Boolean, 
-    Float, Text, ForeignKey, Enum as SQLEnum, JSON
+    Float, Text, ForeignKey, Enum as SQLEnum, JSON, UniqueConstraint, Index, text
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Session
@@ -38,6 +38,16 @@ class WeddingStage(str, Enum):
 
 class Couple(Base):
     __tablename__ = "couples"
+    __table_args__ = (
+        # Campaign eligibility: stage + wedding date window, opted-out couples excluded
+        Index(
+            "ix_couples_eligibility", "wedding_stage", "wedding_date",
+            postgresql_where=text("opted_out = false"),
+            sqlite_where=text("opted_out = 0")
+        ),
+        # Timeline analysis and created_at ranges
+        Index("ix_couples_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     partner_1_name = Column(String(100), nullable=False)
@@ -78,6 +88,25 @@ class Couple(Base):
 
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        # Ready-for-contact: never-contacted leads by status and waiting period, best first
+        Index(
+            "ix_leads_ready_for_contact", "status", "earliest_contact_date", "lead_score",
+            postgresql_where=text("last_contact_date IS NULL"),
+            sqlite_where=text("last_contact_date IS NULL")
+        ),
+        # Officer performance and "assigned to me" listings
+        Index("ix_leads_officer_status", "assigned_loan_officer_id", "status"),
+        # Nurture and follow-up passes
+        Index("ix_leads_follow_up", "status", "next_follow_up_date"),
+        # Couple -> lead joins
+        Index("ix_leads_couple_id", "couple_id"),
+        # Timeline analysis and created_at keyset pages
+        Index("ix_leads_created_at", "created_at", "id"),
+        # lead_score and last_contact_date keyset pages
+        Index("ix_leads_lead_score", "lead_score", "id"),
+        Index("ix_leads_last_contact_date", "last_contact_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     couple_id = Column(Integer, ForeignKey("couples.id"), nullable=False)
@@ -195,10 +224,16 @@ class Campaign(Base):
 
 class CampaignSend(Base):
     __tablename__ = "campaign_sends"
+    __table_args__ = (
+        # One send per campaign step per lead; claimed before the provider call
+        UniqueConstraint("campaign_id", "lead_id", "step", name="uq_campaign_sends_send_key"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
     lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    step = Column(Integer, nullable=False, default=0)  # Drip step or follow-up occurrence
+    scheduled_send_date = Column(DateTime, index=True)  # Planned send time for 'scheduled' rows
     
     # Delivery tracking
     sent_at = Column(DateTime)
@@ -208,10 +243,17 @@ class CampaignSend(Base):
     responded_at = Column(DateTime)
     
     # Status
-    send_status = Column(String(20), default="pending")  # pending, sent, delivered, failed
+    send_status = Column(String(20), default="pending")  # pending, sent, delivered, scheduled, retrying, dead
+    claimed_at = Column(DateTime)  # When the current 'pending' claim was taken; stale claims are requeued
     bounce_reason = Column(String(200))
     unsubscribed = Column(Boolean, default=False)
     
+    # Retry queue
+    template_key = Column(String(50))  # Library template sent, so a retry resends the same content
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, index=True)
+    last_error = Column(Text)
+    
     # Metadata
     created_at = Column(DateTime, default=func.now())
     
@@ -220,6 +262,92 @@ class CampaignSend(Base):
     lead = relationship("Lead", back_populates="campaign_sends")
 
 
+class DeadLetterSend(Base):
+    # Sends that failed permanently or ran out of retry attempts
+    __tablename__ = "dead_letter_sends"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_send_id = Column(Integer, ForeignKey("campaign_sends.id"), nullable=False, unique=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    
+    attempts = Column(Integer, nullable=False)
+    failure_reason = Column(Text)
+    permanent = Column(Boolean, default=False)  # Failed without retrying, e.g. no email address
+    
+    failed_at = Column(DateTime, default=func.now())
+    
+    # Relationships
+    campaign_send = relationship("CampaignSend")
+
+
+class ContactFrequency(Base):
+    # Recent send times per couple, persisted from the in-memory frequency cap
+    __tablename__ = "contact_frequency"
+    
+    couple_id = Column(Integer, ForeignKey("couples.id"), primary_key=True)
+    send_times = Column(JSON)  # Epoch seconds of the latest sends, oldest first
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class CampaignRunCheckpoint(Base):
+    # Progress of each automated campaign pass, committed at batch boundaries
+    __tablename__ = "campaign_run_checkpoints"
+    
+    pass_name = Column(String(50), primary_key=True)  # engagement, post_wedding, nurture, follow_up
+    started_at = Column(DateTime)
+    last_key = Column(Integer)  # Last couple/lead id processed in the current pass
+    batches_completed = Column(Integer, default=0)
+    completed_at = Column(DateTime)  # Null while a pass is in progress or was interrupted
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class ScheduledJob(Base):
+    # Recurring background job definition, schedule state and run lease
+    __tablename__ = "scheduled_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    interval_seconds = Column(Integer, nullable=False)
+    overlap_policy = Column(String(20), default="skip")  # skip, queue
+    enabled = Column(Boolean, default=True)
+    
+    # Schedule state
+    next_run_at = Column(DateTime)
+    last_run_at = Column(DateTime)
+    last_status = Column(String(20))  # success, partial, failed
+    last_duration_seconds = Column(Float)
+    queued = Column(Boolean, default=False)  # Trigger arrived while a run held the lease
+    
+    # Lease held by the process currently running the job
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime)
+    
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    runs = relationship("JobRun", back_populates="job")
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("scheduled_jobs.id"), nullable=False, index=True)
+    owner = Column(String(100))
+    
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    duration_seconds = Column(Float)
+    status = Column(String(20))  # running, success, partial, failed, skipped, queued
+    result = Column(JSON)  # Counts returned by the job
+    error = Column(Text)
+    
+    # Relationships
+    job = relationship("ScheduledJob", back_populates="runs")
+
+
 class Interaction(Base):
     __tablename__ = "interactions"
     
@@ -1,35 +1,74 @@
+import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, distinct, func
 
 from models.database import (
-    Couple, Lead, Campaign, CampaignSend, 
+    Couple, Lead, Campaign, CampaignSend, CampaignRunCheckpoint,
     LeadStatus, WeddingStage, LoanOfficer
 )
-from services.email_service import EmailService, EmailTemplateLibrary
-from utils.database import get_db
+from services.email_service import BatchRecipient, EmailService, SendFailure, get_template_registry
+from services.retry_queue import SendRetryQueue
+from services.frequency_cap import get_frequency_cap
+from services.send_windows import SendWindowPlanner, claim_scheduled_sends
+from utils.database import get_db, insert_or_ignore
 
 
 class CampaignAutomationService:
     """Service for automated campaign management and lead nurturing."""
     
+    # Lead updates after a successful send, by template category:
+    # (new status, or None to keep it; days until the next follow-up)
+    CONTACT_SCHEDULE = {
+        'engagement': (LeadStatus.CONTACTED, 14),
+        'post_wedding': (LeadStatus.CONTACTED, 21),
+        'nurture': (LeadStatus.NURTURING, 30),
+        'follow_up': (None, 14),
+    }
+    
     def __init__(self, db: Session):
         self.db = db
         self.email_service = EmailService()
-        self.template_library = EmailTemplateLibrary()
+        self.template_registry = get_template_registry()
+        self.retry_queue = SendRetryQueue(db)
+        self.frequency_cap = get_frequency_cap()
+        self.frequency_capped = 0
+        self.send_window_planner = SendWindowPlanner()
+        self.batch_size = int(os.getenv('CAMPAIGN_BATCH_SIZE', '500'))
+    
+    def close(self):
+        """Release the email service's render pool and transport connections."""
+        self.email_service.close()
     
     def run_automated_campaigns(self) -> Dict[str, int]:
         """Run all automated campaigns and return summary stats."""
         results = {
+            'stale_claims_requeued': 0,
+            'retried_emails_sent': 0,
+            'scheduled_emails_sent': 0,
             'engagement_emails_sent': 0,
             'post_wedding_emails_sent': 0,
             'nurture_emails_sent': 0,
             'follow_up_emails_sent': 0,
+            'frequency_capped': 0,
             'errors': 0
         }
+        self.frequency_capped = 0
         
         try:
+            # Count sends other processes made since this process last looked
+            self.frequency_cap.load(self.db)
+            
+            # Sends claimed by a run that died before finishing become due retries
+            results['stale_claims_requeued'] = self.retry_queue.requeue_stale_claims()
+            
+            # Resend failed emails that are due for another attempt
+            results['retried_emails_sent'] = self._process_retry_queue()
+            
+            # Send emails planned into a send window that has come due
+            results['scheduled_emails_sent'] = self._process_scheduled_sends()
+            
             # Process engagement announcements
             results['engagement_emails_sent'] = self._process_engagement_campaigns()
             
@@ -42,10 +81,15 @@ class CampaignAutomationService:
             # Process follow-up campaigns
             results['follow_up_emails_sent'] = self._process_follow_up_campaigns()
             
+            # Persist frequency counters for other processes and restarts
+            self.frequency_cap.flush(self.db)
+            self.db.commit()
+        
         except Exception as e:
             print(f"Error in automated campaigns: {str(e)}")
             results['errors'] += 1
         
+        results['frequency_capped'] = self.frequency_capped
         return results
     
     def _process_engagement_campaigns(self) -> int:
@@ -59,31 +103,29 @@ class CampaignAutomationService:
                 Lead.earliest_contact_date <= datetime.now(),
                 Lead.last_contact_date.is_(None)
             )
-        ).all()
+        )
         
+        template = self.template_registry.get('engagement')
         sent_count = 0
-        template = self.template_library.get_engagement_announcement_template()
         
-        for couple in eligible_couples:
-            lead = couple.leads[0] if couple.leads else None
-            if not lead:
-                continue
+        for batch in self._in_batches('engagement', eligible_couples, Couple.id):
+            candidates = []
             
-            # Get assigned loan officer
-            loan_officer = self._get_loan_officer_for_lead(lead)
-            if not loan_officer:
-                continue
-            
-            # Send email
-            if self._send_campaign_email(couple, lead, template, loan_officer, 'engagement'):
-                sent_count += 1
+            for couple in batch:
+                lead = couple.leads[0] if couple.leads else None
+                if not lead:
+                    continue
+                
+                # Get assigned loan officer
+                loan_officer = self._get_loan_officer_for_lead(lead)
+                if not loan_officer:
+                    continue
                 
-                # Update lead status
-                lead.status = LeadStatus.CONTACTED
-                lead.last_contact_date = datetime.now()
-                lead.next_follow_up_date = datetime.now() + timedelta(days=14)
+                candidates.append((couple, lead, loan_officer, 0))
+            
+            # Send emails in bulk
+            sent_count += len(self._send_campaign_emails(template, candidates, 'engagement'))
         
-        self.db.commit()
         return sent_count
     
     def _process_post_wedding_campaigns(self) -> int:
@@ -101,28 +143,27 @@ class CampaignAutomationService:
                 Lead.status == LeadStatus.NEW,
                 Lead.last_contact_date.is_(None)
             )
-        ).all()
+        )
         
+        template = self.template_registry.get('post_wedding')
         sent_count = 0
-        template = self.template_library.get_post_wedding_template()
         
-        for couple in eligible_couples:
-            lead = couple.leads[0] if couple.leads else None
-            if not lead:
-                continue
+        for batch in self._in_batches('post_wedding', eligible_couples, Couple.id):
+            candidates = []
             
-            loan_officer = self._get_loan_officer_for_lead(lead)
-            if not loan_officer:
-                continue
-            
-            if self._send_campaign_email(couple, lead, template, loan_officer, 'post_wedding'):
-                sent_count += 1
+            for couple in batch:
+                lead = couple.leads[0] if couple.leads else None
+                if not lead:
+                    continue
                 
-                lead.status = LeadStatus.CONTACTED
-                lead.last_contact_date = datetime.now()
-                lead.next_follow_up_date = datetime.now() + timedelta(days=21)
+                loan_officer = self._get_loan_officer_for_lead(lead)
+                if not loan_officer:
+                    continue
+                
+                candidates.append((couple, lead, loan_officer, 0))
+            
+            sent_count += len(self._send_campaign_emails(template, candidates, 'post_wedding'))
         
-        self.db.commit()
         return sent_count
     
     def _process_nurture_campaigns(self) -> int:
@@ -134,25 +175,24 @@ class CampaignAutomationService:
                 Lead.next_follow_up_date <= datetime.now(),
                 Couple.opted_out == False
             )
-        ).all()
+        )
         
+        template = self.template_registry.get('nurture')
         sent_count = 0
-        template = self.template_library.get_nurture_template()
         
-        for lead in eligible_leads:
-            couple = lead.couple
-            loan_officer = self._get_loan_officer_for_lead(lead)
-            if not loan_officer:
-                continue
+        for batch in self._in_batches('nurture', eligible_leads, Lead.id):
+            candidates = []
             
-            if self._send_campaign_email(couple, lead, template, loan_officer, 'nurture'):
-                sent_count += 1
+            for lead in batch:
+                couple = lead.couple
+                loan_officer = self._get_loan_officer_for_lead(lead)
+                if not loan_officer:
+                    continue
                 
-                lead.status = LeadStatus.NURTURING
-                lead.last_contact_date = datetime.now()
-                lead.next_follow_up_date = datetime.now() + timedelta(days=30)
+                candidates.append((couple, lead, loan_officer, self._follow_up_step(lead)))
+            
+            sent_count += len(self._send_campaign_emails(template, candidates, 'nurture'))
         
-        self.db.commit()
         return sent_count
     
     def _process_follow_up_campaigns(self) -> int:
@@ -164,73 +204,313 @@ class CampaignAutomationService:
                 Lead.next_follow_up_date <= datetime.now(),
                 Couple.opted_out == False
             )
-        ).all()
+        )
         
         sent_count = 0
         
-        for lead in eligible_leads:
-            # Create custom follow-up based on lead data
-            custom_template = self._create_follow_up_template(lead)
-            if not custom_template:
-                continue
-            
-            couple = lead.couple
-            loan_officer = self._get_loan_officer_for_lead(lead)
-            if not loan_officer:
-                continue
+        for batch in self._in_batches('follow_up', eligible_leads, Lead.id):
+            # Group leads by the shared follow-up variant picked from lead data
+            candidates_by_template = {}
             
-            if self._send_campaign_email(couple, lead, custom_template, loan_officer, 'follow_up'):
-                sent_count += 1
+            for lead in batch:
+                custom_template = self.template_registry.get_follow_up_template(lead)
                 
-                # Extend follow-up schedule
-                lead.last_contact_date = datetime.now()
-                lead.next_follow_up_date = datetime.now() + timedelta(days=14)
+                couple = lead.couple
+                loan_officer = self._get_loan_officer_for_lead(lead)
+                if not loan_officer:
+                    continue
+                
+                candidates_by_template.setdefault(custom_template, []).append(
+                    (couple, lead, loan_officer, self._follow_up_step(lead))
+                )
+            
+            for custom_template, candidates in candidates_by_template.items():
+                sent = self._send_campaign_emails(custom_template, candidates, 'follow_up')
+                sent_count += len(sent)
         
-        self.db.commit()
         return sent_count
     
-    def _send_campaign_email(
+    def _in_batches(self, pass_name: str, query, key_column) -> Iterator[List]:
+        """Yield a pass's eligible rows in key order, checkpointing after each batch.
+        
+        The batch's sends and lead updates are committed together with the
+        pass's last processed key, so a run that crashes resumes after the
+        last completed batch instead of starting the pass over. The send
+        window planner is given the pass's remaining recipients per state
+        up front, so its slots continue across batches.
+        """
+        checkpoint = self.db.query(CampaignRunCheckpoint).filter(
+            CampaignRunCheckpoint.pass_name == pass_name
+        ).first()
+        if checkpoint is None:
+            checkpoint = CampaignRunCheckpoint(pass_name=pass_name)
+            self.db.add(checkpoint)
+        
+        if checkpoint.completed_at is not None or checkpoint.last_key is None:
+            # Previous run finished this pass: start a new one
+            checkpoint.started_at = datetime.now()
+            checkpoint.completed_at = None
+            checkpoint.last_key = 0
+            checkpoint.batches_completed = 0
+        else:
+            print(f"Resuming {pass_name} pass after key {checkpoint.last_key}")
+        self.db.commit()
+        
+        last_key = checkpoint.last_key
+        self.send_window_planner.begin_pass(
+            query.filter(key_column > last_key)
+            .with_entities(Couple.wedding_state, func.count(distinct(key_column)))
+            .group_by(Couple.wedding_state)
+            .all()
+        )
+        
+        while True:
+            batch = query.filter(key_column > last_key).order_by(key_column).limit(self.batch_size).all()
+            if not batch:
+                break
+            
+            yield batch
+            
+            last_key = batch[-1].id
+            checkpoint.last_key = last_key
+            checkpoint.batches_completed = (checkpoint.batches_completed or 0) + 1
+            self.db.commit()
+        
+        checkpoint.completed_at = datetime.now()
+        self.db.commit()
+    
+    def _send_campaign_emails(
         self,
-        couple: Couple,
-        lead: Lead,
         template,
-        loan_officer: LoanOfficer,
+        candidates: List[Tuple[Couple, Lead, LoanOfficer, int]],
         campaign_type: str
-    ) -> bool:
-        """Send a campaign email and record the send."""
-        try:
-            loan_officer_data = {
-                'name': loan_officer.name,
-                'company': 'Your Mortgage Company',  # Would come from config
-                'phone': loan_officer.phone,
-                'email': loan_officer.email
-            }
-            
-            # Send email
-            success = self.email_service.send_campaign_email(
+    ) -> List[Tuple[Couple, Lead]]:
+        """Send one template to many leads and record each send.
+        
+        The (campaign, lead, step) send key of every candidate is claimed
+        before the provider is called, so overlapping or retried runs skip
+        leads another run already owns instead of emailing them twice. A
+        claim left pending by a crash is picked up by the retry queue once
+        it goes stale (see SendRetryQueue.requeue_stale_claims).
+        Claimed recipients then go out through the provider's bulk API and
+        each result is written back to its CampaignSend row; failures are
+        queued for a targeted retry.
+        """
+        if not candidates:
+            return []
+        
+        campaign = self._get_or_create_auto_campaign(campaign_type)
+        campaign_id = campaign.id
+        
+        # Couples at the cross-campaign cap wait for a later run
+        allowed = [candidate for candidate in candidates if self.frequency_cap.allows(candidate[0].id)]
+        self.frequency_capped += len(candidates) - len(allowed)
+        
+        template_key = self.template_registry.key_of(template)
+        claimed = [
+            candidate for candidate in allowed
+            if self._claim_send(campaign_id, candidate[1].id, candidate[3], template_key)
+        ]
+        
+        # Make the claims visible to concurrent runs before calling the provider
+        self._commit_claims()
+        
+        if not claimed:
+            return []
+        
+        campaign_sends = {
+            (campaign_send.lead_id, campaign_send.step): campaign_send
+            for campaign_send in self.db.query(CampaignSend).filter(
+                CampaignSend.campaign_id == campaign_id,
+                CampaignSend.lead_id.in_([lead.id for _, lead, _, _ in claimed])
+            )
+        }
+        
+        entries = [
+            (campaign_sends[(lead.id, step)], couple, lead, loan_officer)
+            for couple, lead, loan_officer, step in claimed
+        ]
+        
+        # Honor the campaign's send window: sends whose slot in their time
+        # zone is still ahead are stored as scheduled and dispatched later
+        send_times = self.send_window_planner.plan(
+            ((campaign_send.id, couple.wedding_state) for campaign_send, couple, _, _ in entries),
+            campaign.send_time_preference
+        )
+        now = datetime.now()
+        
+        immediate = []
+        for entry in entries:
+            campaign_send = entry[0]
+            send_at = send_times[campaign_send.id]
+            if send_at <= now:
+                immediate.append(entry)
+            else:
+                campaign_send.send_status = 'scheduled'
+                campaign_send.scheduled_send_date = send_at
+        
+        return self._deliver(template, immediate)
+    
+    def _deliver(
+        self,
+        template,
+        entries: List[Tuple[CampaignSend, Couple, Lead, LoanOfficer]]
+    ) -> List[Tuple[Couple, Lead]]:
+        """Send claimed rows, record each outcome and update contacted leads.
+        
+        Claims are renewed just before the provider call; rows another run
+        requeued in the meantime are left to it. Failed sends go to the
+        retry queue (or dead-letter table) with the provider's failure reason.
+        """
+        held = self.retry_queue.renew_claims([entry[0] for entry in entries])
+        self._commit_claims()
+        if len(held) < len(entries):
+            print(f"Skipping {len(entries) - len(held)} {template.category} sends claimed by another run")
+            entries = [entry for entry in entries if entry[0].id in held]
+        if not entries:
+            return []
+        
+        template_key = self.template_registry.key_of(template)
+        
+        recipients = []
+        for campaign_send, couple, lead, loan_officer in entries:
+            campaign_send.template_key = template_key
+            recipients.append(BatchRecipient(
+                key=campaign_send.id,
                 couple=couple,
                 lead=lead,
-                template=template,
-                loan_officer_data=loan_officer_data
-            )
+                loan_officer_data={
+                    'name': loan_officer.name,
+                    'company': 'Your Mortgage Company',  # Would come from config
+                    'phone': loan_officer.phone,
+                    'email': loan_officer.email
+                }
+            ))
+        
+        failures = {}
+        try:
+            results = self.email_service.send_batch_campaign_email(template, recipients, failures)
+        except Exception as e:
+            print(f"Error sending {template.category} campaign emails: {str(e)}")
+            results = {}
+        
+        sent = []
+        for campaign_send, couple, lead, _ in entries:
+            if results.get(campaign_send.id):
+                campaign_send.send_status = 'sent'
+                campaign_send.sent_at = datetime.now()
+                campaign_send.attempts = (campaign_send.attempts or 0) + 1
+                campaign_send.next_attempt_at = None
+                self._record_contact(lead, template.category)
+                self.frequency_cap.record(couple.id)
+                sent.append((couple, lead))
+            else:
+                failure = failures.get(campaign_send.id) or SendFailure("Send did not complete")
+                self.retry_queue.record_failure(campaign_send, failure)
+        
+        self.frequency_cap.flush_if_due(self.db)
+        return sent
+    
+    def _commit_claims(self):
+        """Commit claim changes without expiring the rows this pass has loaded.
+        
+        The pass keeps using the leads and couples it already loaded instead
+        of reloading each one after every claim commit.
+        """
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+    
+    def _record_contact(self, lead: Lead, category: str):
+        """Advance a lead after a successful send, per the pass that sent it."""
+        status, follow_up_days = self.CONTACT_SCHEDULE.get(category, (None, None))
+        if status is not None:
+            lead.status = status
+        lead.last_contact_date = datetime.now()
+        if follow_up_days is not None:
+            lead.next_follow_up_date = datetime.now() + timedelta(days=follow_up_days)
+    
+    def _process_retry_queue(self) -> int:
+        """Resend failed sends whose backoff has elapsed, without re-running selection."""
+        return self._deliver_claimed(self.retry_queue.claim_due(), 'retrying')
+    
+    def _process_scheduled_sends(self) -> int:
+        """Send rows planned into a send window once their time has come."""
+        return self._deliver_claimed(claim_scheduled_sends(self.db), 'scheduled')
+    
+    def _deliver_claimed(self, due: List[CampaignSend], requeue_status: str) -> int:
+        """Deliver already-claimed send rows using the template each row records."""
+        entries_by_template = {}
+        for campaign_send in due:
+            lead = campaign_send.lead
+            couple = lead.couple
             
-            if success:
-                # Record the campaign send
-                campaign_send = CampaignSend(
-                    campaign_id=self._get_or_create_auto_campaign(campaign_type).id,
-                    lead_id=lead.id,
-                    sent_at=datetime.now(),
-                    send_status='sent'
-                )
-                self.db.add(campaign_send)
-                
-                return True
+            if couple.opted_out:
+                self.retry_queue.dead_letter(campaign_send, SendFailure("Couple opted out", permanent=True))
+                continue
             
-        except Exception as e:
-            print(f"Error sending campaign email to couple {couple.id}: {str(e)}")
-            return False
+            if not self.frequency_cap.allows(couple.id):
+                # Not a failure: try again once the couple's window has room
+                campaign_send.send_status = requeue_status
+                if requeue_status == 'scheduled':
+                    campaign_send.scheduled_send_date = self.frequency_cap.next_allowed_at(couple.id)
+                else:
+                    campaign_send.next_attempt_at = self.frequency_cap.next_allowed_at(couple.id)
+                self.frequency_capped += 1
+                continue
+            
+            if campaign_send.template_key:
+                template = self.template_registry.get(campaign_send.template_key)
+            else:
+                template = self.email_service.get_campaign_template(campaign_send.campaign)
+            if template is None:
+                self.retry_queue.dead_letter(campaign_send, SendFailure("Email template no longer available", permanent=True))
+                continue
+            
+            loan_officer = self._get_loan_officer_for_lead(lead)
+            if not loan_officer:
+                self.retry_queue.record_failure(campaign_send, SendFailure("No loan officer available"))
+                continue
+            
+            entries_by_template.setdefault(template, []).append((campaign_send, couple, lead, loan_officer))
         
-        return False
+        sent_count = 0
+        for template, entries in entries_by_template.items():
+            sent_count += len(self._deliver(template, entries))
+        
+        self.db.commit()
+        return sent_count
+    
+    def _claim_send(self, campaign_id: int, lead_id: int, step: int, template_key: str) -> bool:
+        """Claim the send key for a lead; False if another send already holds it.
+        
+        An existing row is never taken over here: failed sends belong to the
+        retry queue, which also recovers stale pending claims using the
+        template recorded with the claim.
+        """
+        now = datetime.now()
+        return insert_or_ignore(
+            self.db,
+            CampaignSend,
+            {
+                'campaign_id': campaign_id,
+                'lead_id': lead_id,
+                'step': step,
+                'send_status': 'pending',
+                'template_key': template_key,
+                'claimed_at': now,
+                'created_at': now
+            },
+            index_elements=['campaign_id', 'lead_id', 'step']
+        )
+    
+    @staticmethod
+    def _follow_up_step(lead: Lead) -> int:
+        """Send key step for recurring passes: one send per scheduled follow-up date."""
+        return lead.next_follow_up_date.toordinal() if lead.next_follow_up_date else 0
     
     def _get_loan_officer_for_lead(self, lead: Lead) -> Optional[LoanOfficer]:
         """Get the assigned loan officer for a lead, or auto-assign one."""
@@ -274,54 +554,6 @@ class CampaignAutomationService:
         
         return campaign
     
-    def _create_follow_up_template(self, lead: Lead):
-        """Create a custom follow-up template based on lead data."""
-        from services.email_service import EmailTemplate
-        
-        # Customize based on lead score and data
-        if lead.lead_score >= 80:
-            subject = "Exclusive Program Alert: Perfect Match for {{ partner_1_name }} & {{ partner_2_name }}"
-            focus = "premium programs"
-        elif lead.target_purchase_price and lead.target_purchase_price > 500000:
-            subject = "Luxury Home Financing Options for {{ partner_1_name }} & {{ partner_2_name }}"
-            focus = "jumbo loan programs"
-        else:
-            subject = "Your Home Buying Journey: Next Steps for {{ partner_1_name }} & {{ partner_2_name }}"
-            focus = "getting started"
-        
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2c5aa0;">Hi {{{{ partner_1_name }}}} & {{{{ partner_2_name }}}},</h2>
-                
-                <p>I hope you're doing well! I wanted to follow up on our previous conversation about your home buying goals.</p>
-                
-                <p>Based on what you've shared, I think you'd be particularly interested in our {focus}. I've been working with couples just like you and have some great success stories to share.</p>
-                
-                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="color: #2c5aa0; margin-top: 0;">What's Next?</h3>
-                    <p>I'd love to schedule a brief 15-minute call to discuss your specific situation and see how I can help make your homeownership dreams a reality.</p>
-                </div>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{{{{ consultation_link }}}}" style="background: #2c5aa0; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; display: inline-block;">Schedule Your Call</a>
-                </div>
-                
-                <p>Best regards,<br>{{{{ loan_officer_name }}}}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return EmailTemplate(
-            name="Custom Follow-up",
-            subject=subject,
-            html_content=html_content,
-            plain_content=html_content.replace('<br>', '\n').replace('</p>', '\n'),
-            category="follow_up"
-        )
-    
     def create_drip_campaign(
         self,
         couple: Couple,
@@ -337,6 +569,7 @@ class CampaignAutomationService:
                 campaign_send = CampaignSend(
                     campaign_id=step['campaign_id'],
                     lead_id=couple.leads[0].id if couple.leads else None,
+                    step=i,
                     scheduled_send_date=send_date,
                     send_status='scheduled'
                 )
@@ -344,7 +577,7 @@ class CampaignAutomationService:
             
             self.db.commit()
             return True
-            
+        
         except Exception as e:
             print(f"Error creating drip campaign for couple {couple.id}: {str(e)}")
             return False
\ No newline at end of file
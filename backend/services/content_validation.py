@@ -0,0 +1,109 @@
+"""
+Email content validation for compliance and best practices.
+
+All rules are compiled into one case-insensitive regex, so a template is
+scanned once no matter how many rules there are. Verdicts are cached by
+template hash: templates are validated when a campaign is saved, and the
+send path only ever sees cache hits.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from jinja2.utils import LRUCache
+
+
+@dataclass(frozen=True)
+class ContentRule:
+    name: str
+    pattern: str  # Regular expression, matched case-insensitively
+    message: str
+    required: bool = False  # Issue raised when the pattern is missing instead of present
+
+
+@dataclass(frozen=True)
+class ContentIssue:
+    rule: str
+    message: str
+    positions: Tuple[int, ...] = ()  # Offsets of each match; empty for missing required content
+
+
+SPAM_TRIGGER_WORDS = ['guaranteed', 'act now', 'limited time', 'no obligation', 'free money']
+
+DEFAULT_CONTENT_RULES = [
+    ContentRule(
+        name='unsubscribe',
+        pattern=r'unsubscribe',
+        message="Email must include unsubscribe link",
+        required=True
+    ),
+    *[
+        ContentRule(
+            name=f"spam:{word}",
+            pattern=re.escape(word),
+            message=f"Consider removing potential spam trigger: '{word}'"
+        )
+        for word in SPAM_TRIGGER_WORDS
+    ],
+    ContentRule(
+        name='personalization',
+        pattern=r'\{\{',
+        message="Email should include personalization variables",
+        required=True
+    ),
+]
+
+
+class ContentValidator:
+    """Single-pass matcher over an extensible list of content rules."""
+    
+    def __init__(self, rules: Sequence[ContentRule] = DEFAULT_CONTENT_RULES, cache_size: int = 1024):
+        self.rules = tuple(rules)
+        
+        # One named group per rule; the match's lastgroup identifies the rule
+        self._groups = {f"r{index}": rule for index, rule in enumerate(self.rules)}
+        self._pattern = re.compile(
+            '|'.join(f"(?P<{group}>{rule.pattern})" for group, rule in self._groups.items()),
+            re.IGNORECASE
+        )
+        self._verdicts = LRUCache(cache_size)
+    
+    def with_rules(self, extra_rules: Sequence[ContentRule]) -> 'ContentValidator':
+        """Return a new validator with additional rules."""
+        return ContentValidator([*self.rules, *extra_rules])
+    
+    def validate(self, content: str) -> List[ContentIssue]:
+        """Return issues for content, using the cached verdict when available."""
+        key = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        issues = self._verdicts.get(key)
+        if issues is None:
+            issues = self._scan(content)
+            self._verdicts[key] = issues
+        return list(issues)
+    
+    def _scan(self, content: str) -> Tuple[ContentIssue, ...]:
+        positions: Dict[str, List[int]] = {}
+        for match in self._pattern.finditer(content):
+            positions.setdefault(match.lastgroup, []).append(match.start())
+        
+        issues = []
+        for group, rule in self._groups.items():
+            found = positions.get(group)
+            if rule.required and not found:
+                issues.append(ContentIssue(rule=rule.name, message=rule.message))
+            elif not rule.required and found:
+                issues.append(ContentIssue(rule=rule.name, message=rule.message, positions=tuple(found)))
+        return tuple(issues)
+
+
+_content_validator: Optional[ContentValidator] = None
+
+
+def get_content_validator() -> ContentValidator:
+    """Get the process-wide validator with the default rules."""
+    global _content_validator
+    if _content_validator is None:
+        _content_validator = ContentValidator()
+    return _content_validator
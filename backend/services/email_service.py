@@ -1,16 +1,23 @@
 import os
-import re
+import hashlib
 from datetime import datetime
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, From, To, Subject, HtmlContent, PlainTextContent
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader, Template, nodes
+from jinja2.utils import LRUCache
 
 from models.database import Couple, Lead, Campaign, CampaignSend
+from services.email_transport import (
+    BatchPersonalization, EmailTransport, OutgoingBatch, OutgoingEmail, create_transport
+)
+from services.render_pool import RenderPool, render_chunk
+from services.content_validation import get_content_validator
+from services.html_to_text import html_to_text
+from services.market_data import MarketDataStore, get_market_data_store
 
 
-@dataclass
+@dataclass(frozen=True)
 class EmailTemplate:
     name: str
     subject: str
@@ -19,6 +26,170 @@ class EmailTemplate:
     category: str  # 'engagement', 'post_wedding', 'nurture', 'follow_up'
 
 
+@dataclass
+class BatchRecipient:
+    """One recipient of a bulk send; ``key`` maps the result back to the caller."""
+    key: Any
+    couple: Couple
+    lead: Lead
+    loan_officer_data: Dict
+    custom_variables: Optional[Dict] = None
+
+
+@dataclass(frozen=True)
+class SendFailure:
+    """Why a recipient was not sent; permanent failures are not worth retrying."""
+    reason: str
+    permanent: bool = False
+
+
+# SendGrid accepts at most 1,000 personalizations per mail/send request
+MAX_PERSONALIZATIONS_PER_REQUEST = 1000
+
+
+class CompiledTemplateCache:
+    """Shared LRU cache of compiled Jinja templates keyed by content hash.
+    
+    Templates are looked up by the SHA-256 of their source, so identical
+    sources compile once no matter where they come from (library templates,
+    per-lead follow-ups or ``Campaign.email_template``). When a bytecode
+    cache directory is configured, compiled code is also written to disk so
+    new workers skip compilation on startup.
+    """
+    
+    def __init__(self, cache_size: int = 256, bytecode_cache_dir: Optional[str] = None):
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        
+        # Sources are only needed on a cache miss, so keep them bounded too
+        self._sources = LRUCache(cache_size)
+        self._segments = LRUCache(cache_size)
+        self.environment = Environment(
+            loader=FunctionLoader(self._load_source),
+            cache_size=cache_size,
+            auto_reload=False,
+            bytecode_cache=bytecode_cache
+        )
+    
+    @staticmethod
+    def content_hash(source: str) -> str:
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+    
+    def get(self, source: str) -> Template:
+        """Return the compiled template for a source string."""
+        key = self.content_hash(source)
+        self._sources[key] = source
+        return self.environment.get_template(key)
+    
+    def is_substitution_safe(self, source: str) -> bool:
+        """Check that a template only outputs plain variables (no logic or filters).
+        
+        Such templates can be rendered once with placeholder tokens and
+        personalized by the provider's per-recipient substitutions.
+        """
+        return self.get_segments(source) is not None
+    
+    def get_segments(self, source: str) -> Optional[Tuple[Tuple[bool, str], ...]]:
+        """Split a substitution-safe template into (is_variable, text) segments.
+        
+        Returns None for templates that use logic or filters.
+        """
+        key = self.content_hash(source)
+        segments = self._segments.get(key, False)
+        if segments is False:
+            segments = []
+            for node in self.environment.parse(source).body:
+                if not isinstance(node, nodes.Output):
+                    segments = None
+                    break
+                for child in node.nodes:
+                    if isinstance(child, nodes.TemplateData):
+                        segments.append((False, child.data))
+                    elif isinstance(child, nodes.Name):
+                        segments.append((True, child.name))
+                    else:
+                        segments = None
+                        break
+                if segments is None:
+                    break
+            if segments is not None:
+                segments = tuple(segments)
+            self._segments[key] = segments
+        return segments
+    
+    def _load_source(self, name: str):
+        source = self._sources.get(name)
+        if source is None:
+            return None
+        return source, None, lambda: True
+
+
+_template_cache: Optional[CompiledTemplateCache] = None
+
+
+def get_template_cache() -> CompiledTemplateCache:
+    """Get the process-wide compiled template cache."""
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = CompiledTemplateCache(
+            cache_size=int(os.getenv('EMAIL_TEMPLATE_CACHE_SIZE', '256')),
+            bytecode_cache_dir=os.getenv('JINJA_BYTECODE_CACHE_DIR') or None
+        )
+    return _template_cache
+
+
+# Variables that differ per couple; everything else is fixed for a given
+# template, loan officer and campaign and can be rendered ahead of time
+RECIPIENT_VARIABLES = (
+    'partner_1_name', 'partner_2_name', 'wedding_date', 'wedding_city',
+    'wedding_state', 'location', 'target_price', 'estimated_income',
+    'avg_home_price', 'current_rate', 'consultation_link', 'market_report_link',
+    'unsubscribe_link'
+)
+
+
+class PrerenderedTemplate:
+    """Subject, HTML and plain parts with only the per-couple slots left open.
+    
+    Each part is stored as alternating literal chunks and slot names, so
+    filling it is a single join instead of a template render.
+    """
+    
+    __slots__ = ('parts', 'slots')
+    
+    def __init__(self, segments_by_part: List[Tuple[Tuple[bool, str], ...]], invariant_variables: Dict):
+        self.parts = []
+        slots = set()
+        for segments in segments_by_part:
+            literals, names = [''], []
+            for is_variable, text in segments:
+                if not is_variable:
+                    literals[-1] += text
+                elif text in RECIPIENT_VARIABLES:
+                    names.append(text)
+                    literals.append('')
+                    slots.add(text)
+                elif text in invariant_variables:
+                    literals[-1] += str(invariant_variables[text])
+                # Undefined variables render empty, as in Jinja
+            self.parts.append((tuple(literals), tuple(names)))
+        self.parts = tuple(self.parts)
+        self.slots = tuple(sorted(slots))
+    
+    def render(self, recipient_variables: Dict) -> Tuple[str, ...]:
+        """Fill the per-couple slots; returns (subject, html, plain)."""
+        rendered = []
+        for literals, names in self.parts:
+            pieces = [literals[0]]
+            for name, literal in zip(names, literals[1:]):
+                pieces.append(str(recipient_variables.get(name, '')))
+                pieces.append(literal)
+            rendered.append(''.join(pieces))
+        return tuple(rendered)
+
+
 class EmailTemplateLibrary:
     """Library of pre-built email templates for wedding-based mortgage leads."""
     
@@ -176,7 +347,7 @@ class EmailTemplateLibrary:
                         <ul>
                             <li>Inventory is up 15% from last month</li>
                             <li>Interest rates remain favorable for qualified buyers</li>
-                            <li>Average home prices in your area: ${{ avg_home_price }}</li>
+                            <li>Average home prices in your area: {{ avg_home_price }}</li>
                             <li>New buyer incentive programs available</li>
                         </ul>
                     </div>
@@ -203,7 +374,7 @@ class EmailTemplateLibrary:
             Current Market Highlights:
             • Inventory is up 15% from last month
             • Interest rates remain favorable for qualified buyers
-            • Average home prices in your area: ${{ avg_home_price }}
+            • Average home prices in your area: {{ avg_home_price }}
             • New buyer incentive programs available
 
             Exclusive Tip for Newlyweds:
@@ -218,16 +389,145 @@ class EmailTemplateLibrary:
             """,
             category="nurture"
         )
+    
+    # Follow-up variants: (subject, program focus), picked by lead score and price
+    FOLLOW_UP_VARIANTS = {
+        'premium': (
+            "Exclusive Program Alert: Perfect Match for {{ partner_1_name }} & {{ partner_2_name }}",
+            "premium programs"
+        ),
+        'jumbo': (
+            "Luxury Home Financing Options for {{ partner_1_name }} & {{ partner_2_name }}",
+            "jumbo loan programs"
+        ),
+        'standard': (
+            "Your Home Buying Journey: Next Steps for {{ partner_1_name }} & {{ partner_2_name }}",
+            "getting started"
+        ),
+    }
+    
+    @staticmethod
+    def get_follow_up_template(variant: str) -> EmailTemplate:
+        subject, focus = EmailTemplateLibrary.FOLLOW_UP_VARIANTS[variant]
+        
+        html_content = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c5aa0;">Hi {{{{ partner_1_name }}}} & {{{{ partner_2_name }}}},</h2>
+                
+                <p>I hope you're doing well! I wanted to follow up on our previous conversation about your home buying goals.</p>
+                
+                <p>Based on what you've shared, I think you'd be particularly interested in our {focus}. I've been working with couples just like you and have some great success stories to share.</p>
+                
+                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                    <h3 style="color: #2c5aa0; margin-top: 0;">What's Next?</h3>
+                    <p>I'd love to schedule a brief 15-minute call to discuss your specific situation and see how I can help make your homeownership dreams a reality.</p>
+                </div>
+                
+                <div style="text-align: center; margin: 30px 0;">
+                    <a href="{{{{ consultation_link }}}}" style="background: #2c5aa0; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; display: inline-block;">Schedule Your Call</a>
+                </div>
+                
+                <p>Best regards,<br>{{{{ loan_officer_name }}}}</p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        return EmailTemplate(
+            name="Custom Follow-up",
+            subject=subject,
+            html_content=html_content,
+            plain_content=html_to_text(html_content),
+            category="follow_up"
+        )
+
+
+class EmailTemplateRegistry:
+    """Library templates built and compiled once, shared as frozen instances."""
+    
+    def __init__(self, template_cache: Optional[CompiledTemplateCache] = None):
+        library = EmailTemplateLibrary
+        templates = {
+            'engagement': library.get_engagement_announcement_template(),
+            'post_wedding': library.get_post_wedding_template(),
+            'nurture': library.get_nurture_template(),
+        }
+        for variant in library.FOLLOW_UP_VARIANTS:
+            templates[f'follow_up_{variant}'] = library.get_follow_up_template(variant)
+        
+        # Compile everything now so sends only render
+        template_cache = template_cache or get_template_cache()
+        for template in templates.values():
+            template_cache.get(template.subject)
+            template_cache.get(template.html_content)
+            template_cache.get(template.plain_content)
+        
+        self._templates = MappingProxyType(templates)
+        self._keys = MappingProxyType({template: key for key, template in templates.items()})
+    
+    def get(self, key: str) -> Optional[EmailTemplate]:
+        return self._templates.get(key)
+    
+    def key_of(self, template: EmailTemplate) -> Optional[str]:
+        """Registry key of a library template; None for other templates."""
+        return self._keys.get(template)
+    
+    def get_follow_up_template(self, lead: Lead) -> EmailTemplate:
+        """Pick the follow-up variant for a lead based on score and target price."""
+        if lead.lead_score and lead.lead_score >= 80:
+            variant = 'premium'
+        elif lead.target_purchase_price and lead.target_purchase_price > 500000:
+            variant = 'jumbo'
+        else:
+            variant = 'standard'
+        return self._templates[f'follow_up_{variant}']
+
+
+_template_registry: Optional[EmailTemplateRegistry] = None
+
+
+def get_template_registry() -> EmailTemplateRegistry:
+    """Get the process-wide template registry, building it on first use."""
+    global _template_registry
+    if _template_registry is None:
+        _template_registry = EmailTemplateRegistry()
+    return _template_registry
 
 
 class EmailService:
     """Service for sending templated emails to wedding leads."""
     
-    def __init__(self):
-        self.sendgrid = SendGridAPIClient(api_key=os.getenv('SENDGRID_API_KEY'))
+    def __init__(
+        self,
+        transport: Optional[EmailTransport] = None,
+        render_pool: Optional[RenderPool] = None,
+        market_data: Optional[MarketDataStore] = None
+    ):
+        self.transport = transport or create_transport()
         self.from_email = os.getenv('FROM_EMAIL', 'noreply@yourdomain.com')
         self.from_name = os.getenv('FROM_NAME', 'Your Mortgage Company')
-        self.template_library = EmailTemplateLibrary()
+        self.base_url = os.getenv('BASE_URL', 'https://yourdomain.com')
+        self.template_cache = get_template_cache()
+        self.template_registry = get_template_registry()
+        self.content_validator = get_content_validator()
+        self.market_data = market_data or get_market_data_store()
+        
+        # Pre-rendered templates per (template, loan officer) pair
+        self._prerendered = LRUCache(int(os.getenv('EMAIL_PRERENDER_CACHE_SIZE', '1024')))
+        
+        # Process-pool rendering for large sends through non-bulk transports
+        render_workers = int(os.getenv('EMAIL_RENDER_WORKERS', '0'))
+        self.render_pool = render_pool or (RenderPool(render_workers) if render_workers > 0 else None)
+        self.render_chunk_size = int(os.getenv('EMAIL_RENDER_CHUNK_SIZE', '500'))
+        self.render_pool_threshold = int(os.getenv('EMAIL_RENDER_POOL_THRESHOLD', '5000'))
+    
+    def close(self):
+        """Shut down the render pool and transport connections."""
+        if self.render_pool is not None:
+            self.render_pool.close()
+        self.transport.close()
     
     def send_campaign_email(
         self,
@@ -239,15 +539,10 @@ class EmailService:
     ) -> bool:
         """Send a templated campaign email to a couple."""
         try:
-            # Prepare template variables
-            variables = self._prepare_template_variables(
-                couple, lead, loan_officer_data, custom_variables or {}
-            )
-            
             # Render templates
-            subject = Template(template.subject).render(**variables)
-            html_content = Template(template.html_content).render(**variables)
-            plain_content = Template(template.plain_content).render(**variables)
+            subject, html_content, plain_content = self.render_for_recipient(
+                template, couple, lead, loan_officer_data, custom_variables
+            )
             
             # Determine recipient
             to_email, to_name = self._get_primary_contact(couple)
@@ -255,26 +550,273 @@ class EmailService:
                 raise ValueError("No email address available for couple")
             
             # Create email
-            message = Mail(
-                from_email=From(self.from_email, self.from_name),
-                to_emails=To(to_email, to_name),
-                subject=Subject(subject),
-                html_content=HtmlContent(html_content),
-                plain_text_content=PlainTextContent(plain_content)
+            message = OutgoingEmail(
+                from_email=self.from_email,
+                from_name=self.from_name,
+                to_email=to_email,
+                to_name=to_name,
+                subject=subject,
+                html_content=html_content,
+                plain_content=plain_content,
+                categories=[template.category, 'wedding-leads']  # For tracking
             )
             
-            # Add categories for tracking
-            message.category = [template.category, 'wedding-leads']
-            
             # Send email
-            response = self.sendgrid.send(message)
-            
-            return response.status_code in [200, 202]
+            return self.transport.send(message)
             
         except Exception as e:
             print(f"Error sending email to couple {couple.id}: {str(e)}")
             return False
     
+    def send_batch_campaign_email(
+        self,
+        template: EmailTemplate,
+        recipients: List[BatchRecipient],
+        failures: Optional[Dict[Any, SendFailure]] = None
+    ) -> Dict[Any, bool]:
+        """Send one template to many recipients.
+        
+        With a bulk-capable transport, recipients are packed into
+        multi-personalization requests of up to MAX_PERSONALIZATIONS_PER_REQUEST,
+        each carrying its own substitution data. Otherwise every message is
+        rendered locally (in the render pool for large sends) and streamed
+        to the transport. Returns the delivery result for every recipient key;
+        if ``failures`` is given, it receives a SendFailure for each failed key.
+        """
+        results = {}
+        failures = failures if failures is not None else {}
+        
+        addressed = []
+        for recipient in recipients:
+            to_email, to_name = self._get_primary_contact(recipient.couple)
+            if not to_email:
+                print(f"Error sending email to couple {recipient.couple.id}: No email address available for couple")
+                results[recipient.key] = False
+                failures[recipient.key] = SendFailure("No email address available for couple", permanent=True)
+                continue
+            addressed.append((recipient, to_email, to_name))
+        
+        # Templates with logic or filters cannot be expressed as substitutions
+        bulk = self.transport.supports_bulk and all(
+            self.template_cache.is_substitution_safe(source)
+            for source in (template.subject, template.html_content, template.plain_content)
+        )
+        if not bulk:
+            results.update(self._send_rendered(template, addressed, failures))
+            return results
+        
+        personalized = [
+            (
+                recipient.key, to_email, to_name,
+                self._prepare_template_variables(
+                    recipient.couple, recipient.lead,
+                    recipient.loan_officer_data, recipient.custom_variables or {}
+                )
+            )
+            for recipient, to_email, to_name in addressed
+        ]
+        
+        for start in range(0, len(personalized), MAX_PERSONALIZATIONS_PER_REQUEST):
+            chunk = personalized[start:start + MAX_PERSONALIZATIONS_PER_REQUEST]
+            error = self._send_personalized_chunk(template, chunk)
+            for key, _, _, _ in chunk:
+                results[key] = error is None
+                if error is not None:
+                    failures[key] = SendFailure(error)
+        
+        return results
+    
+    def _send_rendered(
+        self,
+        template: EmailTemplate,
+        addressed: List[Tuple],
+        failures: Dict[Any, SendFailure]
+    ) -> Dict[Any, bool]:
+        """Render each recipient's message and stream them to the transport."""
+        results = {recipient.key: False for recipient, _, _ in addressed}
+        
+        # Keep recipients of the same loan officer together so render chunks share a template
+        addressed = sorted(
+            addressed, key=lambda item: tuple(sorted(item[0].loan_officer_data.items()))
+        )
+        rendered = self._render_recipients(template, [recipient for recipient, _, _ in addressed])
+        
+        messages = (
+            OutgoingEmail(
+                from_email=self.from_email,
+                from_name=self.from_name,
+                to_email=to_email,
+                to_name=to_name,
+                subject=subject,
+                html_content=html_content,
+                plain_content=plain_content,
+                categories=[template.category, 'wedding-leads'],
+                custom_args={'send_key': str(recipient.key)}
+            )
+            for (recipient, to_email, to_name), (subject, html_content, plain_content)
+            in zip(addressed, rendered)
+        )
+        
+        errors = {}
+        try:
+            sent = self.transport.send_many(messages, errors)
+        except Exception as e:
+            print(f"Error sending {template.category} emails: {str(e)}")
+            for recipient, _, _ in addressed:
+                failures[recipient.key] = SendFailure(str(e))
+            return results
+        
+        for index, ((recipient, _, _), success) in enumerate(zip(addressed, sent)):
+            results[recipient.key] = success
+            if not success:
+                failures[recipient.key] = SendFailure(errors.get(index, "Rejected by email provider"))
+        
+        return results
+    
+    def _render_recipients(
+        self,
+        template: EmailTemplate,
+        recipients: List[BatchRecipient]
+    ) -> Iterable[Tuple[str, str, str]]:
+        """Render messages in recipient order, using the render pool for large sends.
+        
+        Workers receive compact rows: slot value tuples for pre-rendered
+        templates, full variable dicts for templates with logic.
+        """
+        jobs = []
+        for recipient in recipients:
+            prerendered = None
+            if not recipient.custom_variables:
+                prerendered = self.prerender_template(template, recipient.loan_officer_data)
+            
+            if prerendered is not None:
+                variables = self._recipient_variables(recipient.couple, recipient.lead)
+                spec, row = prerendered, tuple(variables[name] for name in prerendered.slots)
+            else:
+                spec, row = template, self._prepare_template_variables(
+                    recipient.couple, recipient.lead,
+                    recipient.loan_officer_data, recipient.custom_variables or {}
+                )
+            
+            if jobs and jobs[-1][0] is spec and len(jobs[-1][1]) < self.render_chunk_size:
+                jobs[-1][1].append(row)
+            else:
+                jobs.append((spec, [row]))
+        
+        if self.render_pool is not None and len(recipients) >= self.render_pool_threshold:
+            return self.render_pool.render(jobs)
+        
+        return (message for spec, rows in jobs for message in render_chunk(spec, rows))
+    
+    def _send_personalized_chunk(self, template: EmailTemplate, chunk: List[Tuple]) -> Optional[str]:
+        """Send a single multi-personalization batch; returns the error, or None if accepted."""
+        try:
+            # Render once with placeholder tokens; the provider fills them per recipient
+            names = set().union(*(variables for _, _, _, variables in chunk))
+            tokens = {name: f"-{name}-" for name in names}
+            subject, html_content, plain_content = self.render_template(template, tokens)
+            
+            batch = OutgoingBatch(
+                from_email=self.from_email,
+                from_name=self.from_name,
+                subject=subject,
+                html_content=html_content,
+                plain_content=plain_content,
+                personalizations=[
+                    BatchPersonalization(
+                        to_email=to_email,
+                        to_name=to_name,
+                        substitutions={tokens[name]: str(value) for name, value in variables.items()},
+                        # Lets delivery events be matched to the caller's send record
+                        custom_args={'send_key': str(key)}
+                    )
+                    for key, to_email, to_name, variables in chunk
+                ],
+                categories=[template.category, 'wedding-leads']
+            )
+            
+            if not self.transport.send_batch(batch):
+                return "Rejected by email provider"
+            return None
+            
+        except Exception as e:
+            print(f"Error sending batch of {len(chunk)} emails: {str(e)}")
+            return str(e)
+    
+    def render_template(self, template: EmailTemplate, variables: Dict) -> Tuple[str, str, str]:
+        """Render subject, HTML and plain parts using cached compiled templates."""
+        return (
+            self.template_cache.get(template.subject).render(**variables),
+            self.template_cache.get(template.html_content).render(**variables),
+            self.template_cache.get(template.plain_content).render(**variables)
+        )
+    
+    def get_campaign_template(self, campaign: Campaign) -> Optional[EmailTemplate]:
+        """Build an email template from a campaign's stored content."""
+        if not campaign.email_template:
+            return None
+        
+        template = EmailTemplate(
+            name=campaign.name,
+            subject=campaign.subject_line or campaign.name,
+            html_content=campaign.email_template,
+            plain_content=html_to_text(campaign.email_template),
+            category='campaign'
+        )
+        
+        # Compile up front so the send loop only renders
+        self.template_cache.get(template.subject)
+        self.template_cache.get(template.html_content)
+        self.template_cache.get(template.plain_content)
+        
+        return template
+    
+    def render_for_recipient(
+        self,
+        template: EmailTemplate,
+        couple: Couple,
+        lead: Lead,
+        loan_officer_data: Dict,
+        custom_variables: Optional[Dict] = None
+    ) -> Tuple[str, str, str]:
+        """Render subject, HTML and plain parts for one couple.
+        
+        Uses the pre-rendered (template, loan officer) version when possible,
+        so only the per-couple slots are filled here.
+        """
+        prerendered = None if custom_variables else self.prerender_template(template, loan_officer_data)
+        if prerendered is None:
+            variables = self._prepare_template_variables(
+                couple, lead, loan_officer_data, custom_variables or {}
+            )
+            return self.render_template(template, variables)
+        
+        return prerendered.render(self._recipient_variables(couple, lead))
+    
+    def prerender_template(
+        self,
+        template: EmailTemplate,
+        loan_officer_data: Dict
+    ) -> Optional[PrerenderedTemplate]:
+        """Render officer-, campaign- and market-invariant parts once.
+        
+        Returns None for templates with logic or filters, which have to be
+        rendered in full per recipient.
+        """
+        key = (template, tuple(sorted(loan_officer_data.items())))
+        prerendered = self._prerendered.get(key)
+        if prerendered is None:
+            segments = [
+                self.template_cache.get_segments(source)
+                for source in (template.subject, template.html_content, template.plain_content)
+            ]
+            if any(part is None for part in segments):
+                return None
+            
+            prerendered = PrerenderedTemplate(segments, self._campaign_variables(loan_officer_data))
+            self._prerendered[key] = prerendered
+        return prerendered
+    
     def _prepare_template_variables(
         self,
         couple: Couple,
@@ -283,9 +825,19 @@ class EmailService:
         custom_variables: Dict
     ) -> Dict:
         """Prepare variables for template rendering."""
-        base_url = os.getenv('BASE_URL', 'https://yourdomain.com')
+        return {
+            **self._recipient_variables(couple, lead),
+            **self._campaign_variables(loan_officer_data),
+            
+            # Custom variables
+            **custom_variables
+        }
+    
+    def _recipient_variables(self, couple: Couple, lead: Lead) -> Dict:
+        """Variables that differ per couple (see RECIPIENT_VARIABLES)."""
+        base_url = self.base_url
         
-        variables = {
+        return {
             # Couple data
             'partner_1_name': couple.partner_1_name,
             'partner_2_name': couple.partner_2_name,
@@ -298,26 +850,24 @@ class EmailService:
             'target_price': f"${lead.target_purchase_price:,.0f}" if lead.target_purchase_price else "$350,000",
             'estimated_income': f"${lead.estimated_income:,.0f}" if lead.estimated_income else "your income level",
             
-            # Loan officer data
-            'loan_officer_name': loan_officer_data.get('name', 'Your Loan Officer'),
-            'company_name': loan_officer_data.get('company', 'Mortgage Company'),
-            'phone': loan_officer_data.get('phone', '(555) 123-4567'),
-            'email': loan_officer_data.get('email', 'officer@company.com'),
+            # Market data for the wedding location (in-memory lookup)
+            **self.market_data.template_variables(couple.wedding_state, couple.wedding_city),
             
             # Links
             'consultation_link': f"{base_url}/book-consultation?lead={lead.id}",
             'market_report_link': f"{base_url}/market-report?location={couple.wedding_state}",
             'unsubscribe_link': f"{base_url}/unsubscribe?couple={couple.id}",
-            
-            # Market data (would come from real data source)
-            'avg_home_price': '$425,000',
-            'current_rate': '6.75%',
-            
-            # Custom variables
-            **custom_variables
         }
-        
-        return variables
+    
+    def _campaign_variables(self, loan_officer_data: Dict) -> Dict:
+        """Variables fixed for a given loan officer and campaign."""
+        return {
+            # Loan officer data
+            'loan_officer_name': loan_officer_data.get('name', 'Your Loan Officer'),
+            'company_name': loan_officer_data.get('company', 'Mortgage Company'),
+            'phone': loan_officer_data.get('phone', '(555) 123-4567'),
+            'email': loan_officer_data.get('email', 'officer@company.com'),
+        }
     
     def _get_primary_contact(self, couple: Couple) -> tuple[str, str]:
         """Get the primary email contact for a couple."""
@@ -330,31 +880,8 @@ class EmailService:
     
     def validate_email_content(self, content: str) -> List[str]:
         """Validate email content for compliance and best practices."""
-        issues = []
-        
-        # Check for required elements
-        if 'unsubscribe' not in content.lower():
-            issues.append("Email must include unsubscribe link")
-        
-        # Check for spam triggers
-        spam_words = ['guaranteed', 'act now', 'limited time', 'no obligation', 'free money']
-        for word in spam_words:
-            if word in content.lower():
-                issues.append(f"Consider removing potential spam trigger: '{word}'")
-        
-        # Check for personalization
-        if '{{' not in content:
-            issues.append("Email should include personalization variables")
-        
-        return issues
+        return [issue.message for issue in self.content_validator.validate(content)]
     
     def get_template_by_category(self, category: str) -> Optional[EmailTemplate]:
         """Get a template by category."""
-        templates = {
-            'engagement': self.template_library.get_engagement_announcement_template,
-            'post_wedding': self.template_library.get_post_wedding_template,
-            'nurture': self.template_library.get_nurture_template,
-        }
-        
-        template_func = templates.get(category)
-        return template_func() if template_func else None
\ No newline at end of file
+        return self.template_registry.get(category)
\ No newline at end of file
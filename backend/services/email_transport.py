@@ -0,0 +1,435 @@
+"""
+Pluggable email transports.
+
+EmailService renders messages and hands them to a transport selected by the
+EMAIL_TRANSPORT setting:
+
+- ``sendgrid``: SendGrid Web API (default)
+- ``smtp``: any SMTP server, e.g. a local ``python -m aiosmtpd -n`` for load tests
+- ``memory``: keeps messages in memory, for tests and offline benchmarks
+- ``file``: spools each message as an .eml file into EMAIL_SPOOL_DIR
+
+Every transport records per-request timings so campaign throughput can be
+measured without sending real mail.
+"""
+
+import os
+import re
+import smtplib
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage as MIMEMessage
+from email.utils import formataddr
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import (
+    Mail, From, To, Subject, HtmlContent, PlainTextContent,
+    Category, CustomArg, Personalization, Substitution
+)
+
+
+@dataclass
+class OutgoingEmail:
+    """A fully rendered message for a single recipient."""
+    from_email: str
+    from_name: str
+    to_email: str
+    to_name: Optional[str]
+    subject: str
+    html_content: str
+    plain_content: str
+    categories: List[str] = field(default_factory=list)
+    custom_args: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class BatchPersonalization:
+    """Per-recipient data for a batch: placeholder token -> value."""
+    to_email: str
+    to_name: Optional[str]
+    substitutions: Dict[str, str]
+    custom_args: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class OutgoingBatch:
+    """One message body with placeholder tokens, personalized per recipient."""
+    from_email: str
+    from_name: str
+    subject: str
+    html_content: str
+    plain_content: str
+    personalizations: List[BatchPersonalization]
+    categories: List[str] = field(default_factory=list)
+    
+    def expand(self) -> Iterator[OutgoingEmail]:
+        """Apply substitutions locally, for transports without a bulk API."""
+        tokens = set()
+        for personalization in self.personalizations:
+            tokens.update(personalization.substitutions)
+        
+        pattern = re.compile('|'.join(
+            re.escape(token) for token in sorted(tokens, key=len, reverse=True)
+        )) if tokens else None
+        
+        for personalization in self.personalizations:
+            values = personalization.substitutions
+            
+            def fill(content: str) -> str:
+                if pattern is None:
+                    return content
+                return pattern.sub(lambda match: values.get(match.group(0), match.group(0)), content)
+            
+            yield OutgoingEmail(
+                from_email=self.from_email,
+                from_name=self.from_name,
+                to_email=personalization.to_email,
+                to_name=personalization.to_name,
+                subject=fill(self.subject),
+                html_content=fill(self.html_content),
+                plain_content=fill(self.plain_content),
+                categories=list(self.categories),
+                custom_args=dict(personalization.custom_args)
+            )
+
+
+class TransportStats:
+    """Thread-safe request/message counters and latency samples."""
+    
+    def __init__(self, max_samples: int = 10000):
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=max_samples)
+        self.requests = 0
+        self.messages = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+    
+    def record(self, messages: int, seconds: float, success: bool):
+        with self._lock:
+            self.requests += 1
+            self.messages += messages
+            self.total_seconds += seconds
+            self._durations.append(seconds)
+            if not success:
+                self.failures += 1
+    
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self.requests = self.messages = self.failures = 0
+            self.total_seconds = 0.0
+    
+    def summary(self) -> Dict[str, float]:
+        """Aggregate timings: counts, mean/p50/p95/max latency and throughput."""
+        with self._lock:
+            durations = sorted(self._durations)
+            requests, messages, failures = self.requests, self.messages, self.failures
+            total_seconds = self.total_seconds
+        
+        def percentile(p: float) -> float:
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(p * len(durations)))]
+        
+        return {
+            'requests': requests,
+            'messages': messages,
+            'failures': failures,
+            'total_seconds': round(total_seconds, 6),
+            'mean_seconds': round(total_seconds / requests, 6) if requests else 0.0,
+            'p50_seconds': round(percentile(0.50), 6),
+            'p95_seconds': round(percentile(0.95), 6),
+            'max_seconds': round(durations[-1], 6) if durations else 0.0,
+            'messages_per_second': round(messages / total_seconds, 1) if total_seconds else 0.0
+        }
+
+
+class EmailTransport:
+    """Base transport; subclasses implement _send and optionally _send_batch."""
+    
+    name = 'base'
+    
+    # True if the provider personalizes batches itself (see OutgoingBatch)
+    supports_bulk = False
+    
+    def __init__(self):
+        self.stats = TransportStats()
+    
+    def send(self, message: OutgoingEmail) -> bool:
+        started = time.perf_counter()
+        success = False
+        try:
+            success = self._send(message)
+            return success
+        finally:
+            self.stats.record(1, time.perf_counter() - started, success)
+    
+    def send_batch(self, batch: OutgoingBatch) -> bool:
+        started = time.perf_counter()
+        success = False
+        try:
+            success = self._send_batch(batch)
+            return success
+        finally:
+            self.stats.record(len(batch.personalizations), time.perf_counter() - started, success)
+    
+    def send_many(
+        self,
+        messages: Iterable[OutgoingEmail],
+        errors: Optional[Dict[int, str]] = None
+    ) -> List[bool]:
+        """Send rendered messages as they arrive; one result per message, in order.
+        
+        If ``errors`` is given, it receives the failure reason by message index.
+        """
+        results = []
+        for index, message in enumerate(messages):
+            try:
+                success = self.send(message)
+                if not success and errors is not None:
+                    errors[index] = "Rejected by email provider"
+            except Exception as e:
+                print(f"Error sending email to {message.to_email}: {str(e)}")
+                success = False
+                if errors is not None:
+                    errors[index] = str(e)
+            results.append(success)
+        return results
+    
+    def close(self):
+        """Release any connections held by the transport."""
+    
+    def _send(self, message: OutgoingEmail) -> bool:
+        raise NotImplementedError
+    
+    def _send_batch(self, batch: OutgoingBatch) -> bool:
+        results = [self._send(message) for message in batch.expand()]
+        return all(results)
+
+
+class SendGridTransport(EmailTransport):
+    """SendGrid Web API; batches go out as one multi-personalization request."""
+    
+    name = 'sendgrid'
+    supports_bulk = True
+    
+    def __init__(self, api_key: Optional[str] = None):
+        super().__init__()
+        self.client = SendGridAPIClient(api_key=api_key or os.getenv('SENDGRID_API_KEY'))
+    
+    def _send(self, message: OutgoingEmail) -> bool:
+        mail = Mail(
+            from_email=From(message.from_email, message.from_name),
+            to_emails=To(message.to_email, message.to_name),
+            subject=Subject(message.subject),
+            html_content=HtmlContent(message.html_content),
+            plain_text_content=PlainTextContent(message.plain_content)
+        )
+        
+        # Add categories for tracking
+        mail.category = [Category(category) for category in message.categories]
+        for key, value in message.custom_args.items():
+            mail.custom_arg = CustomArg(key, value)
+        
+        response = self.client.send(mail)
+        return response.status_code in [200, 202]
+    
+    def _send_batch(self, batch: OutgoingBatch) -> bool:
+        mail = Mail(
+            from_email=From(batch.from_email, batch.from_name),
+            subject=Subject(batch.subject),
+            html_content=HtmlContent(batch.html_content),
+            plain_text_content=PlainTextContent(batch.plain_content)
+        )
+        
+        for recipient in batch.personalizations:
+            personalization = Personalization()
+            personalization.add_to(To(recipient.to_email, recipient.to_name))
+            for token, value in recipient.substitutions.items():
+                personalization.add_substitution(Substitution(token, value))
+            for key, value in recipient.custom_args.items():
+                personalization.add_custom_arg(CustomArg(key, value))
+            mail.add_personalization(personalization)
+        
+        mail.category = [Category(category) for category in batch.categories]
+        
+        response = self.client.send(mail)
+        return response.status_code in [200, 202]
+
+
+class SMTPTransport(EmailTransport):
+    """Plain SMTP with one connection per batch.
+    
+    send_many() and send_batch() open a connection on their first message,
+    reuse it for the rest (reopening it if the server drops it) and quit
+    when the batch ends, so no connection outlives a send. A single send()
+    uses its own connection. Connections are per thread.
+    """
+    
+    name = 'smtp'
+    
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 25,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        timeout: float = 30.0
+    ):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def send_many(
+        self,
+        messages: Iterable[OutgoingEmail],
+        errors: Optional[Dict[int, str]] = None
+    ) -> List[bool]:
+        with self._batch_connection():
+            return super().send_many(messages, errors)
+    
+    def _send_batch(self, batch: OutgoingBatch) -> bool:
+        with self._batch_connection():
+            return super()._send_batch(batch)
+    
+    @contextmanager
+    def _batch_connection(self):
+        """Share one connection between the messages sent inside the block."""
+        if getattr(self._local, 'in_batch', False):
+            yield
+            return
+        
+        self._local.in_batch = True
+        try:
+            yield
+        finally:
+            self._local.in_batch = False
+            connection, self._local.connection = getattr(self._local, 'connection', None), None
+            if connection is not None:
+                self._quit(connection)
+    
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or '')
+        return connection
+    
+    @staticmethod
+    def _quit(connection: smtplib.SMTP):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+    
+    def _send(self, message: OutgoingEmail) -> bool:
+        mime = to_mime(message)
+        if not getattr(self._local, 'in_batch', False):
+            connection = self._connect()
+            try:
+                return not connection.send_message(mime)
+            finally:
+                self._quit(connection)
+        
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        try:
+            refused = connection.send_message(mime)
+        except smtplib.SMTPServerDisconnected:
+            connection = self._local.connection = self._connect()
+            refused = connection.send_message(mime)
+        return not refused
+
+
+class InMemoryTransport(EmailTransport):
+    """Keeps every message in memory instead of delivering it."""
+    
+    name = 'memory'
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.messages: List[OutgoingEmail] = []
+        self.batches: List[OutgoingBatch] = []
+    
+    def _send(self, message: OutgoingEmail) -> bool:
+        with self._lock:
+            self.messages.append(message)
+        return True
+    
+    def _send_batch(self, batch: OutgoingBatch) -> bool:
+        with self._lock:
+            self.batches.append(batch)
+        return True
+    
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.batches.clear()
+
+
+class FileSpoolTransport(EmailTransport):
+    """Writes each message as an .eml file into a spool directory."""
+    
+    name = 'file'
+    
+    def __init__(self, spool_dir: str = './email_spool'):
+        super().__init__()
+        self.spool_dir = spool_dir
+        os.makedirs(spool_dir, exist_ok=True)
+    
+    def _send(self, message: OutgoingEmail) -> bool:
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.eml")
+        with open(path, 'wb') as spool_file:
+            spool_file.write(to_mime(message).as_bytes())
+        return True
+
+
+def to_mime(message: OutgoingEmail) -> MIMEMessage:
+    """Build a multipart/alternative MIME message."""
+    mime = MIMEMessage()
+    mime['From'] = formataddr((message.from_name, message.from_email))
+    mime['To'] = formataddr((message.to_name or '', message.to_email))
+    mime['Subject'] = message.subject
+    if message.categories:
+        mime['X-Categories'] = ', '.join(message.categories)
+    for key, value in message.custom_args.items():
+        mime[f'X-Custom-{key}'] = value
+    mime.set_content(message.plain_content)
+    mime.add_alternative(message.html_content, subtype='html')
+    return mime
+
+
+def create_transport(name: Optional[str] = None) -> EmailTransport:
+    """Create the transport named by EMAIL_TRANSPORT (default: sendgrid)."""
+    name = (name or os.getenv('EMAIL_TRANSPORT', 'sendgrid')).lower()
+    
+    if name == 'sendgrid':
+        return SendGridTransport()
+    if name == 'smtp':
+        return SMTPTransport(
+            host=os.getenv('SMTP_HOST', 'localhost'),
+            port=int(os.getenv('SMTP_PORT', '25')),
+            username=os.getenv('SMTP_USERNAME') or None,
+            password=os.getenv('SMTP_PASSWORD') or None,
+            use_tls=os.getenv('SMTP_USE_TLS', 'false').lower() == 'true'
+        )
+    if name == 'memory':
+        return InMemoryTransport()
+    if name == 'file':
+        return FileSpoolTransport(os.getenv('EMAIL_SPOOL_DIR', './email_spool'))
+    
+    raise ValueError(f"Unknown email transport: {name}")
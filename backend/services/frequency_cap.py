@@ -0,0 +1,172 @@
+"""
+Cross-campaign frequency cap.
+
+Every automated pass (engagement, post-wedding, nurture, follow-up, retries)
+checks the same cap before dispatch: at most ``max_sends`` emails per couple
+in any rolling window. For each couple the store keeps only the times of its
+last ``max_sends`` sends, so the check is O(1): the couple is capped when
+that list is full and its oldest entry is still inside the window.
+
+Counters live in memory and are written to the contact_frequency table
+periodically and at the end of each run. Several processes may send at
+once, so each run reloads the table when it starts and a flush merges its
+sends into the stored ones instead of replacing them.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import ContactFrequency
+
+
+class FrequencyCap:
+    """Sliding-window send counters per couple."""
+    
+    def __init__(self, max_sends: int = 3, window_days: float = 7, flush_interval: float = 60):
+        self.max_sends = max_sends
+        self.window_seconds = window_days * 86400
+        self.flush_interval = flush_interval
+        
+        self._lock = threading.Lock()
+        # Stored sends plus this process's unflushed ones: what the cap checks
+        self._sends: Dict[int, Deque[int]] = {}
+        # Sends recorded here and not yet in the database, per couple
+        self._unflushed: Dict[int, List[int]] = {}
+        self._last_flush = time.monotonic()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_sends > 0
+    
+    def load(self, db: Session):
+        """Replace the counters with the persisted ones plus sends not flushed yet.
+        
+        Called at the start of every run so sends recorded by other
+        processes since the last run count against the cap.
+        """
+        if not self.enabled:
+            return
+        
+        cutoff = time.time() - self.window_seconds
+        # A row untouched for a whole window holds no send inside it
+        persisted = dict(db.query(ContactFrequency.couple_id, ContactFrequency.send_times).filter(
+            ContactFrequency.updated_at >= datetime.fromtimestamp(cutoff)
+        ).all())
+        
+        with self._lock:
+            sends = {}
+            for couple_id in set(persisted) | set(self._unflushed):
+                recent = self._merge(persisted.get(couple_id), self._unflushed.get(couple_id, ()), cutoff)
+                if recent:
+                    sends[couple_id] = deque(recent, maxlen=self.max_sends)
+            self._sends = sends
+    
+    def allows(self, couple_id: int, now: Optional[float] = None) -> bool:
+        """True if another email to the couple stays within the cap."""
+        if not self.enabled:
+            return True
+        
+        sends = self._sends.get(couple_id)
+        if sends is None or len(sends) < self.max_sends:
+            return True
+        return sends[0] <= (now or time.time()) - self.window_seconds
+    
+    def next_allowed_at(self, couple_id: int) -> datetime:
+        """When the couple's oldest counted send leaves the window."""
+        sends = self._sends.get(couple_id)
+        if not self.enabled or not sends or len(sends) < self.max_sends:
+            return datetime.now()
+        return datetime.fromtimestamp(sends[0] + self.window_seconds)
+    
+    def record(self, couple_id: int, now: Optional[float] = None):
+        """Count a delivered email against the couple's window."""
+        if not self.enabled:
+            return
+        
+        sent = int(now or time.time())
+        with self._lock:
+            sends = self._sends.get(couple_id)
+            if sends is None:
+                sends = self._sends[couple_id] = deque(maxlen=self.max_sends)
+            sends.append(sent)
+            self._unflushed.setdefault(couple_id, []).append(sent)
+    
+    def flush_if_due(self, db: Session):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush(db)
+    
+    def flush(self, db: Session):
+        """Add unflushed sends to the stored ones (caller commits).
+        
+        Stored send times written by other processes are kept: each row
+        becomes the latest ``max_sends`` of its stored times plus ours, and
+        the result is taken back into memory. Only sends not yet written
+        are added, so equal timestamps are separate sends, not duplicates.
+        """
+        with self._lock:
+            local, self._unflushed = self._unflushed, {}
+            self._last_flush = time.monotonic()
+        
+        if not local:
+            return
+        
+        cutoff = time.time() - self.window_seconds
+        now = datetime.now()
+        merged = {}
+        try:
+            with db.begin_nested():
+                stored = {
+                    row.couple_id: row
+                    for row in db.query(ContactFrequency).filter(
+                        ContactFrequency.couple_id.in_(list(local))
+                    ).with_for_update()
+                }
+                for couple_id, send_times in local.items():
+                    row = stored.get(couple_id)
+                    merged[couple_id] = self._merge(row.send_times if row else None, send_times, cutoff)
+                    if row is None:
+                        db.add(ContactFrequency(couple_id=couple_id, send_times=merged[couple_id], updated_at=now))
+                    else:
+                        row.send_times = merged[couple_id]
+                        row.updated_at = now
+        except Exception as e:
+            print(f"Error persisting frequency counters: {str(e)}")
+            with self._lock:
+                for couple_id, send_times in local.items():
+                    self._unflushed[couple_id] = send_times + self._unflushed.get(couple_id, [])
+            return
+        
+        with self._lock:
+            for couple_id, send_times in merged.items():
+                # Sends recorded while the flush ran are still unflushed
+                send_times = self._merge(send_times, self._unflushed.get(couple_id, ()), cutoff)
+                self._sends[couple_id] = deque(send_times, maxlen=self.max_sends)
+    
+    def _merge(self, stored: Optional[Iterable[int]], local: Iterable[int], cutoff: float) -> List[int]:
+        """The latest ``max_sends`` of both lists' send times inside the window, oldest first.
+        
+        Both lists count: the same second in each means two sends.
+        """
+        recent = sorted(sent for sent in [*(stored or ()), *local] if sent > cutoff)
+        return recent[-self.max_sends:]
+
+
+_frequency_cap: Optional[FrequencyCap] = None
+
+
+def get_frequency_cap() -> FrequencyCap:
+    """Get the process-wide frequency cap (EMAIL_FREQUENCY_CAP <= 0 disables it)."""
+    global _frequency_cap
+    if _frequency_cap is None:
+        _frequency_cap = FrequencyCap(
+            max_sends=int(os.getenv('EMAIL_FREQUENCY_CAP', '3')),
+            window_days=float(os.getenv('EMAIL_FREQUENCY_WINDOW_DAYS', '7')),
+            flush_interval=float(os.getenv('EMAIL_FREQUENCY_FLUSH_SECONDS', '60'))
+        )
+    return _frequency_cap
@@ -0,0 +1,119 @@
+"""
+HTML to plain-text conversion for the text/plain part of emails.
+
+Conversion runs once per template version: results are cached by the
+SHA-256 of the HTML source, and the converted text is itself a Jinja
+template, so ``{{ ... }}`` placeholders pass through untouched and are
+rendered per recipient like the HTML part.
+"""
+
+import hashlib
+import os
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from jinja2.utils import LRUCache
+
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'div', 'footer', 'form',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'main', 'nav', 'p',
+    'pre', 'section', 'table', 'tr'
+}
+SKIPPED_TAGS = {'head', 'script', 'style', 'title'}
+INDENT = '\x00'
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text with paragraph breaks, list markers and link targets."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.lists: List[Optional[int]] = []  # None for <ul>, next number for <ol>
+        self.links: List[Optional[str]] = []
+        self.link_text: List[List[str]] = []
+        self.skip_depth = 0
+    
+    def _write(self, text: str):
+        if self.link_text:
+            self.link_text[-1].append(text)
+        else:
+            self.parts.append(text)
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == 'br':
+            self._write('\n')
+        elif tag in BLOCK_TAGS:
+            self._write('\n\n')
+        elif tag in ('ul', 'ol'):
+            if not self.lists:
+                self._write('\n')
+            self.lists.append(1 if tag == 'ol' else None)
+        elif tag == 'li':
+            marker = '-'
+            if self.lists and self.lists[-1] is not None:
+                marker = f"{self.lists[-1]}."
+                self.lists[-1] += 1
+            # Placeholder indent so line stripping doesn't remove it
+            indent = INDENT * max(len(self.lists) - 1, 0)
+            self._write(f"\n{indent}{marker} ")
+        elif tag == 'a':
+            self.links.append(dict(attrs).get('href'))
+            self.link_text.append([])
+        elif tag in ('td', 'th'):
+            self._write(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._write('\n\n')
+        elif tag in ('ul', 'ol'):
+            if self.lists:
+                self.lists.pop()
+            if not self.lists:
+                self._write('\n')
+        elif tag == 'a' and self.link_text:
+            text = ' '.join(''.join(self.link_text.pop()).split())
+            href = self.links.pop()
+            if href and not href.startswith(('#', 'mailto:')) and href != text:
+                text = f"{text} ({href})" if text else href
+            elif href and href.startswith('mailto:') and not text:
+                text = href[len('mailto:'):]
+            self._write(text)
+    
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._write(data)
+
+
+def convert_html_to_text(html: str) -> str:
+    """Convert HTML to readable plain text (uncached)."""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    
+    text = ''.join(extractor.parts)
+    
+    # Collapse source whitespace within lines, keep the breaks we emitted
+    lines = [re.sub(r'[ \t\r\f\v]+', ' ', line).strip() for line in text.split('\n')]
+    text = '\n'.join(lines).replace(INDENT, '  ')
+    
+    return re.sub(r'\n{3,}', '\n\n', text).strip() + '\n'
+
+
+_text_cache = LRUCache(int(os.getenv('EMAIL_PLAIN_TEXT_CACHE_SIZE', '512')))
+
+
+def html_to_text(html: str) -> str:
+    """Plain-text version of an HTML template, cached by content hash."""
+    key = hashlib.sha256(html.encode('utf-8')).hexdigest()
+    text = _text_cache.get(key)
+    if text is None:
+        text = convert_html_to_text(html)
+        _text_cache[key] = text
+    return text
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 import re
@@ -12,8 +12,16 @@ class LeadScoringService:
     def __init__(self, db: Session):
         self.db = db
     
-    def calculate_lead_score(self, lead: Lead, couple: Couple) -> float:
-        """Calculate comprehensive lead score for a couple/lead."""
+    def calculate_lead_score(
+        self,
+        lead: Lead,
+        couple: Couple,
+        rules: Optional[List[LeadScoringRule]] = None
+    ) -> float:
+        """Calculate comprehensive lead score for a couple/lead.
+        
+        ``rules`` are the active custom rules, if already loaded.
+        """
         score = 0.0
         
         # Wedding budget scoring (25 points max)
@@ -32,10 +40,30 @@ class LeadScoringService:
         score += self._score_engagement_level(couple)
         
         # Apply custom scoring rules
-        score += self._apply_custom_rules(lead, couple)
+        score += self._apply_custom_rules(lead, couple, rules)
         
         return min(100.0, max(0.0, score))  # Clamp between 0-100
     
+    def calculate_lead_scores(self, pairs: Iterable[Tuple[Lead, Couple]]) -> Dict[int, float]:
+        """Scores for many (lead, couple) pairs by lead id, loading the rules once."""
+        rules = self._active_rules()
+        return {lead.id: self.calculate_lead_score(lead, couple, rules) for lead, couple in pairs}
+    
+    def rules_use_fields(self, field_names: Iterable[str]) -> bool:
+        """Whether any active custom rule reads one of these fields.
+        
+        The built-in factors only read financial, wedding and engagement
+        data, so a change to other fields (e.g. status or assignment) moves
+        the score only through such a rule.
+        """
+        field_names = list(field_names)
+        if not field_names:
+            return False
+        return self.db.query(LeadScoringRule.id).filter(
+            LeadScoringRule.is_active == True,
+            LeadScoringRule.field_name.in_(field_names)
+        ).first() is not None
+    
     def _score_wedding_budget(self, budget: Optional[float]) -> float:
         """Score based on wedding budget as indicator of financial capacity."""
         if not budget:
@@ -169,14 +197,23 @@ class LeadScoringService:
         
         return min(15.0, score)
     
-    def _apply_custom_rules(self, lead: Lead, couple: Couple) -> float:
+    def _active_rules(self) -> List[LeadScoringRule]:
+        return self.db.query(LeadScoringRule).filter(
+            LeadScoringRule.is_active == True
+        ).all()
+    
+    def _apply_custom_rules(
+        self,
+        lead: Lead,
+        couple: Couple,
+        rules: Optional[List[LeadScoringRule]] = None
+    ) -> float:
         """Apply custom scoring rules defined by users."""
         score = 0.0
         
         # Get active scoring rules
-        rules = self.db.query(LeadScoringRule).filter(
-            LeadScoringRule.is_active == True
-        ).all()
+        if rules is None:
+            rules = self._active_rules()
         
         for rule in rules:
             if self._evaluate_rule(rule, lead, couple):
@@ -212,7 +249,7 @@ class LeadScoringService:
                 return str(field_value).lower() in values
             elif rule.operator == 'contains':
                 return str(rule_value).lower() in str(field_value).lower()
-            
+        
         except (ValueError, AttributeError):
             return False
         
@@ -0,0 +1,188 @@
+"""
+Local market data for email personalization.
+
+Average home prices and mortgage rates per state (optionally per metro) are
+loaded from a CSV or JSON file into an in-memory table. Lookups are plain
+dict reads, so rendering an email never queries a database or remote API.
+The table is reloaded once its TTL has passed (only if the source changed)
+and swapped in with a single assignment, so readers always see either the
+old or the new table, never a partly loaded one.
+
+CSV columns / JSON object keys: ``state``, ``metro`` (optional, blank for
+the state-wide row), ``avg_home_price``, ``current_rate``. A row with an
+empty state is used as the national default.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import astuple, dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from jinja2.utils import LRUCache
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    state: str
+    metro: str
+    avg_home_price: float
+    current_rate: float  # Percent, e.g. 6.75
+    
+    def template_variables(self) -> Dict[str, str]:
+        return {
+            'avg_home_price': f"${self.avg_home_price:,.0f}",
+            'current_rate': f"{self.current_rate:.2f}%",
+        }
+
+
+# Used when no file is configured or a state has no row
+DEFAULT_MARKET_SNAPSHOT = MarketSnapshot(state='', metro='', avg_home_price=425000, current_rate=6.75)
+
+# Version of an empty table, i.e. only DEFAULT_MARKET_SNAPSHOT
+BUILTIN_MARKET_DATA_VERSION = 'builtin'
+
+MarketKey = Tuple[str, str]
+
+
+def load_market_file(path: str) -> List[Dict]:
+    """Read market rows from a .json (list of objects) or .csv file."""
+    with open(path, newline='', encoding='utf-8') as market_file:
+        if path.lower().endswith('.json'):
+            return json.load(market_file)
+        return list(csv.DictReader(market_file))
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or '').strip().lower()
+
+
+class MarketDataStore:
+    """In-memory per-state/metro market table with TTL-based atomic refresh."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 3600,
+        loader: Optional[Callable[[], Iterable[Dict]]] = None
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        
+        # Any callable returning rows works, e.g. a query against a rates table
+        self._loader = loader
+        
+        self._refresh_lock = threading.Lock()
+        self._table: Dict[MarketKey, MarketSnapshot] = {}
+        self.version = BUILTIN_MARKET_DATA_VERSION  # Content hash of the table; changes whenever the data does
+        self._variables = LRUCache(1024)
+        self._source_mtime: Optional[float] = None
+        self._expires_at = 0.0
+        
+        if path or loader:
+            self.refresh()
+    
+    def refresh(self) -> bool:
+        """Reload the table now; on failure the current table is kept."""
+        try:
+            if self._loader is not None:
+                rows = self._loader()
+            else:
+                self._source_mtime = os.path.getmtime(self.path)
+                rows = load_market_file(self.path)
+            table = {}
+            for row in rows:
+                snapshot = MarketSnapshot(
+                    state=_normalize(row.get('state')),
+                    metro=_normalize(row.get('metro')),
+                    avg_home_price=float(row['avg_home_price']),
+                    current_rate=float(row['current_rate'])
+                )
+                table[(snapshot.state, snapshot.metro)] = snapshot
+        except Exception as e:
+            print(f"Error loading market data: {str(e)}")
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return False
+        
+        version = hashlib.sha256(
+            json.dumps(sorted(map(astuple, table.values()))).encode('utf-8')
+        ).hexdigest()[:16] if table else BUILTIN_MARKET_DATA_VERSION
+        if version == self.version:
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return True
+        
+        # Swap in the new table, then drop formatted variables from the old one
+        self._table = table
+        self._variables = LRUCache(1024)
+        self.version = version
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        return True
+    
+    def refresh_if_expired(self):
+        """Reload the table if the TTL has passed and the source changed."""
+        if time.monotonic() < self._expires_at or (self.path is None and self._loader is None):
+            return
+        
+        # One caller refreshes; everyone else keeps reading the current table
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._expires_at:
+                return
+            if self._loader is None and self._source_unchanged():
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                return
+            self.refresh()
+        finally:
+            self._refresh_lock.release()
+    
+    def _source_unchanged(self) -> bool:
+        try:
+            return os.path.getmtime(self.path) == self._source_mtime
+        except OSError:
+            return False
+    
+    def snapshots(self) -> List[MarketSnapshot]:
+        """All rows of the current table."""
+        return list(self._table.values())
+    
+    def lookup(self, state: Optional[str], metro: Optional[str] = None) -> MarketSnapshot:
+        """Most specific snapshot: metro, then state, then national default."""
+        self.refresh_if_expired()
+        table = self._table
+        state_key, metro_key = _normalize(state), _normalize(metro)
+        
+        return (
+            (metro_key and table.get((state_key, metro_key)))
+            or table.get((state_key, ''))
+            or table.get(('', ''))
+            or DEFAULT_MARKET_SNAPSHOT
+        )
+    
+    def template_variables(self, state: Optional[str], metro: Optional[str] = None) -> Dict[str, str]:
+        """Formatted template variables for a location, cached per table version."""
+        self.refresh_if_expired()
+        variables_cache = self._variables
+        key = (_normalize(state), _normalize(metro))
+        variables = variables_cache.get(key)
+        if variables is None:
+            variables = self.lookup(state, metro).template_variables()
+            variables_cache[key] = variables
+        return variables
+
+
+_market_data_store: Optional[MarketDataStore] = None
+
+
+def get_market_data_store() -> MarketDataStore:
+    """Get the process-wide store configured by MARKET_DATA_FILE."""
+    global _market_data_store
+    if _market_data_store is None:
+        _market_data_store = MarketDataStore(
+            path=os.getenv('MARKET_DATA_FILE') or None,
+            ttl_seconds=float(os.getenv('MARKET_DATA_TTL_SECONDS', '3600'))
+        )
+    return _market_data_store
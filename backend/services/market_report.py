@@ -0,0 +1,178 @@
+"""
+Pre-rendered market report pages.
+
+Every campaign email links to ``/market-report?location={state}``, so a
+send produces bursts of identical requests per state. Pages are rendered
+ahead of time for every state in the market data table, as HTML and JSON,
+and served straight from memory. A background thread watches the market
+data version and rebuilds all pages when it changes; requests never render.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from jinja2 import Environment
+
+from services.market_data import MarketDataStore, MarketSnapshot, get_market_data_store
+
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{{ title }}</title>
+</head>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        <h1 style="color: #2c5aa0;">{{ title }}</h1>
+        <ul>
+            <li>Average home price: {{ overview.avg_home_price }}</li>
+            <li>Current mortgage rate: {{ overview.current_rate }}</li>
+        </ul>
+        {% if metros %}
+        <h2 style="color: #2c5aa0;">Metro Areas</h2>
+        <table>
+            <tr><th>Metro</th><th>Average home price</th><th>Current rate</th></tr>
+            {% for metro in metros %}
+            <tr><td>{{ metro.name }}</td><td>{{ metro.avg_home_price }}</td><td>{{ metro.current_rate }}</td></tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+        <p style="color: #666; font-size: 12px;">Updated {{ generated_at }}</p>
+    </div>
+</body>
+</html>
+"""
+
+
+@dataclass(frozen=True)
+class RenderedReport:
+    state: str
+    version: str
+    html: bytes
+    html_etag: str
+    json: bytes
+    json_etag: str
+
+
+class MarketReportCache:
+    """Versioned HTML/JSON report pages per state, rebuilt in the background."""
+    
+    def __init__(self, market_data: Optional[MarketDataStore] = None, check_interval: float = 60):
+        self.market_data = market_data or get_market_data_store()
+        self.check_interval = check_interval
+        self._template = Environment(autoescape=True).from_string(REPORT_TEMPLATE)
+        
+        # Replaced as a whole on rebuild; '' holds the national page
+        self._reports: Dict[str, RenderedReport] = {}
+        self.version: Optional[str] = None
+        
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Build all pages now, then keep them current from a daemon thread."""
+        self.rebuild_if_changed()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='market-report-cache', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.rebuild_if_changed()
+            except Exception as e:
+                print(f"Error rebuilding market reports: {str(e)}")
+    
+    def rebuild_if_changed(self) -> bool:
+        """Rebuild every page if the market data version moved; True if rebuilt."""
+        self.market_data.refresh_if_expired()
+        version = self.market_data.version
+        if version == self.version and self._reports:
+            return False
+        
+        by_state: Dict[str, List[MarketSnapshot]] = {'': []}
+        for snapshot in self.market_data.snapshots():
+            by_state.setdefault(snapshot.state, []).append(snapshot)
+        
+        generated_at = datetime.now().isoformat(timespec='seconds')
+        reports = {
+            state: self._render(state, snapshots, version, generated_at)
+            for state, snapshots in by_state.items()
+        }
+        
+        self._reports = reports
+        self.version = version
+        return True
+    
+    def _render(
+        self,
+        state: str,
+        snapshots: List[MarketSnapshot],
+        version: str,
+        generated_at: str
+    ) -> RenderedReport:
+        overview = next((s for s in snapshots if not s.metro), None) or self.market_data.lookup(state)
+        metros = sorted((s for s in snapshots if s.metro), key=lambda s: s.metro)
+        
+        payload = {
+            'location': state.upper() or None,
+            'version': version,
+            'generated_at': generated_at,
+            'avg_home_price': overview.avg_home_price,
+            'current_rate': overview.current_rate,
+            'metros': [
+                {'name': s.metro.title(), 'avg_home_price': s.avg_home_price, 'current_rate': s.current_rate}
+                for s in metros
+            ],
+        }
+        html = self._template.render(
+            title=f"{state.upper()} Housing Market Report" if state else "Housing Market Report",
+            overview=overview.template_variables(),
+            metros=[{'name': s.metro.title(), **s.template_variables()} for s in metros],
+            generated_at=generated_at
+        ).encode('utf-8')
+        json_body = json.dumps(payload).encode('utf-8')
+        
+        return RenderedReport(
+            state=state,
+            version=version,
+            html=html,
+            html_etag=f'"{hashlib.sha256(html).hexdigest()[:16]}"',
+            json=json_body,
+            json_etag=f'"{hashlib.sha256(json_body).hexdigest()[:16]}"'
+        )
+    
+    def get(self, location: Optional[str]) -> Optional[RenderedReport]:
+        """Pre-rendered page for a state, falling back to the national page.
+        
+        Returns None only before the first build.
+        """
+        reports = self._reports
+        state = (location or '').strip().lower()
+        return reports.get(state) or reports.get('')
+
+
+_market_report_cache: Optional[MarketReportCache] = None
+
+
+def get_market_report_cache() -> MarketReportCache:
+    """Get the process-wide report cache (started by the app on startup)."""
+    global _market_report_cache
+    if _market_report_cache is None:
+        _market_report_cache = MarketReportCache(
+            check_interval=float(os.getenv('MARKET_REPORT_CHECK_SECONDS', '60'))
+        )
+    return _market_report_cache
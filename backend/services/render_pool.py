@@ -0,0 +1,70 @@
+"""
+Process-pool rendering stage for very large campaigns.
+
+EmailService splits recipients into chunks of compact per-recipient rows
+(slot value tuples for pre-rendered templates, variable dicts otherwise)
+and RenderPool renders them in worker processes. Rendered messages stream
+back in submission order, and only a bounded number of chunks is in flight
+at a time, so a slow transport holds back rendering instead of letting
+rendered bodies pile up in memory.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+def render_chunk(template: Any, rows: List) -> List[Tuple[str, str, str]]:
+    """Render one chunk of recipients to (subject, html, plain) tuples.
+    
+    ``template`` is either a PrerenderedTemplate with rows of slot values,
+    or an EmailTemplate with rows of full variable dicts. Runs in worker
+    processes as well as in-process for small campaigns.
+    """
+    from services.email_service import PrerenderedTemplate, get_template_cache
+    
+    if isinstance(template, PrerenderedTemplate):
+        slots = template.slots
+        return [template.render(dict(zip(slots, row))) for row in rows]
+    
+    template_cache = get_template_cache()
+    compiled = [
+        template_cache.get(source)
+        for source in (template.subject, template.html_content, template.plain_content)
+    ]
+    return [tuple(part.render(**row) for part in compiled) for row in rows]
+
+
+class RenderPool:
+    """Renders chunks of personalized emails across worker processes."""
+    
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        
+        # Chunks in flight; bounds memory when dispatch is slower than rendering
+        self.max_pending = max_pending or self.workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def render(self, jobs: Iterable[Tuple[Any, List]]) -> Iterator[Tuple[str, str, str]]:
+        """Render (template, rows) jobs, yielding messages in job and row order.
+        
+        Jobs are pulled lazily: a new chunk is only submitted once the
+        consumer has taken the results of an earlier one.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        
+        pending = deque()
+        for template, rows in jobs:
+            pending.append(self._executor.submit(render_chunk, template, rows))
+            if len(pending) >= self.max_pending:
+                yield from pending.popleft().result()
+        
+        while pending:
+            yield from pending.popleft().result()
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,198 @@
+"""
+Persistent retry queue for failed campaign sends.
+
+A failed send stays on its CampaignSend row with status ``retrying`` and a
+``next_attempt_at`` chosen by jittered exponential backoff. Due rows are
+picked up directly by id, so a transient provider error costs one targeted
+resend instead of another pass over the eligibility queries. Sends that
+fail permanently or exhaust their attempts move to the dead-letter table
+with the failure reason.
+
+Rows are claimed (``pending``, with ``claimed_at``) before the provider is
+called. A claim still pending after ``claim_timeout_seconds`` belongs to a
+run that died mid-send; it is requeued as a due retry. Delivery is
+therefore at-least-once: a send that reached the provider just before the
+crash goes out again.
+
+A run renews its claims right before each provider call and drops any that
+another run requeued meanwhile, so a long pass does not lose its batches.
+The timeout must still exceed the longest provider call for one batch:
+a claim that expires mid-call is requeued and sent again.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models.database import CampaignSend, DeadLetterSend, Lead
+from services.email_service import SendFailure
+from utils.database import insert_or_ignore
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay_seconds: float = 300
+    max_delay_seconds: float = 6 * 3600
+    claim_timeout_seconds: float = 900
+    
+    def next_delay(self, attempts: int) -> float:
+        """Backoff after the given number of attempts, with equal jitter.
+        
+        Half the exponential delay is fixed and half is random, so sends
+        that failed together (e.g. one rejected batch) spread out on retry.
+        """
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** max(attempts - 1, 0))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        return cls(
+            max_attempts=int(os.getenv('EMAIL_RETRY_MAX_ATTEMPTS', '5')),
+            base_delay_seconds=float(os.getenv('EMAIL_RETRY_BASE_DELAY_SECONDS', '300')),
+            max_delay_seconds=float(os.getenv('EMAIL_RETRY_MAX_DELAY_SECONDS', '21600')),
+            claim_timeout_seconds=float(os.getenv('EMAIL_CLAIM_TIMEOUT_SECONDS', '900'))
+        )
+
+
+class SendRetryQueue:
+    """Schedules failed sends for retry and dead-letters the hopeless ones."""
+    
+    def __init__(self, db: Session, policy: Optional[RetryPolicy] = None):
+        self.db = db
+        self.policy = policy or RetryPolicy.from_env()
+    
+    def record_failure(self, campaign_send: CampaignSend, failure: SendFailure) -> bool:
+        """Record a failed attempt; True if scheduled for retry, False if dead-lettered."""
+        now = datetime.now()
+        campaign_send.attempts = (campaign_send.attempts or 0) + 1
+        campaign_send.last_error = failure.reason
+        
+        if failure.permanent or campaign_send.attempts >= self.policy.max_attempts:
+            self.dead_letter(campaign_send, failure)
+            return False
+        
+        campaign_send.send_status = 'retrying'
+        campaign_send.next_attempt_at = now + timedelta(
+            seconds=self.policy.next_delay(campaign_send.attempts)
+        )
+        return True
+    
+    def dead_letter(self, campaign_send: CampaignSend, failure: SendFailure):
+        """Stop retrying a send and keep its failure reason for review."""
+        campaign_send.send_status = 'dead'
+        campaign_send.next_attempt_at = None
+        campaign_send.last_error = failure.reason
+        
+        self.db.flush()
+        insert_or_ignore(
+            self.db,
+            DeadLetterSend,
+            {
+                'campaign_send_id': campaign_send.id,
+                'campaign_id': campaign_send.campaign_id,
+                'lead_id': campaign_send.lead_id,
+                'attempts': campaign_send.attempts or 0,
+                'failure_reason': failure.reason,
+                'permanent': failure.permanent,
+                'failed_at': datetime.now()
+            },
+            index_elements=['campaign_send_id']
+        )
+    
+    def requeue_stale_claims(self) -> int:
+        """Turn claims abandoned by a crashed run into retries due now.
+        
+        Counts as an attempt, since the provider may have been called.
+        Returns how many sends were requeued.
+        """
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=self.policy.claim_timeout_seconds)
+        result = self.db.execute(
+            update(CampaignSend)
+            .where(
+                CampaignSend.send_status == 'pending',
+                func.coalesce(CampaignSend.claimed_at, CampaignSend.created_at) < cutoff
+            )
+            .values(
+                send_status='retrying',
+                next_attempt_at=now,
+                attempts=func.coalesce(CampaignSend.attempts, 0) + 1,
+                last_error="Claim expired before the send completed"
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
+    
+    def renew_claims(self, campaign_sends: List[CampaignSend]) -> Set[int]:
+        """Restart the claim timeout of sends about to go to the provider.
+        
+        A claim is renewed only if it is still pending with the claimed_at
+        this run set; one requeued or re-claimed by another run in the
+        meantime is no longer ours. Returns the ids still held. The caller
+        commits.
+        """
+        if not campaign_sends:
+            return set()
+        
+        now = datetime.now()
+        held = set(self.db.execute(
+            update(CampaignSend)
+            .where(
+                CampaignSend.send_status == 'pending',
+                tuple_(CampaignSend.id, CampaignSend.claimed_at).in_(
+                    [(campaign_send.id, campaign_send.claimed_at) for campaign_send in campaign_sends]
+                )
+            )
+            .values(claimed_at=now)
+            .returning(CampaignSend.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+        
+        for campaign_send in campaign_sends:
+            if campaign_send.id in held:
+                set_committed_value(campaign_send, 'claimed_at', now)
+        return held
+    
+    def claim_due(self, limit: int = 1000) -> List[CampaignSend]:
+        """Claim sends whose retry time has come."""
+        return claim_due_sends(self.db, 'retrying', CampaignSend.next_attempt_at, limit)
+
+
+def claim_due_sends(db: Session, status: str, due_column, limit: int = 1000) -> List[CampaignSend]:
+    """Claim sends in ``status`` whose ``due_column`` time has passed.
+    
+    One UPDATE moves the due rows to ``pending`` and returns their ids. On
+    PostgreSQL the due-row subquery locks with SKIP LOCKED, so concurrent
+    runs claim disjoint rows instead of waiting on each other; the status
+    check keeps a row claimed elsewhere from being taken twice. Claimed
+    rows are returned with their campaign, lead and couple loaded.
+    """
+    due = select(CampaignSend.id).where(
+        CampaignSend.send_status == status,
+        due_column <= datetime.now()
+    ).order_by(due_column).limit(limit).with_for_update(skip_locked=True)
+    
+    claimed_ids = db.execute(
+        update(CampaignSend)
+        .where(CampaignSend.id.in_(due), CampaignSend.send_status == status)
+        .values(send_status='pending', claimed_at=datetime.now())
+        .returning(CampaignSend.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    
+    if not claimed_ids:
+        return []
+    
+    return db.query(CampaignSend).options(
+        joinedload(CampaignSend.campaign),
+        joinedload(CampaignSend.lead).joinedload(Lead.couple)
+    ).filter(CampaignSend.id.in_(claimed_ids)).order_by(CampaignSend.id).all()
@@ -0,0 +1,294 @@
+"""
+Database-backed, single-instance job scheduler.
+
+Job definitions and their schedule state live in the scheduled_jobs table,
+so every API process or worker sees the same schedule. Before running a job
+a process takes its lease with one conditional UPDATE; while a run holds the
+lease, other triggers are skipped or, for ``queue`` jobs, folded into one
+follow-up run. Leases expire, so a crashed process cannot block a job
+forever, and long runs renew theirs from a heartbeat thread. Every run is
+recorded in job_runs with its duration and the counts the job returned; a
+run that finished but reported ``errors`` is recorded as ``partial``.
+
+Runs in-process (see ENABLE_CAMPAIGN_SCHEDULER) or standalone:
+
+    python -m services.scheduler
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.database import JobRun, ScheduledJob
+
+
+JobFunction = Callable[[Session], Optional[Dict]]
+
+
+class JobScheduler:
+    """Runs registered jobs on their DB-stored schedule, one instance at a time."""
+    
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        lease_seconds: float = 300,
+        poll_interval: float = 15,
+        owner: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        
+        self._jobs: Dict[str, JobFunction] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def register(self, name: str, func: JobFunction, interval_seconds: int, overlap_policy: str = 'skip'):
+        """Register a job; its DB definition is created on first registration.
+        
+        An existing definition keeps its stored interval and policy, so
+        schedules can be tuned in the database without a deploy.
+        """
+        self._jobs[name] = func
+        
+        db = self.session_factory()
+        try:
+            if db.query(ScheduledJob.id).filter(ScheduledJob.name == name).first() is None:
+                db.add(ScheduledJob(
+                    name=name,
+                    interval_seconds=interval_seconds,
+                    overlap_policy=overlap_policy,
+                    next_run_at=datetime.now()
+                ))
+                db.commit()
+        finally:
+            db.close()
+    
+    def start(self):
+        """Poll for due jobs from a daemon thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='job-scheduler', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Error in job scheduler: {str(e)}")
+            self._stop.wait(self.poll_interval)
+    
+    def run_pending(self) -> int:
+        """Run every registered job that is due; returns how many ran."""
+        db = self.session_factory()
+        try:
+            due = [
+                name for name, in db.query(ScheduledJob.name).filter(
+                    ScheduledJob.name.in_(list(self._jobs)),
+                    ScheduledJob.enabled == True,
+                    or_(ScheduledJob.next_run_at <= datetime.now(), ScheduledJob.queued == True)
+                )
+            ]
+        finally:
+            db.close()
+        
+        return sum(1 for name in due if self.run_job(name) is not None)
+    
+    def run_job(self, name: str) -> Optional[Dict]:
+        """Run a job now if its lease is free.
+        
+        Returns the job's result, or None if another run holds the lease
+        (the trigger is then skipped, or queued for ``queue`` jobs).
+        """
+        func = self._jobs[name]
+        db = self.session_factory()
+        acquired = False
+        try:
+            job = db.query(ScheduledJob).filter(ScheduledJob.name == name).one()
+            
+            acquired = self._acquire_lease(db, job.id)
+            if not acquired:
+                self._record_overlap(db, job)
+                return None
+            
+            result = None
+            while True:
+                result = self._execute(db, job, func)
+                
+                # A trigger queued during the run gets exactly one follow-up run
+                db.refresh(job)
+                if not job.queued:
+                    break
+                job.queued = False
+                db.commit()
+            
+            return result
+        finally:
+            if acquired:
+                self._release_lease(db, name)
+            db.close()
+    
+    def _execute(self, db: Session, job: ScheduledJob, func: JobFunction) -> Dict:
+        started_at = datetime.now()
+        run = JobRun(job_id=job.id, owner=self.owner, started_at=started_at, status='running')
+        db.add(run)
+        
+        # Not due again while this run is in progress
+        job.next_run_at = started_at + timedelta(seconds=job.interval_seconds)
+        db.commit()
+        
+        heartbeat = threading.Event()
+        renewer = threading.Thread(target=self._renew_lease, args=(job.id, heartbeat), daemon=True)
+        renewer.start()
+        
+        started = time.perf_counter()
+        result, error = {}, None
+        job_db = self.session_factory()
+        try:
+            result = func(job_db) or {}
+        except Exception as e:
+            error = str(e)
+            print(f"Error running job {job.name}: {error}")
+        finally:
+            job_db.close()
+            heartbeat.set()
+            renewer.join()
+        
+        duration = time.perf_counter() - started
+        if error:
+            status = 'failed'
+        elif result.get('errors'):
+            status = 'partial'
+        else:
+            status = 'success'
+        
+        run.finished_at = datetime.now()
+        run.duration_seconds = duration
+        run.status = status
+        run.result = result
+        run.error = error
+        
+        job.last_run_at = started_at
+        job.last_status = status
+        job.last_duration_seconds = duration
+        db.commit()
+        
+        return result
+    
+    def _acquire_lease(self, db: Session, job_id: int) -> bool:
+        now = datetime.now()
+        acquired = db.execute(
+            update(ScheduledJob)
+            .where(
+                ScheduledJob.id == job_id,
+                or_(
+                    ScheduledJob.lease_owner.is_(None),
+                    ScheduledJob.lease_expires_at < now
+                )
+            )
+            .values(lease_owner=self.owner, lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        db.commit()
+        return acquired
+    
+    def _renew_lease(self, job_id: int, done: threading.Event):
+        """Extend the lease while the job runs, so long runs are not taken over."""
+        while not done.wait(self.lease_seconds / 3):
+            db = self.session_factory()
+            try:
+                db.execute(
+                    update(ScheduledJob)
+                    .where(ScheduledJob.id == job_id, ScheduledJob.lease_owner == self.owner)
+                    .values(lease_expires_at=datetime.now() + timedelta(seconds=self.lease_seconds))
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            except Exception as e:
+                print(f"Error renewing job lease: {str(e)}")
+            finally:
+                db.close()
+    
+    def _release_lease(self, db: Session, name: str):
+        try:
+            db.rollback()
+            db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == name, ScheduledJob.lease_owner == self.owner)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as e:
+            print(f"Error releasing job lease: {str(e)}")
+    
+    def _record_overlap(self, db: Session, job: ScheduledJob):
+        """Skip the trigger, or queue one follow-up run for ``queue`` jobs."""
+        if job.overlap_policy == 'queue':
+            if job.queued:
+                # Already queued: polls until the run ends add nothing
+                return
+            job.queued = True
+            status = 'queued'
+        else:
+            job.next_run_at = datetime.now() + timedelta(seconds=job.interval_seconds)
+            status = 'skipped'
+        
+        now = datetime.now()
+        db.add(JobRun(job_id=job.id, owner=self.owner, started_at=now, finished_at=now,
+                      duration_seconds=0.0, status=status))
+        db.commit()
+
+
+def run_campaign_automation(db: Session) -> Dict:
+    """Scheduled job: one pass of all automated campaigns."""
+    from services.campaign_automation import CampaignAutomationService
+    service = CampaignAutomationService(db)
+    try:
+        return service.run_automated_campaigns()
+    finally:
+        service.close()
+
+
+def create_campaign_scheduler(session_factory: sessionmaker) -> JobScheduler:
+    """Scheduler with the campaign automation job registered from settings."""
+    scheduler = JobScheduler(
+        session_factory,
+        lease_seconds=float(os.getenv('SCHEDULER_LEASE_SECONDS', '300')),
+        poll_interval=float(os.getenv('SCHEDULER_POLL_SECONDS', '15'))
+    )
+    scheduler.register(
+        'campaign_automation',
+        run_campaign_automation,
+        interval_seconds=int(os.getenv('CAMPAIGN_AUTOMATION_INTERVAL_SECONDS', '300')),
+        overlap_policy='skip'
+    )
+    return scheduler
+
+
+if __name__ == "__main__":
+    from utils.database import SessionLocal
+    
+    scheduler = create_campaign_scheduler(SessionLocal)
+    print(f"Job scheduler {scheduler.owner} running; Ctrl+C to stop")
+    try:
+        while True:
+            scheduler.run_pending()
+            time.sleep(scheduler.poll_interval)
+    except KeyboardInterrupt:
+        pass
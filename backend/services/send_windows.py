@@ -0,0 +1,165 @@
+"""
+Time-zone-aware send windows.
+
+``Campaign.send_time_preference`` names a local-time window ('morning',
+'afternoon', 'evening'). Recipients are bucketed by the time zone of their
+``wedding_state``, and each bucket is spread evenly across the next
+occurrence of the window in that zone, so the provider and our workers see
+a steady trickle instead of a spike when the job starts. Planned sends are
+stored as ``scheduled`` CampaignSend rows and dispatched once due.
+
+A campaign pass plans its recipients batch by batch; ``begin_pass`` gives
+the planner each zone's total for the pass, so later batches take the
+slots after earlier ones instead of starting again at the window's start.
+"""
+
+import os
+from datetime import datetime, time, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from models.database import CampaignSend
+from services.retry_queue import claim_due_sends
+
+
+# Local-time windows as (start, end)
+SEND_WINDOWS = {
+    'morning': (time(9, 0), time(12, 0)),
+    'afternoon': (time(12, 0), time(17, 0)),
+    'evening': (time(17, 0), time(20, 0)),
+}
+
+# Predominant time zone per state; states spanning zones use the most populous
+STATE_TIME_ZONES = {
+    'AL': 'America/Chicago', 'AK': 'America/Anchorage', 'AZ': 'America/Phoenix',
+    'AR': 'America/Chicago', 'CA': 'America/Los_Angeles', 'CO': 'America/Denver',
+    'CT': 'America/New_York', 'DE': 'America/New_York', 'DC': 'America/New_York',
+    'FL': 'America/New_York', 'GA': 'America/New_York', 'HI': 'Pacific/Honolulu',
+    'ID': 'America/Boise', 'IL': 'America/Chicago', 'IN': 'America/Indiana/Indianapolis',
+    'IA': 'America/Chicago', 'KS': 'America/Chicago', 'KY': 'America/New_York',
+    'LA': 'America/Chicago', 'ME': 'America/New_York', 'MD': 'America/New_York',
+    'MA': 'America/New_York', 'MI': 'America/Detroit', 'MN': 'America/Chicago',
+    'MS': 'America/Chicago', 'MO': 'America/Chicago', 'MT': 'America/Denver',
+    'NE': 'America/Chicago', 'NV': 'America/Los_Angeles', 'NH': 'America/New_York',
+    'NJ': 'America/New_York', 'NM': 'America/Denver', 'NY': 'America/New_York',
+    'NC': 'America/New_York', 'ND': 'America/Chicago', 'OH': 'America/New_York',
+    'OK': 'America/Chicago', 'OR': 'America/Los_Angeles', 'PA': 'America/New_York',
+    'RI': 'America/New_York', 'SC': 'America/New_York', 'SD': 'America/Chicago',
+    'TN': 'America/Chicago', 'TX': 'America/Chicago', 'UT': 'America/Denver',
+    'VT': 'America/New_York', 'VA': 'America/New_York', 'WA': 'America/Los_Angeles',
+    'WV': 'America/New_York', 'WI': 'America/Chicago', 'WY': 'America/Denver',
+    'PR': 'America/Puerto_Rico',
+}
+
+STATE_NAMES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI',
+    'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT',
+    'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
+    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND',
+    'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA',
+    'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD', 'tennessee': 'TN',
+    'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA', 'washington': 'WA',
+    'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY', 'puerto rico': 'PR',
+}
+
+DEFAULT_TIME_ZONE = os.getenv('EMAIL_DEFAULT_TIME_ZONE', 'America/New_York')
+
+
+def time_zone_for_state(state: Optional[str]) -> str:
+    """IANA time zone for a state code or name; DEFAULT_TIME_ZONE if unknown."""
+    key = (state or '').strip()
+    code = key.upper() if len(key) == 2 else STATE_NAMES.get(key.lower(), '')
+    return STATE_TIME_ZONES.get(code, DEFAULT_TIME_ZONE)
+
+
+class SendWindowPlanner:
+    """Assigns send times that spread each time zone's recipients across its window."""
+    
+    def __init__(self, default_window: Optional[str] = None):
+        self.default_window = default_window if default_window is not None else (
+            os.getenv('EMAIL_DEFAULT_SEND_WINDOW') or None
+        )
+        self._zones: Dict[str, ZoneInfo] = {}
+        self._pass_started: Optional[datetime] = None
+        self._pass_totals: Dict[str, int] = {}
+        self._pass_offsets: Dict[str, int] = {}
+    
+    def begin_pass(self, state_counts: Iterable[Tuple[Optional[str], int]], now: Optional[datetime] = None):
+        """Start planning a pass from its recipient count per state.
+        
+        Until the next call, plan() spreads each zone's recipients over the
+        whole pass and continues where the previous batch stopped.
+        """
+        self._pass_started = now or datetime.now()
+        self._pass_totals = {}
+        self._pass_offsets = {}
+        for state, count in state_counts:
+            zone_name = time_zone_for_state(state)
+            self._pass_totals[zone_name] = self._pass_totals.get(zone_name, 0) + count
+    
+    def window_for(self, preference: Optional[str]) -> Optional[Tuple[time, time]]:
+        """Window for a campaign preference; None means send immediately."""
+        return SEND_WINDOWS.get((preference or self.default_window or '').lower())
+    
+    def plan(
+        self,
+        recipients: Iterable[Tuple[Hashable, Optional[str]]],
+        preference: Optional[str],
+        now: Optional[datetime] = None
+    ) -> Dict[Hashable, datetime]:
+        """Send time (naive server local time) per recipient key, from (key, state) pairs."""
+        now = now or datetime.now()
+        window = self.window_for(preference)
+        recipients = list(recipients)
+        if window is None:
+            return {key: now for key, _ in recipients}
+        
+        by_zone: Dict[str, List[Hashable]] = {}
+        for key, state in recipients:
+            by_zone.setdefault(time_zone_for_state(state), []).append(key)
+        
+        # Within a pass every batch uses the window as seen when the pass began
+        local_now = (self._pass_started or now).astimezone()
+        offsets = self._pass_offsets if self._pass_started else {}
+        plan = {}
+        for zone_name, keys in by_zone.items():
+            start, end = self._next_window(zone_name, window, local_now)
+            offset = offsets.get(zone_name, 0)
+            total = max(self._pass_totals.get(zone_name, 0), offset + len(keys))
+            offsets[zone_name] = offset + len(keys)
+            step = (end - start) / total
+            for index, key in enumerate(keys, start=offset):
+                send_at = (start + step * index).astimezone(local_now.tzinfo).replace(tzinfo=None)
+                plan[key] = max(send_at, now)
+        return plan
+    
+    def _next_window(
+        self,
+        zone_name: str,
+        window: Tuple[time, time],
+        local_now: datetime
+    ) -> Tuple[datetime, datetime]:
+        """The current window in the zone if still open, otherwise the next day's."""
+        zone = self._zones.get(zone_name)
+        if zone is None:
+            zone = self._zones[zone_name] = ZoneInfo(zone_name)
+        
+        zone_now = local_now.astimezone(zone)
+        day = zone_now.date()
+        start = datetime.combine(day, window[0], tzinfo=zone)
+        end = datetime.combine(day, window[1], tzinfo=zone)
+        if zone_now >= end:
+            start += timedelta(days=1)
+            end += timedelta(days=1)
+        return max(start, zone_now), end
+
+
+def claim_scheduled_sends(db: Session, limit: int = 1000) -> List[CampaignSend]:
+    """Claim scheduled sends whose planned time has come."""
+    return claim_due_sends(db, 'scheduled', CampaignSend.scheduled_send_date, limit)
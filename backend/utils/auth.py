@@ -4,11 +4,13 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 
 from models.database import LoanOfficer
-from utils.database import get_db
+from utils.database import get_async_db
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -58,7 +60,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> LoanOfficer:
     """Get the current authenticated user."""
     credentials_exception = HTTPException(
@@ -75,7 +77,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(LoanOfficer).filter(LoanOfficer.email == email).first()
+    user = await db.scalar(select(LoanOfficer).where(LoanOfficer.email == email))
     if user is None:
         raise credentials_exception
     
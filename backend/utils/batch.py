@@ -0,0 +1,55 @@
+"""
+Batch lookups by id for detail endpoints.
+
+Clients that need many records at once pass ``ids=1,2,3`` to a ``/batch/``
+route instead of calling ``/{id}`` per record: one request, one auth
+check and one ``IN`` query. Results are keyed by id; ids with no record
+map to ``null`` and are also listed under ``not_found``.
+
+Bulk writes take their ids in the request body and are capped separately
+(BULK_MAX_IDS).
+"""
+
+import os
+from typing import Any, Dict, Iterable, List
+
+from fastapi import HTTPException, status
+
+
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", "1000"))
+
+
+def parse_ids(ids: str, max_ids: int = BATCH_MAX_IDS) -> List[int]:
+    """Distinct ids from a comma-separated list, in request order; 400 if invalid or too many."""
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    return check_ids(parsed, max_ids)
+
+
+def check_ids(ids: Iterable[int], max_ids: int) -> List[int]:
+    """Distinct ids in order; 400 if there are none or more than ``max_ids``."""
+    parsed = list(dict.fromkeys(ids))
+    if not parsed:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ids given")
+    if len(parsed) > max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_ids} ids per request"
+        )
+    return parsed
+
+
+def keyed_by_id(ids: Iterable[int], items: Iterable[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    """``{key: {id: item or None}, "not_found": [ids]}`` for a batch response."""
+    found = {item["id"]: item for item in items}
+    ids = list(ids)
+    return {
+        key: {str(item_id): found.get(item_id) for item_id in ids},
+        "not_found": [item_id for item_id in ids if item_id not in found],
+    }
@@ -1,4 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 import os
 from dotenv import load_dotenv
@@ -23,4 +27,61 @@ def get_db() -> Session:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async drivers for the API routers, so queries never block the event loop
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (asyncpg/aiosqlite)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Concurrent requests each hold their own connection, so size the pool for them
+async_engine_options = {}
+if not ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine_options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+    }
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=True, **async_engine_options)
+
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+# Dependency to get an async database session
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def insert_or_ignore(db: Session, model, values: dict, index_elements: list) -> bool:
+    """Insert a row unless it collides with a unique key.
+    
+    Returns True if the row was inserted, False if an existing row already
+    holds the key. The conflict is resolved by the unique index in a single
+    statement, so concurrent callers cannot both win.
+    """
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(db.get_bind().dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(model).values(**values).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+        return db.execute(stmt).rowcount == 1
+    
+    # Generic fallback: let the unique constraint reject the duplicate
+    try:
+        with db.begin_nested():
+            db.execute(model.__table__.insert().values(**values))
+        return True
+    except IntegrityError:
+        return False
@@ -0,0 +1,202 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are read with ``WHERE (sort_key, id) > (last row seen)`` instead of
+an OFFSET, so every page is one index range scan no matter how deep it is.
+Each sort key needs a (sort_key, id) index. The position travels to
+clients as an opaque, URL-safe ``next_cursor``.
+
+Totals are optional. ``exact`` counts on every request; ``estimated``
+serves a recent exact count from a short-lived cache, or PostgreSQL's
+planner estimate for an unfiltered table, so paging does not pay for a
+full count each time.
+"""
+
+import base64
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from jinja2.utils import LRUCache
+from sqlalchemy import Date, DateTime, String, asc, desc, func, select, text, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+KeysetPosition = Tuple[Any, int]
+
+# Extra result column holding a sort value as stored (see keyset_value)
+KEYSET_VALUE_LABEL = 'keyset_value'
+
+
+def encode_cursor(sort_key: str, sort_order: str, value: Any, row_id: int) -> str:
+    """Opaque cursor for the position after a row."""
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    elif isinstance(value, date):
+        value = {'d': value.isoformat()}
+    elif hasattr(value, 'value'):  # Enum
+        value = value.value
+    
+    payload = json.dumps([sort_key, sort_order, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_key: str, sort_order: str) -> KeysetPosition:
+    """Position encoded in a cursor; 400 if it is malformed or from another sort."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['dt']) if 'dt' in value else date.fromisoformat(value['d'])
+        row_id = int(row_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    if (key, order) != (sort_key, sort_order):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match sort_by/sort_order"
+        )
+    return value, row_id
+
+
+def keyset_value(sort_column, dialect_name: str):
+    """Expression whose value a cursor stores and compares for ``sort_column``.
+    
+    SQLite keeps dates and datetimes as text, and not always in the format
+    a bound Python value gets (``func.now()`` writes no microseconds), so
+    there the stored text itself is compared and round-tripped.
+    """
+    if dialect_name == 'sqlite' and isinstance(sort_column.type, (Date, DateTime)):
+        return type_coerce(sort_column, String)
+    return sort_column
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    query: Select,
+    sort_key: str,
+    sort_column,
+    id_column,
+    sort_order: str,
+    page_size: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List, Optional[str]]:
+    """One page of rows plus the cursor for the next page (None on the last).
+    
+    Rows are ordered by (sort_column, id) in ``sort_order`` with NULLs
+    last. Non-NULL values are read with ``(sort_column, id) > (:value, :id)``
+    (``<`` when descending) and the same order, a range scan of a
+    (sort_column, id) index; the NULLs follow by id once they run out.
+    The id tie-breaker makes the order total, so rows sharing a sort value
+    are never skipped or repeated between pages.
+    
+    ``query`` selects columns (a read model) and must include the sort and
+    id columns.
+    
+    ``offset`` is only for clients still paging by number; cursors ignore it.
+    """
+    after = decode_cursor(cursor, sort_key, sort_order) if cursor else None
+    descending = sort_order == 'desc'
+    order = desc if descending else asc
+    
+    def past(column, value):
+        return column < value if descending else column > value
+    
+    # One extra row tells us whether there is a next page
+    limit = page_size + 1
+    
+    value_key = sort_column.key
+    if sort_column is id_column:
+        query = query.order_by(order(id_column))
+        if after is not None:
+            query = query.where(past(id_column, after[1]))
+        elif offset:
+            query = query.offset(offset)
+        rows = (await db.execute(query.limit(limit))).all()
+    else:
+        value = keyset_value(sort_column, db.get_bind().dialect.name)
+        if value is not sort_column:
+            query = query.add_columns(value.label(KEYSET_VALUE_LABEL))
+            value_key = KEYSET_VALUE_LABEL
+        
+        if after is None and offset:
+            ordered = query.order_by(order(sort_column).nulls_last(), order(id_column))
+            rows = (await db.execute(ordered.offset(offset).limit(limit))).all()
+        else:
+            rows = []
+            if after is None or after[0] is not None:
+                present = query.where(sort_column.isnot(None)).order_by(order(sort_column), order(id_column))
+                if after is not None:
+                    present = present.where(past(tuple_(value, id_column), tuple_(*after)))
+                rows = (await db.execute(present.limit(limit))).all()
+            
+            if len(rows) < limit:
+                missing = query.where(sort_column.is_(None)).order_by(order(id_column))
+                if after is not None and after[0] is None:
+                    missing = missing.where(past(id_column, after[1]))
+                rows += (await db.execute(missing.limit(limit - len(rows)))).all()
+    
+    if len(rows) <= page_size:
+        return rows, None
+    
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(sort_key, sort_order, getattr(last, value_key), getattr(last, id_column.key))
+
+
+class CountCache:
+    """Short-lived cache of row counts per filtered query."""
+    
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self._counts = LRUCache(max_entries)
+    
+    async def count(self, db: AsyncSession, query: Select, mode: str = 'estimated') -> Optional[int]:
+        """Total rows of an unpaginated query per ``mode``: exact, estimated or none."""
+        if mode == 'none':
+            return None
+        
+        compiled = query.compile(db.get_bind())
+        key = (str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items())))
+        
+        if mode == 'estimated':
+            cached = self._counts.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+            estimate = await self._planner_estimate(db, query)
+            if estimate is not None:
+                return estimate
+        
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        self._counts[key] = (total, time.monotonic() + self.ttl_seconds)
+        return total
+    
+    async def _planner_estimate(self, db: AsyncSession, query: Select) -> Optional[int]:
+        """PostgreSQL's row estimate for an unfiltered single-table query."""
+        froms = query.get_final_froms()
+        if db.get_bind().dialect.name != 'postgresql' or query.whereclause is not None or len(froms) != 1:
+            return None
+        
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": froms[0].name}
+        )
+        # -1 until the table has been vacuumed or analyzed
+        return estimate if estimate is not None and estimate >= 0 else None
+
+
+_count_cache: Optional[CountCache] = None
+
+
+def get_count_cache() -> CountCache:
+    """Get the process-wide count cache."""
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache(ttl_seconds=float(os.getenv('COUNT_CACHE_TTL_SECONDS', '60')))
+    return _count_cache
@@ -0,0 +1,105 @@
+"""
+Read models and a fast JSON path for read-only endpoints.
+
+Validating every ORM row through a ``from_attributes`` response model and
+then running the default encoder dominates the CPU cost of a list page.
+For rows that come straight from our own tables that work buys nothing, so
+read endpoints map rows to plain dicts with the response model's fields
+and render them with orjson (``ORJSONResponse``). The response model stays
+on the route for the OpenAPI schema. See benchmark_serialization.py for
+the comparison with the model path.
+
+Rows are read with a Core ``select()`` of just those columns, so they come
+back as lightweight named-tuple ``Row`` objects: no ORM instances, identity
+map or change tracking, and no unused columns such as JSON blobs.
+
+``only()`` narrows a read model to a client's ``fields=`` list, so columns
+nobody asked for are neither fetched nor serialized.
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+import orjson
+from fastapi import HTTPException, status
+from jinja2.utils import LRUCache
+from pydantic import BaseModel
+from sqlalchemy import Row, inspect, select
+from sqlalchemy.sql import Select
+
+
+class RowSerializer:
+    """Read model: a response model's columns, selected and mapped to dicts.
+    
+    Works on ORM objects and on Core rows alike. Fields the table does not
+    have (e.g. computed extras) take the model's default.
+    """
+    
+    def __init__(self, model: Type[BaseModel], orm_class: type, names: Optional[Sequence[str]] = None):
+        self.model = model
+        self.orm_class = orm_class
+        names = model.model_fields if names is None else names
+        columns = inspect(orm_class).column_attrs
+        self.fields = tuple(name for name in names if name in columns)
+        self.columns = tuple(getattr(orm_class, name) for name in self.fields)
+        self.defaults = {
+            name: model.model_fields[name].get_default(call_default_factory=True)
+            for name in names
+            if name not in self.fields
+        }
+        self._get = attrgetter(*self.fields)
+        self._subsets = LRUCache(64)
+    
+    def select(self, *extra_columns) -> Select:
+        """Core select of only this model's columns.
+        
+        ``extra_columns`` (e.g. a sort key) are fetched too when the model
+        does not already have them, but are not rendered.
+        """
+        extra = [column for column in extra_columns if column.key not in self.fields]
+        return select(*self.columns, *extra)
+    
+    def only(self, fields: Optional[str]) -> "RowSerializer":
+        """This read model narrowed to a comma-separated ``fields=`` list.
+        
+        Names are checked against the response model (400 if unknown) and
+        ``id`` is always kept. Without ``fields`` the full model is used.
+        """
+        if not fields:
+            return self
+        
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - set(self.model.model_fields))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        
+        requested.add("id")
+        names = tuple(name for name in self.model.model_fields if name in requested)
+        subset = self._subsets.get(names)
+        if subset is None:
+            subset = RowSerializer(self.model, self.orm_class, names)
+            self._subsets[names] = subset
+        return subset
+    
+    def to_dict(self, row: Any) -> Dict[str, Any]:
+        if isinstance(row, Row) and row._fields == self.fields:
+            # Our own select(): the row already is the values, in order
+            values = row
+        else:
+            values = self._get(row)
+            if len(self.fields) == 1:
+                values = (values,)
+        data = dict(zip(self.fields, values))
+        if self.defaults:
+            data.update(self.defaults)
+        return data
+    
+    def to_dicts(self, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self.to_dict(row) for row in rows]
+    
+    def dump_json(self, row: Any) -> bytes:
+        return orjson.dumps(self.to_dict(row))
+
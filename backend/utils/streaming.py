@@ -0,0 +1,69 @@
+"""
+Streaming responses for unbounded list endpoints.
+
+Rows are read from a server-side cursor in batches of STREAM_BATCH_SIZE
+and each batch is serialized and written as soon as it arrives, so memory
+and time to first byte stay flat however many rows match. Two encodings:
+
+- ``stream_json_list``: the usual ``{"<key>": [...], "count": n}`` document,
+  sent in chunks (the count goes last, once it is known)
+- ``stream_ndjson``: one JSON object per line (application/x-ndjson)
+
+The stream opens its own session: the request's session may be closed
+before the body has been sent.
+"""
+
+import os
+from typing import AsyncIterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from utils.database import AsyncSessionLocal
+from utils.serialization import RowSerializer
+
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+async def iter_batches(statement: Select, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List]:
+    """Rows of a column select in batches, read from a server-side cursor."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+
+
+def _encode_batch(batch: List, serializer: RowSerializer) -> List[bytes]:
+    return [serializer.dump_json(row) for row in batch]
+
+
+def stream_ndjson(statement: Select, serializer: RowSerializer) -> StreamingResponse:
+    """Stream rows as NDJSON, one object per line."""
+    async def body():
+        try:
+            async for batch in iter_batches(statement):
+                yield b"\n".join(_encode_batch(batch, serializer)) + b"\n"
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            print(f"Error streaming rows: {str(e)}")
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def stream_json_list(statement: Select, serializer: RowSerializer, key: str) -> StreamingResponse:
+    """Stream rows as a chunked ``{"<key>": [...], "count": n}`` JSON document."""
+    async def body():
+        count = 0
+        yield f'{{"{key}":['.encode("utf-8")
+        try:
+            async for batch in iter_batches(statement):
+                yield (b"," if count else b"") + b",".join(_encode_batch(batch, serializer))
+                count += len(batch)
+        except Exception as e:
+            # Headers are already sent; the client sees invalid (truncated) JSON
+            print(f"Error streaming rows: {str(e)}")
+            return
+        yield f'],"count":{count}}}'.encode("utf-8")
+    
+    return StreamingResponse(body(), media_type="application/json")